@@ -1,18 +1,46 @@
-from fastapi import APIRouter, HTTPException, Request, Query
-from libs.utils.api_client import fetch_weather
-from libs.utils.ml_processor import preprocess_weather_data, make_decision
+from typing import List
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from pydantic import BaseModel, Field
+
+from apps.weather_service.core.config import settings
+from libs.utils.api_client import describe_upstream_error
+from libs.utils.cities import UnknownCity
 from libs.utils.logger import get_logger
-from libs.utils.env_loader import settings
+from libs.utils.ml_processor import (
+    RULES_VERSION,
+    make_decision_async,
+    make_decisions_async,
+    preprocess_weather_data,
+)
+from libs.utils.model_server import get_model_server
+from libs.utils.quota import Priority, upstream_priority
+from libs.utils.upstream import (
+    dedupe_cities,
+    fetch_observation_async,
+    fetch_observations_async,
+)
+from libs.utils.weather_logic import (
+    UPSTREAM_UNAVAILABLE,
+    unknown_city_error,
+    upstream_unavailable_error,
+)
 
 router = APIRouter()
 logger = get_logger(__name__)
 
+
+class BatchDecisionRequest(BaseModel):
+    cities: List[str] = Field(..., min_length=1, examples=[["London", "Paris"]])
+
+
 @router.get("/ml-decision")
-def ml_based_decision(
+async def ml_based_decision(
     request: Request,
+    response: Response,
     city: str = Query(
-        None, 
-        description="Enter the name of your city to get weather-based AI decisions."
+        None,
+        description="Enter the name of your city to get weather-based AI decisions.",
     ),
 ):
     """
@@ -21,10 +49,11 @@ def ml_based_decision(
 
     Args:
         request (Request): The current request object for tracing and context.
+        response (Response): Outgoing response, for the ``X-Model-Version`` header.
         city (str): Name of the city (prompted if not provided).
 
     Returns:
-        dict: Decision and reasoning.
+        dict: Decision, reasoning and the model version that decided.
     """
     request_id = request.state.request_id
 
@@ -32,23 +61,25 @@ def ml_based_decision(
     if not city:
         logger.warning("City parameter is missing", extra={"request_id": request_id})
         raise HTTPException(
-            status_code=400,
-            detail="Please provide your city name to get the decision."
+            status_code=400, detail="Please provide your city name to get the decision."
         )
 
     api_key = settings.OPENWEATHER_API_KEY
 
     try:
         # Fetch weather data with metric units (Celsius)
-        logger.info("Fetching weather data", extra={"request_id": request_id, "city": city})
-        weather_data = fetch_weather(api_key, city)
+        logger.info(
+            "Fetching weather data", extra={"request_id": request_id, "city": city}
+        )
+        observation = await fetch_observation_async(api_key, city)
 
         # Preprocess data for AI/ML
         logger.debug("Preprocessing weather data", extra={"request_id": request_id})
-        features = preprocess_weather_data(weather_data)
+        features = preprocess_weather_data(observation)
 
-        # Make an AI-based decision
-        decision = make_decision(features)
+        # Make an AI-based decision (model micro-batch, or rules without a model)
+        decision, model_version = await make_decision_async(features)
+        response.headers["X-Model-Version"] = model_version
 
         logger.info(
             "Decision made successfully",
@@ -57,14 +88,127 @@ def ml_based_decision(
 
         return {
             "decision": decision,
-            "reason": f"The weather in {city} is {weather_data['weather'][0]['main']}, "
-                      f"temperature is {features[0]:.2f}°C.",
+            "reason": f"The weather in {observation.city} is {observation.condition}, "
+            f"temperature is {features[0]:.2f}°C.",
+            "model_version": model_version,
         }
 
+    except UPSTREAM_UNAVAILABLE as e:
+        logger.warning(
+            "Upstream unavailable",
+            extra={"request_id": request_id, "city": city, "error": str(e)},
+        )
+        raise upstream_unavailable_error(e)
+
+    except UnknownCity as e:
+        raise unknown_city_error(e)
+
     except KeyError as e:
-        logger.error("KeyError while processing weather data", extra={"request_id": request_id, "error": str(e)})
-        raise HTTPException(status_code=500, detail="Unexpected response structure from weather API.")
+        logger.error(
+            "KeyError while processing weather data",
+            extra={"request_id": request_id, "error": str(e)},
+        )
+        raise HTTPException(
+            status_code=500, detail="Unexpected response structure from weather API."
+        )
 
     except Exception as e:
-        logger.error("Unhandled exception", extra={"request_id": request_id, "error": str(e)})
+        logger.error(
+            "Unhandled exception", extra={"request_id": request_id, "error": str(e)}
+        )
         raise HTTPException(status_code=500, detail=f"Error processing request: {e}")
+
+
+@router.post("/ml-decision/batch")
+async def ml_based_decision_batch(
+    request: Request, response: Response, payload: BatchDecisionRequest
+):
+    """
+    Make AI-based decisions for many cities at once.
+
+    Duplicate cities are fetched once and upstream calls run concurrently,
+    bounded by ``BATCH_MAX_CONCURRENCY`` at batch priority. Failures are
+    reported per city.
+
+    Args:
+        request (Request): The current request object for tracing and context.
+        response (Response): Outgoing response, for the ``X-Model-Version`` header.
+        payload (BatchDecisionRequest): List of city names.
+
+    Returns:
+        dict: One decision (or error) per unique city and the model version.
+    """
+    request_id = request.state.request_id
+    cities = dedupe_cities(payload.cities)
+    if not cities:
+        raise HTTPException(status_code=400, detail="Please provide at least one city.")
+    if len(cities) > settings.BATCH_MAX_CITIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A batch may contain at most {settings.BATCH_MAX_CITIES} cities.",
+        )
+
+    with upstream_priority(Priority.BATCH):
+        fetched = await fetch_observations_async(
+            settings.OPENWEATHER_API_KEY, cities, settings.BATCH_MAX_CONCURRENCY
+        )
+
+    # Score every successful city with one model call
+    features = {
+        city: preprocess_weather_data(outcome)
+        for city, outcome in fetched
+        if not isinstance(outcome, Exception)
+    }
+    labels, model_version = await make_decisions_async(list(features.values()))
+    decisions = dict(zip(features, labels))
+    response.headers["X-Model-Version"] = model_version
+
+    results = []
+    for city, outcome in fetched:
+        if isinstance(outcome, Exception):
+            logger.error(
+                "Batch item failed",
+                extra={"request_id": request_id, "city": city, "error": str(outcome)},
+            )
+            results.append(
+                {
+                    "city": city,
+                    "status": "error",
+                    "error": describe_upstream_error(outcome),
+                }
+            )
+            continue
+        results.append(
+            {
+                "city": city,
+                "status": "ok",
+                "decision": decisions[city],
+                "reason": f"The weather in {outcome.city} is {outcome.condition}, "
+                f"temperature is {features[city][0]:.2f}°C.",
+            }
+        )
+
+    logger.info(
+        "Batch decisions made",
+        extra={"request_id": request_id, "cities": len(cities)},
+    )
+    return {"results": results, "model_version": model_version}
+
+
+@router.get("/ml-model")
+async def get_ml_model():
+    """
+    Report which decision model is serving and how requests are being batched.
+
+    Returns:
+        dict: Model source (None when the rules are used), active version and
+        batching counters.
+    """
+    server = get_model_server()
+    if server is None:
+        return {"model": None, "mode": "rules", "version": RULES_VERSION}
+    return {
+        "model": settings.ML_MODEL_DIR or settings.ML_MODEL_PATH,
+        "mode": "model",
+        **server.stats(),
+    }
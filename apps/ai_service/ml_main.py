@@ -1,16 +1,78 @@
+import asyncio
+import time
+import uuid
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
-from libs.utils.logger import get_logger
-from apps.weather_service.core.config import settings
+
 from apps.ai_service.api.endpoints.ai import router as ai_router
-import time
-import uuid
+from apps.weather_service.api.endpoints.admin import router as admin_router
+from apps.weather_service.core.config import settings
+from apps.weather_service.db.freshness import disable_read_through, enable_read_through
+from apps.weather_service.db.recorder import start_recorder, stop_recorder
+from libs.utils.cities import get_city_index
+from libs.utils.logger import get_logger
+from libs.utils.metrics import (
+    REQUEST_SECONDS,
+    TimedJSONResponse,
+    metrics_response,
+    route_label,
+    server_timing_header,
+    start_request_timing,
+)
+from libs.utils.model_server import (
+    start_model_server,
+    start_model_watcher,
+    stop_model_server,
+    stop_model_watcher,
+)
+from libs.utils.profiling import profiler
+from libs.utils.refresh import start_refresh_scheduler, stop_refresh_scheduler
+from libs.utils.upstream import close_client, start_shared_cache, stop_shared_cache
+from libs.utils.warmup import warm_imports
 
 logger = get_logger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Application lifespan: load the decision model (if configured) and watch
+    its registry for new versions, load the city index, attach the
+    host-wide weather cache (if configured), start the observation
+    recorder, the database read-through tier and the hot-city refresh
+    scheduler, and on shutdown flush the recorder and release the pooled
+    upstream client and cache file.
+
+    The upstream HTTP transport and NumPy (used by the feature pipeline)
+    are imported in the background so they delay neither startup nor the
+    first request.
+    """
+    warm_imports(["httpcore", "numpy"])
+    start_model_server()
+    model_watcher = start_model_watcher()
+    get_city_index()
+    start_shared_cache()
+    recorder = start_recorder()
+    enable_read_through()
+    scheduler = start_refresh_scheduler()
+    yield
+    await stop_model_watcher(model_watcher)
+    stop_model_server()
+    await stop_refresh_scheduler(scheduler)
+    disable_read_through()
+    await asyncio.to_thread(stop_recorder, recorder)
+    await close_client()
+    stop_shared_cache()
+
+
 app = FastAPI(
     title="AI/ML Decision Service",
     description="A service that provides AI/ML-based decisions using weather data.",
     version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=TimedJSONResponse,
 )
 
 
@@ -22,9 +84,13 @@ async def add_request_id_and_log(request: Request, call_next):
     request_id = str(uuid.uuid4())
     request.state.request_id = request_id
 
+    timings = start_request_timing()
     start_time = time.time()
     try:
-        response = await call_next(request)
+        if profiler.wanted(request.headers):
+            response = await profiler.run(lambda: call_next(request))
+        else:
+            response = await call_next(request)
     except Exception as exc:
         logger.error(
             "Unhandled exception in middleware",
@@ -33,9 +99,13 @@ async def add_request_id_and_log(request: Request, call_next):
         raise exc
 
     process_time = time.time() - start_time
+    REQUEST_SECONDS.labels(request.method, route_label(request.scope)).observe(
+        process_time
+    )
 
     response.headers["X-Request-ID"] = request_id
     response.headers["X-Process-Time"] = f"{process_time:.2f}"
+    response.headers["Server-Timing"] = server_timing_header(timings, process_time)
     response.headers["X-Backend-Version"] = settings.PROJECT_NAME
 
     logger.info(
@@ -67,4 +137,14 @@ async def global_exception_handler(request: Request, exc: Exception):
     )
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Prometheus text exposition of request, stage, upstream, threadpool and
+    cache metrics for this worker.
+    """
+    return metrics_response()
+
+
 app.include_router(ai_router, prefix="/api/v1", tags=["AI/ML"])
+app.include_router(admin_router, tags=["Admin"], include_in_schema=False)
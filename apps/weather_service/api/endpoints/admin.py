@@ -0,0 +1,73 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse, Response
+
+from libs.utils.profiling import profiler, token_matches
+
+router = APIRouter()
+
+
+def require_admin_token(x_admin_token: Optional[str] = Header(None)) -> None:
+    """
+    Reject the request unless it carries the configured profile token. The
+    admin endpoints do not exist while PROFILE_TOKEN is unset.
+
+    Raises:
+        HTTPException: 404 if no token is configured, 403 if the token is
+            missing or wrong.
+    """
+    if profiler.token is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not token_matches(x_admin_token, profiler.token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@router.get("/admin/profile", dependencies=[Depends(require_admin_token)])
+async def get_profile(
+    format: str = Query("pstats", pattern="^(pstats|text)$"),
+    sort: str = Query("cumulative", description="pstats sort key for the text format"),
+    limit: int = Query(50, ge=1, le=1000),
+):
+    """
+    Download the aggregated request profile of this worker.
+
+    Args:
+        format (str): "pstats" for the binary dump (open with ``pstats.Stats``
+            or snakeviz), "text" for a readable table.
+        sort (str): Sort key of the text table.
+        limit (int): Rows in the text table.
+
+    Returns:
+        Response: The profile; 404 if nothing has been profiled yet.
+    """
+    if format == "text":
+        try:
+            return PlainTextResponse(profiler.report(sort, limit))
+        except KeyError:
+            raise HTTPException(status_code=422, detail=f"Unknown sort key: {sort}")
+    data = profiler.dump()
+    if not data:
+        raise HTTPException(status_code=404, detail="No requests profiled yet")
+    return Response(
+        data,
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": 'attachment; filename="requests.prof"'},
+    )
+
+
+@router.get("/admin/profile/stats", dependencies=[Depends(require_admin_token)])
+async def get_profile_stats():
+    """
+    Report profiler settings and how many requests were profiled or skipped.
+    """
+    return profiler.stats()
+
+
+@router.delete("/admin/profile", dependencies=[Depends(require_admin_token)])
+async def reset_profile():
+    """
+    Discard the aggregated profile and counters.
+    """
+    profiler.reset()
+    return profiler.stats()
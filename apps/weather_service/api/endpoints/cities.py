@@ -0,0 +1,57 @@
+from typing import List
+
+from fastapi import APIRouter, Query
+from pydantic import BaseModel
+
+from libs.utils.cities import City, get_city_index
+from libs.utils.responses import FastJSONResponse
+
+router = APIRouter()
+
+
+class CitySuggestion(BaseModel):
+    id: int
+    name: str
+    country: str
+    lat: float
+    lon: float
+    # Name to pass as ``city`` to the weather endpoints
+    query: str
+
+    @classmethod
+    def from_city(cls, city: City, query: str) -> "CitySuggestion":
+        return cls(**city._asdict(), query=query)
+
+
+class CitySuggestResponse(BaseModel):
+    query: str
+    results: List[CitySuggestion]
+
+
+@router.get(
+    "/cities/suggest",
+    response_model=CitySuggestResponse,
+    response_class=FastJSONResponse,
+)
+async def suggest_cities(
+    q: str = Query(..., min_length=1, max_length=100, examples=["lon"]),
+    limit: int = Query(10, ge=1, le=50),
+):
+    """
+    Autocomplete city names from the local city index; no upstream call.
+
+    Args:
+        q (str): Name prefix, any case and accents.
+        limit (int): Maximum number of suggestions.
+
+    Returns:
+        CitySuggestResponse: Matching cities, alphabetically.
+    """
+    index = get_city_index()
+    return CitySuggestResponse(
+        query=q,
+        results=[
+            CitySuggestion.from_city(city, index.canonical_name(city))
+            for city in index.suggest(q, limit)
+        ],
+    )
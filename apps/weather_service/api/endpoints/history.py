@@ -0,0 +1,314 @@
+import base64
+import json
+from datetime import datetime
+from typing import (
+    TYPE_CHECKING,
+    AsyncIterator,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import Session
+
+from apps.weather_service.db.session import execute, get_session, is_async_session
+from libs.models.weather_model import WeatherData
+from libs.utils.cities import UnknownCity, city_key
+from libs.utils.logger import get_logger
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+router = APIRouter()
+logger = get_logger(__name__)
+
+EXPORT_CHUNK_ROWS = 1000
+HISTORY_COLUMNS = (
+    WeatherData.id,
+    WeatherData.city,
+    WeatherData.temperature,
+    WeatherData.feels_like,
+    WeatherData.condition,
+    WeatherData.description,
+    WeatherData.observed_at,
+    WeatherData.created_at,
+)
+
+
+class HistoryItem(BaseModel):
+    id: int
+    city: str
+    temperature: float
+    feels_like: Optional[float] = None
+    condition: str
+    description: Optional[str] = None
+    observed_at: Optional[int] = None
+    created_at: datetime
+
+
+class HistoryPage(BaseModel):
+    items: List[HistoryItem]
+    next_cursor: Optional[str] = None
+
+
+class AggregateBucket(BaseModel):
+    bucket: str
+    count: int
+    min_temperature: float
+    max_temperature: float
+    avg_temperature: float
+    conditions: Dict[str, int]
+
+
+class AggregateResponse(BaseModel):
+    city: str
+    bucket: str
+    buckets: List[AggregateBucket]
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """
+    Encode the (created_at, id) position of the last row on a page.
+    """
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decode a cursor produced by :func:`encode_cursor`.
+
+    Raises:
+        HTTPException: If the cursor is malformed.
+    """
+    try:
+        created_at, row_id = (
+            base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        )
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+
+def _city_key(city: str) -> str:
+    """
+    Stored ``weather_data.city`` value for a requested city, so every
+    spelling the weather endpoints accept finds the same rows.
+
+    Raises:
+        HTTPException: 404 if the city index rejects the name (strict mode).
+    """
+    try:
+        return city_key(city)
+    except UnknownCity as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+def _history_query(city: str, start: Optional[datetime], end: Optional[datetime]):
+    """
+    Base query for a city's rows, newest first, served by the
+    (city, created_at DESC) index.
+    """
+    query = select(*HISTORY_COLUMNS).where(WeatherData.city == _city_key(city))
+    if start is not None:
+        query = query.where(WeatherData.created_at >= start)
+    if end is not None:
+        query = query.where(WeatherData.created_at < end)
+    return query.order_by(WeatherData.created_at.desc(), WeatherData.id.desc())
+
+
+def _row_to_dict(row) -> Dict:
+    item = dict(row._mapping)
+    item["created_at"] = item["created_at"].isoformat()
+    return item
+
+
+def _bucket_expression(dialect_name: str, bucket: str):
+    """
+    SQL expression truncating created_at to the start of an hour or day.
+    """
+    if dialect_name == "postgresql":
+        return func.date_trunc(bucket, WeatherData.created_at)
+    fmt = "%Y-%m-%dT%H:00:00" if bucket == "hour" else "%Y-%m-%dT00:00:00"
+    return func.strftime(fmt, WeatherData.created_at)
+
+
+def _bucket_key(value) -> str:
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+
+@router.get("/history/{city}", response_model=HistoryPage)
+async def get_history(
+    city: str = Path(..., min_length=1),
+    start: Optional[datetime] = Query(
+        None, description="Inclusive lower bound on created_at."
+    ),
+    end: Optional[datetime] = Query(
+        None, description="Exclusive upper bound on created_at."
+    ),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(
+        None, description="next_cursor from the previous page."
+    ),
+    db: Union[Session, "AsyncSession"] = Depends(get_session),
+):
+    """
+    Return a page of a city's stored observations, newest first.
+
+    Pagination is keyset-based on (created_at, id): each page continues
+    strictly after the last row of the previous one, so deep pages cost the
+    same as the first.
+
+    Args:
+        city (str): Name of the city.
+        start (datetime): Optional lower bound.
+        end (datetime): Optional upper bound.
+        limit (int): Page size.
+        cursor (str): Opaque cursor from the previous page.
+
+    Returns:
+        HistoryPage: Rows and the cursor for the next page, if any.
+    """
+    query = _history_query(city, start, end)
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.where(
+            or_(
+                WeatherData.created_at < created_at,
+                and_(WeatherData.created_at == created_at, WeatherData.id < row_id),
+            )
+        )
+
+    rows = (await execute(db, query.limit(limit + 1))).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+
+    return HistoryPage(
+        items=[HistoryItem(**row._mapping) for row in rows], next_cursor=next_cursor
+    )
+
+
+@router.get("/history/{city}/aggregates", response_model=AggregateResponse)
+async def get_history_aggregates(
+    city: str = Path(..., min_length=1),
+    bucket: str = Query("hour", pattern="^(hour|day)$"),
+    start: Optional[datetime] = Query(None),
+    end: Optional[datetime] = Query(None),
+    db: Union[Session, "AsyncSession"] = Depends(get_session),
+):
+    """
+    Aggregate a city's observations per hour or day, computed in SQL.
+
+    Args:
+        city (str): Name of the city.
+        bucket (str): "hour" or "day".
+        start (datetime): Optional lower bound.
+        end (datetime): Optional upper bound.
+
+    Returns:
+        AggregateResponse: Min/max/avg temperature and condition counts per bucket.
+    """
+    stored_city = _city_key(city)
+    bucket_expr = _bucket_expression(db.get_bind().dialect.name, bucket).label("bucket")
+    filters = [WeatherData.city == stored_city]
+    if start is not None:
+        filters.append(WeatherData.created_at >= start)
+    if end is not None:
+        filters.append(WeatherData.created_at < end)
+
+    temperature_rows = (
+        await execute(
+            db,
+            select(
+                bucket_expr,
+                func.count(WeatherData.id),
+                func.min(WeatherData.temperature),
+                func.max(WeatherData.temperature),
+                func.avg(WeatherData.temperature),
+            )
+            .where(*filters)
+            .group_by(bucket_expr)
+            .order_by(bucket_expr),
+        )
+    ).all()
+    condition_rows = (
+        await execute(
+            db,
+            select(bucket_expr, WeatherData.condition, func.count(WeatherData.id))
+            .where(*filters)
+            .group_by(bucket_expr, WeatherData.condition),
+        )
+    ).all()
+
+    conditions: Dict[str, Dict[str, int]] = {}
+    for key, condition, count in condition_rows:
+        conditions.setdefault(_bucket_key(key), {})[condition] = count
+
+    buckets = [
+        AggregateBucket(
+            bucket=_bucket_key(key),
+            count=count,
+            min_temperature=minimum,
+            max_temperature=maximum,
+            avg_temperature=round(float(average), 2),
+            conditions=conditions.get(_bucket_key(key), {}),
+        )
+        for key, count, minimum, maximum, average in temperature_rows
+    ]
+    return AggregateResponse(city=stored_city, bucket=bucket, buckets=buckets)
+
+
+@router.get("/history/{city}/export")
+async def export_history(
+    city: str = Path(..., min_length=1),
+    start: Optional[datetime] = Query(None),
+    end: Optional[datetime] = Query(None),
+    db: Union[Session, "AsyncSession"] = Depends(get_session),
+):
+    """
+    Stream a city's observations as newline-delimited JSON.
+
+    Rows are read through a server-side cursor and written in chunks, so
+    memory use stays flat regardless of the size of the range.
+
+    Args:
+        city (str): Name of the city.
+        start (datetime): Optional lower bound.
+        end (datetime): Optional upper bound.
+
+    Returns:
+        StreamingResponse: ``application/x-ndjson`` body, one row per line.
+    """
+    query = _history_query(city, start, end)
+
+    if is_async_session(db):
+        async_engine = db.bind
+
+        async def generate_async() -> AsyncIterator[str]:
+            async with async_engine.connect() as connection:
+                result = await connection.stream(query)
+                async for rows in result.partitions(EXPORT_CHUNK_ROWS):
+                    yield "".join(json.dumps(_row_to_dict(row)) + "\n" for row in rows)
+
+        return StreamingResponse(generate_async(), media_type="application/x-ndjson")
+
+    bind = db.get_bind()
+
+    def generate() -> Iterator[str]:
+        with bind.connect() as connection:
+            result = connection.execution_options(
+                stream_results=True, yield_per=EXPORT_CHUNK_ROWS
+            ).execute(query)
+            for rows in result.partitions():
+                yield "".join(json.dumps(_row_to_dict(row)) + "\n" for row in rows)
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
@@ -1,58 +1,270 @@
-from fastapi import APIRouter, HTTPException, Query
-from pydantic import BaseModel
-from libs.utils.weather_logic import should_go_out
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import Response
+from pydantic import BaseModel, Field
+
 from apps.weather_service.core.config import settings
+from libs.models.observation import WeatherObservation
+from libs.utils.api_client import describe_upstream_error
+from libs.utils.cities import UnknownCity
 from libs.utils.logger import get_logger
-from libs.utils.api_client import fetch_weather
+from libs.utils.quota import Priority, upstream_priority
+from libs.utils.responses import (
+    FastJSONResponse,
+    conditional_response,
+    observation_etag,
+)
+from libs.utils.upstream import (
+    cache_fresh_for,
+    cell_fresh_for,
+    coordinate_cell,
+    dedupe_cities,
+    fetch_cell_observation_async,
+    fetch_observation_async,
+    fetch_observations_async,
+    get_client,
+    upstream_quota,
+)
+from libs.utils.weather_logic import (
+    UPSTREAM_UNAVAILABLE,
+    process_weather_decision,
+    process_weather_decisions,
+    unknown_city_error,
+    upstream_unavailable_error,
+)
 
 router = APIRouter()
 logger = get_logger(__name__)
 
 
 class WeatherResponse(BaseModel):
-    temperature: float
+    # None when upstream reported no temperature
+    temperature: Optional[float]
     condition: str
     description: str
     decision: str
     advice: str
 
+    @classmethod
+    def from_observation(
+        cls, observation: WeatherObservation, decision: dict
+    ) -> "WeatherResponse":
+        """
+        Build the response from a parsed observation and its decision.
+        """
+        return cls(
+            temperature=(
+                round(observation.temperature, 2)
+                if observation.temperature is not None
+                else None
+            ),
+            condition=observation.condition,
+            description=observation.description.capitalize(),
+            decision=decision["decision"],
+            advice=decision["reason"],
+        )
+
+
+class CoordinateWeatherResponse(WeatherResponse):
+    # Place name upstream reports for the cell, or the geohash
+    location: str
+    # Geohash cell the coordinates were snapped to, and its centre
+    cell: str
+    cell_lat: float
+    cell_lon: float
+
+
+class BatchWeatherRequest(BaseModel):
+    cities: List[str] = Field(..., min_length=1, examples=[["London", "Paris"]])
+
 
-@router.get("/weather", response_model=WeatherResponse)
-def get_weather(city: str = Query(..., min_length=1, example="London")):
+class BatchWeatherItem(BaseModel):
+    city: str
+    status: str
+    result: Optional[WeatherResponse] = None
+    error: Optional[str] = None
+
+
+class BatchWeatherResponse(BaseModel):
+    results: List[BatchWeatherItem]
+
+
+@router.get("/weather", response_model=WeatherResponse, response_class=FastJSONResponse)
+async def get_weather(
+    request: Request, city: str = Query(..., min_length=1, examples=["London"])
+) -> Response:
     """
     Fetch weather data for a given city and make a go-out decision.
 
+    The response carries an ETag of the observation; a matching
+    ``If-None-Match`` gets ``304`` without re-running the decision, and
+    repeated polls reuse the rendered body.
+
     Args:
+        request (Request): Incoming request, for ``If-None-Match``.
         city (str): Name of the city.
 
     Returns:
-        WeatherResponse: Weather details and decision.
+        Response: Weather details and decision (WeatherResponse), or 304.
     """
     api_key = settings.OPENWEATHER_API_KEY
 
     try:
-        # Fetch weather data and process the decision using the new logic
-        decision_data = should_go_out(api_key, city)
-
-        # Fetch the weather data again for the response details
-        weather_data = fetch_weather(api_key, city)
-        temp = weather_data["main"]["temp"] - 273.15  # Convert Kelvin to Celsius
-        condition = weather_data["weather"][0]["main"]
-        description = weather_data["weather"][0]["description"]
-
-        # Use the decision from the weather_logic
-        decision = decision_data["decision"]
-        advice = decision_data["reason"]
-
-        return WeatherResponse(
-            temperature=round(temp, 2),
-            condition=condition,
-            description=description.capitalize(),
-            decision=decision,
-            advice=advice,
+        # Fetch and parse once; the decision and response share the observation
+        observation = await fetch_observation_async(api_key, city)
+        return conditional_response(
+            request.headers,
+            observation_etag("weather", observation),
+            lambda: WeatherResponse.from_observation(
+                observation, process_weather_decision(observation)
+            ).model_dump(),
+            max_age=cache_fresh_for(city),
         )
+    except UPSTREAM_UNAVAILABLE as e:
+        raise upstream_unavailable_error(e)
+    except UnknownCity as e:
+        raise unknown_city_error(e)
     except Exception as e:
         logger.error(f"Error fetching weather for city {city}: {str(e)}")
         raise HTTPException(
             status_code=400, detail="Failed to fetch weather data. Please try again."
         )
+
+
+@router.get(
+    "/weather/coordinates",
+    response_model=CoordinateWeatherResponse,
+    response_class=FastJSONResponse,
+)
+async def get_weather_by_coordinates(
+    request: Request,
+    lat: float = Query(..., ge=-90, le=90, examples=[51.5072]),
+    lon: float = Query(..., ge=-180, le=180, examples=[-0.1276]),
+) -> Response:
+    """
+    Fetch weather for a point and make a go-out decision.
+
+    The point is snapped to a geohash cell of ``GEO_CELL_PRECISION``; the
+    cache and the upstream call are keyed on the cell, so every caller inside
+    it shares one observation. ETag handling is as for ``/weather``.
+
+    Args:
+        request (Request): Incoming request, for ``If-None-Match``.
+        lat (float): Latitude in degrees.
+        lon (float): Longitude in degrees.
+
+    Returns:
+        Response: Weather details, decision and cell
+        (CoordinateWeatherResponse), or 304.
+    """
+    api_key = settings.OPENWEATHER_API_KEY
+
+    try:
+        cell = coordinate_cell(lat, lon)
+        observation = await fetch_cell_observation_async(api_key, cell)
+        return conditional_response(
+            request.headers,
+            observation_etag(f"coordinates:{cell.geohash}", observation),
+            lambda: CoordinateWeatherResponse(
+                **WeatherResponse.from_observation(
+                    observation, process_weather_decision(observation)
+                ).model_dump(),
+                location=observation.city,
+                cell=cell.geohash,
+                cell_lat=round(cell.lat, 6),
+                cell_lon=round(cell.lon, 6),
+            ).model_dump(),
+            max_age=cell_fresh_for(cell),
+        )
+    except UPSTREAM_UNAVAILABLE as e:
+        raise upstream_unavailable_error(e)
+    except Exception as e:
+        logger.error(f"Error fetching weather for coordinates {lat},{lon}: {str(e)}")
+        raise HTTPException(
+            status_code=400, detail="Failed to fetch weather data. Please try again."
+        )
+
+
+@router.post("/weather/batch", response_model=BatchWeatherResponse)
+async def get_weather_batch(payload: BatchWeatherRequest):
+    """
+    Fetch weather and go-out decisions for many cities at once.
+
+    Duplicate cities are fetched once and upstream calls run concurrently,
+    bounded by ``BATCH_MAX_CONCURRENCY``. Upstream calls run at batch
+    priority, so they yield to interactive lookups when quota is short.
+    Failures are reported per city.
+
+    Args:
+        payload (BatchWeatherRequest): List of city names.
+
+    Returns:
+        BatchWeatherResponse: One result per unique city.
+    """
+    cities = dedupe_cities(payload.cities)
+    if not cities:
+        raise HTTPException(status_code=400, detail="Please provide at least one city.")
+    if len(cities) > settings.BATCH_MAX_CITIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A batch may contain at most {settings.BATCH_MAX_CITIES} cities.",
+        )
+
+    with upstream_priority(Priority.BATCH):
+        fetched = await fetch_observations_async(
+            settings.OPENWEATHER_API_KEY, cities, settings.BATCH_MAX_CONCURRENCY
+        )
+
+    # Decide for every fetched observation in one vectorized pass
+    observations = [
+        outcome for _, outcome in fetched if not isinstance(outcome, Exception)
+    ]
+    decisions = iter(process_weather_decisions(observations))
+
+    results = []
+    for city, outcome in fetched:
+        if isinstance(outcome, Exception):
+            logger.error(f"Error fetching weather for city {city}: {str(outcome)}")
+            results.append(
+                BatchWeatherItem(
+                    city=city, status="error", error=describe_upstream_error(outcome)
+                )
+            )
+            continue
+        results.append(
+            BatchWeatherItem(
+                city=city,
+                status="ok",
+                result=WeatherResponse.from_observation(outcome, next(decisions)),
+            )
+        )
+
+    return BatchWeatherResponse(results=results)
+
+
+@router.get("/upstream/quota")
+async def get_upstream_quota():
+    """
+    Report the upstream quota scheduler's queue depth and remaining budget.
+
+    Returns:
+        dict: Admitted/shed counters and per-key queue depth and budgets.
+    """
+    return upstream_quota.stats()
+
+
+@router.get("/upstream/circuit")
+async def get_upstream_circuit():
+    """
+    Report the upstream circuit breaker state and hedging counters.
+
+    Returns:
+        dict: Breaker state and counts, hedged attempts and how many of them won.
+    """
+    client = get_client()
+    return {
+        "circuit": client.breaker.stats() if client.breaker is not None else None,
+        "hedged": client.hedged,
+        "hedge_wins": client.hedge_wins,
+    }
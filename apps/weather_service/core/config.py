@@ -1,13 +1,143 @@
-from pydantic_settings import BaseSettings
+from typing import Optional
+
 from pydantic import Field
+from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "Weather Decision Service"
     DATABASE_URL: str = Field(..., env="DATABASE_URL")
     OPENWEATHER_API_KEY: str = Field(..., env="OPENWEATHER_API_KEY")
+    # Point at a local stand-in (see benchmarks/fake_openweather.py) for load tests
+    OPENWEATHER_BASE_URL: str = Field(
+        "http://api.openweathermap.org/data/2.5/weather", env="OPENWEATHER_BASE_URL"
+    )
     ENVIRONMENT: str = Field("development", env="ENVIRONMENT")
     LOG_LEVEL: str = Field("INFO", env="LOG_LEVEL")
+    # Hand log records to a background writer through a bounded queue
+    # (records are dropped and counted when it is full)
+    LOG_ASYNC: bool = Field(True, env="LOG_ASYNC")
+    LOG_QUEUE_SIZE: int = Field(10000, env="LOG_QUEUE_SIZE")
+    LOG_BATCH_SIZE: int = Field(256, env="LOG_BATCH_SIZE")
+
+    # Database connection pool (shared by the sync and async engines)
+    DB_POOL_SIZE: int = Field(10, env="DB_POOL_SIZE")
+    DB_MAX_OVERFLOW: int = Field(20, env="DB_MAX_OVERFLOW")
+    DB_POOL_TIMEOUT: float = Field(30.0, env="DB_POOL_TIMEOUT")
+    # Async driver URL, e.g. postgresql+asyncpg://...; enables the async engine
+    DATABASE_ASYNC_URL: Optional[str] = Field(None, env="DATABASE_ASYNC_URL")
+
+    # Upstream (OpenWeather) HTTP client
+    UPSTREAM_POOL_SIZE: int = Field(20, env="UPSTREAM_POOL_SIZE")
+    UPSTREAM_CONNECT_TIMEOUT: float = Field(3.0, env="UPSTREAM_CONNECT_TIMEOUT")
+    UPSTREAM_READ_TIMEOUT: float = Field(10.0, env="UPSTREAM_READ_TIMEOUT")
+
+    # In-process weather cache (TTL in seconds; 0 disables caching)
+    WEATHER_CACHE_TTL: float = Field(120.0, env="WEATHER_CACHE_TTL")
+    WEATHER_CACHE_MAX_ENTRIES: int = Field(1024, env="WEATHER_CACHE_MAX_ENTRIES")
+    # Grace window after expiry during which the stale value is served while
+    # it is refreshed in the background (seconds; 0 disables)
+    WEATHER_CACHE_STALE_TTL: float = Field(60.0, env="WEATHER_CACHE_STALE_TTL")
+    # Host-wide weather cache shared by every worker of both services: a
+    # memory-mapped file of fixed-size records (unset disables). All
+    # processes using the file must agree on slots and record size.
+    WEATHER_SHARED_CACHE_PATH: Optional[str] = Field(
+        None, env="WEATHER_SHARED_CACHE_PATH"
+    )
+    WEATHER_SHARED_CACHE_SLOTS: int = Field(4096, env="WEATHER_SHARED_CACHE_SLOTS")
+    WEATHER_SHARED_CACHE_RECORD_BYTES: int = Field(
+        4096, env="WEATHER_SHARED_CACHE_RECORD_BYTES"
+    )
+
+    # City index: OpenWeather city.list.json(.gz) or an id,name,country,lat,lon
+    # CSV (unset: the bundled list of major cities). In strict mode names not
+    # in the index get 404 without an upstream call.
+    CITY_LIST_PATH: Optional[str] = Field(None, env="CITY_LIST_PATH")
+    CITY_INDEX_STRICT: bool = Field(False, env="CITY_INDEX_STRICT")
+    # Names upstream answered 404 for are remembered this long (seconds; 0
+    # disables), so a misspelling costs at most one upstream call per TTL.
+    UNKNOWN_CITY_TTL: float = Field(3600.0, env="UNKNOWN_CITY_TTL")
+    UNKNOWN_CITY_MAX_ENTRIES: int = Field(4096, env="UNKNOWN_CITY_MAX_ENTRIES")
+
+    # Coordinate lookups are snapped to geohash cells of this many characters
+    # (1-12) and share one cached observation per cell: 5 is ~4.9 km cells,
+    # 6 is ~1.2 x 0.6 km. Lower shares more, higher is closer to the user.
+    GEO_CELL_PRECISION: int = Field(5, env="GEO_CELL_PRECISION")
+
+    # Pre-rendered /decision and /api/v1/weather bodies kept per ETag
+    RESPONSE_CACHE_MAX_ENTRIES: int = Field(4096, env="RESPONSE_CACHE_MAX_ENTRIES")
+
+    # Background refresh of the most requested cities ahead of expiry
+    REFRESH_ENABLED: bool = Field(True, env="REFRESH_ENABLED")
+    REFRESH_TOP_N: int = Field(20, env="REFRESH_TOP_N")
+    REFRESH_INTERVAL: float = Field(15.0, env="REFRESH_INTERVAL")
+    REFRESH_AHEAD: float = Field(30.0, env="REFRESH_AHEAD")
+    REFRESH_BUDGET_PER_MINUTE: int = Field(30, env="REFRESH_BUDGET_PER_MINUTE")
+
+    # Circuit breaker around upstream calls: opens when, over the last
+    # CIRCUIT_WINDOW calls, the error rate or the share of calls slower than
+    # CIRCUIT_SLOW_CALL_SECONDS crosses its threshold; stays open for
+    # CIRCUIT_OPEN_SECONDS before a trial call. While open, misses fall back
+    # to stored observations up to CIRCUIT_FALLBACK_MAX_AGE seconds old.
+    CIRCUIT_ENABLED: bool = Field(True, env="CIRCUIT_ENABLED")
+    CIRCUIT_WINDOW: int = Field(20, env="CIRCUIT_WINDOW")
+    CIRCUIT_MIN_CALLS: int = Field(10, env="CIRCUIT_MIN_CALLS")
+    CIRCUIT_ERROR_RATE: float = Field(0.5, env="CIRCUIT_ERROR_RATE")
+    CIRCUIT_SLOW_CALL_SECONDS: float = Field(3.0, env="CIRCUIT_SLOW_CALL_SECONDS")
+    CIRCUIT_SLOW_CALL_RATE: float = Field(0.8, env="CIRCUIT_SLOW_CALL_RATE")
+    CIRCUIT_OPEN_SECONDS: float = Field(30.0, env="CIRCUIT_OPEN_SECONDS")
+    CIRCUIT_FALLBACK_MAX_AGE: float = Field(3600.0, env="CIRCUIT_FALLBACK_MAX_AGE")
+
+    # Hedged async upstream calls: send a second attempt when the first has
+    # not answered within this percentile of recent latencies (unset disables)
+    HEDGE_PERCENTILE: Optional[float] = Field(None, env="HEDGE_PERCENTILE")
+    HEDGE_MIN_DELAY: float = Field(0.05, env="HEDGE_MIN_DELAY")
+    HEDGE_MIN_SAMPLES: int = Field(20, env="HEDGE_MIN_SAMPLES")
+
+    # OpenWeather quota per API key (calls; 0 per day disables the daily budget).
+    # Batch and background calls leave the last QUOTA_LOW_PRIORITY_RESERVE
+    # fraction of each budget to interactive requests.
+    QUOTA_CALLS_PER_MINUTE: int = Field(60, env="QUOTA_CALLS_PER_MINUTE")
+    QUOTA_CALLS_PER_DAY: int = Field(0, env="QUOTA_CALLS_PER_DAY")
+    QUOTA_LOW_PRIORITY_RESERVE: float = Field(0.2, env="QUOTA_LOW_PRIORITY_RESERVE")
+    # Longest an upstream call may wait for budget before failing (seconds)
+    QUOTA_MAX_WAIT_INTERACTIVE: float = Field(2.0, env="QUOTA_MAX_WAIT_INTERACTIVE")
+    QUOTA_MAX_WAIT_BATCH: float = Field(30.0, env="QUOTA_MAX_WAIT_BATCH")
+
+    # Multi-city batch endpoints
+    BATCH_MAX_CITIES: int = Field(500, env="BATCH_MAX_CITIES")
+    BATCH_MAX_CONCURRENCY: int = Field(16, env="BATCH_MAX_CONCURRENCY")
+
+    # Write-behind persistence of fetched observations into weather_data
+    RECORDER_ENABLED: bool = Field(True, env="RECORDER_ENABLED")
+    RECORDER_BATCH_SIZE: int = Field(500, env="RECORDER_BATCH_SIZE")
+    RECORDER_FLUSH_INTERVAL: float = Field(2.0, env="RECORDER_FLUSH_INTERVAL")
+    RECORDER_MAX_QUEUE: int = Field(10000, env="RECORDER_MAX_QUEUE")
+
+    # Answer from the latest weather_data row if younger than this (seconds; 0 disables)
+    DB_READ_THROUGH_MAX_AGE: float = Field(300.0, env="DB_READ_THROUGH_MAX_AGE")
+
+    # Model-backed ML decisions (joblib/pickle classifier with predict_proba;
+    # unset keeps the rules). Concurrent requests are scored together in
+    # micro-batches of up to ML_BATCH_MAX_SIZE rows, waiting at most
+    # ML_BATCH_WAIT_MS for companions.
+    ML_MODEL_PATH: Optional[str] = Field(None, env="ML_MODEL_PATH")
+    # Versioned model registry (takes precedence over ML_MODEL_PATH); polled
+    # every ML_MODEL_POLL_SECONDS for a newly activated version (0 disables)
+    ML_MODEL_DIR: Optional[str] = Field(None, env="ML_MODEL_DIR")
+    ML_MODEL_POLL_SECONDS: float = Field(10.0, env="ML_MODEL_POLL_SECONDS")
+    ML_BATCH_MAX_SIZE: int = Field(64, env="ML_BATCH_MAX_SIZE")
+    ML_BATCH_WAIT_MS: float = Field(5.0, env="ML_BATCH_WAIT_MS")
+    ML_DECISION_THRESHOLD: float = Field(0.5, env="ML_DECISION_THRESHOLD")
+
+    # Sampled cProfile of requests, aggregated in memory and served from
+    # /admin/profile. PROFILE_HEADER carrying PROFILE_TOKEN forces profiling
+    # of a request. Without a token the header is ignored and the admin
+    # endpoints answer 404.
+    PROFILE_ENABLED: bool = Field(False, env="PROFILE_ENABLED")
+    PROFILE_SAMPLE_RATE: float = Field(0.0, env="PROFILE_SAMPLE_RATE")
+    PROFILE_HEADER: str = Field("X-Debug-Profile", env="PROFILE_HEADER")
+    PROFILE_TOKEN: Optional[str] = Field(None, env="PROFILE_TOKEN")
 
     class Config:
         env_file = ".env"
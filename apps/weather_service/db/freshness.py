@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from apps.weather_service.core.config import settings
+from apps.weather_service.db.session import engine
+from libs.models.weather_model import WeatherData
+from libs.utils.cache import Aged
+from libs.utils.cities import city_key
+from libs.utils.logger import get_logger
+from libs.utils.metrics import STAGE_DB
+from libs.utils.upstream import set_read_through
+
+logger = get_logger(__name__)
+
+
+class LatestObservationSource:
+    """
+    Read-through source that answers from the newest ``weather_data`` row.
+
+    The lookup is served by the (city, created_at DESC) index, so it is a
+    single index seek. Rows older than ``max_age`` seconds are ignored and
+    the caller falls back to the upstream API. Rows are returned with their
+    age so the cache expires them on the row's schedule, not the lookup's.
+    """
+
+    def __init__(self, engine: Engine, max_age: float) -> None:
+        self.engine = engine
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, city: str, max_age: Optional[float] = None) -> Optional[Aged]:
+        """
+        Return the latest fresh row for ``city`` as an OpenWeather-shaped payload.
+
+        Args:
+            city (str): City name, any spelling.
+            max_age (float): Override of ``self.max_age``, e.g. a longer limit
+                while the upstream circuit is open.
+
+        Returns:
+            Aged | None: Payload and seconds since the row was written, or
+            None if there is no fresh row.
+        """
+        max_age = self.max_age if max_age is None else max_age
+        now = datetime.now(timezone.utc)
+        cutoff = now - timedelta(seconds=max_age)
+        query = (
+            select(WeatherData)
+            .where(WeatherData.city == city_key(city))
+            .where(WeatherData.created_at >= cutoff)
+            .order_by(WeatherData.created_at.desc())
+            .limit(1)
+        )
+        with STAGE_DB.time(), Session(self.engine) as session:
+            row = session.execute(query).scalars().first()
+
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        created_at = row.created_at
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        return Aged(row.to_payload(), (now - created_at).total_seconds())
+
+
+def enable_read_through() -> Optional[LatestObservationSource]:
+    """
+    Install the database read-through tier in front of upstream calls.
+    Called from the application lifespan.
+
+    Returns:
+        LatestObservationSource | None: The installed source, or None if disabled.
+    """
+    if settings.DB_READ_THROUGH_MAX_AGE <= 0:
+        return None
+    source = LatestObservationSource(engine, settings.DB_READ_THROUGH_MAX_AGE)
+    set_read_through(source)
+    return source
+
+
+def disable_read_through() -> None:
+    """Remove the database read-through tier."""
+    set_read_through(None)
@@ -0,0 +1,386 @@
+"""
+Bulk historical ingest of archived OpenWeather payloads into ``weather_data``.
+
+Dumps are read as a stream, one record per line, and may be gzip-compressed
+(``.gz``):
+
+- JSONL: each line is a raw ``/weather`` payload (city taken from ``name``)
+  or ``{"city": ..., "payload": {...}}``;
+- CSV: a header row, then either a ``payload`` column holding the JSON
+  payload, or flat ``city,temp,feels_like,main,description,dt`` columns.
+
+Every record goes through :meth:`WeatherObservation.from_payload`, the same
+extraction the request path uses before
+:func:`~libs.utils.weather_logic.process_weather_decision`. Records that do
+not parse are counted and skipped. ``created_at`` is set to the observation
+time, so history queries see backfilled rows where they belong.
+
+Rows are written in batches: with ``COPY ... FROM STDIN`` on PostgreSQL
+(psycopg2 or psycopg 3), and with multi-row INSERTs elsewhere (SQLite in
+tests). Memory use is bounded by the batch size.
+
+After each committed batch the byte offset reached in the input is saved to
+a checkpoint file (written atomically), and ``--resume`` continues from
+there. The checkpoint is written after the commit, so an interruption
+between the two can re-ingest at most one batch.
+
+Usage:
+    python -m apps.weather_service.db.ingest dumps/2024-05.jsonl.gz \
+        --checkpoint 2024-05.ckpt
+    python -m apps.weather_service.db.ingest dumps/2024-05.jsonl.gz \
+        --checkpoint 2024-05.ckpt --resume
+"""
+
+import argparse
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import IO, Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from sqlalchemy import insert
+from sqlalchemy.engine import Engine
+
+from libs.models.observation import WeatherObservation
+from libs.models.weather_model import WeatherData
+from libs.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_BATCH_ROWS = 5000
+COPY_COLUMNS = (
+    "city",
+    "temperature",
+    "feels_like",
+    "condition",
+    "description",
+    "observed_at",
+    "created_at",
+)
+# Flat CSV column -> payload path
+CSV_FIELDS = {
+    "temp": ("main", "temp"),
+    "feels_like": ("main", "feels_like"),
+    "main": ("weather", "main"),
+    "description": ("weather", "description"),
+    "dt": ("dt",),
+}
+
+
+def open_dump(path: Union[str, Path]) -> IO[bytes]:
+    """
+    Open a dump for binary reading, decompressing ``.gz`` files on the fly.
+    """
+    path = Path(path)
+    if path.suffix == ".gz":
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def dump_format(path: Union[str, Path]) -> str:
+    """
+    ``"csv"`` or ``"jsonl"``, from the file name (``.gz`` ignored).
+    """
+    name = Path(path).name
+    if name.endswith(".gz"):
+        name = name[:-3]
+    return "csv" if name.endswith(".csv") else "jsonl"
+
+
+def payload_from_csv(record: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Rebuild an OpenWeather-shaped payload from a flat CSV record.
+    """
+    if record.get("payload"):
+        return json.loads(record["payload"])
+    payload: Dict[str, Any] = {"name": record.get("city"), "main": {}, "weather": [{}]}
+    for field, path in CSV_FIELDS.items():
+        value = record.get(field)
+        if value in (None, ""):
+            continue
+        if path[0] == "main":
+            payload["main"][path[1]] = value
+        elif path[0] == "weather":
+            payload["weather"][0][path[1]] = value
+        else:
+            payload["dt"] = value
+    return payload
+
+
+def row_from_payload(
+    payload: Dict[str, Any], city: Optional[str], default_time: datetime
+) -> Dict[str, Any]:
+    """
+    ``weather_data`` column values for one archived payload.
+
+    Args:
+        payload (dict): OpenWeather ``/weather`` response.
+        city (str | None): City to record; defaults to the payload's ``name``.
+        default_time (datetime): ``created_at`` when the payload has no ``dt``.
+
+    Returns:
+        dict: Column values.
+
+    Raises:
+        ValueError: If the payload cannot be parsed or names no city.
+    """
+    if not isinstance(payload, dict):
+        raise ValueError("Invalid weather data format")
+    city = city or payload.get("name")
+    if not city:
+        raise ValueError("Payload has no city")
+    observation = WeatherObservation.from_payload(payload, city)
+    row = WeatherData.values_from_observation(observation)
+    row["created_at"] = (
+        datetime.fromtimestamp(observation.observed_at, timezone.utc)
+        if observation.observed_at is not None
+        else default_time
+    )
+    return row
+
+
+def iter_records(
+    handle: IO[bytes], fmt: str, offset: int = 0
+) -> Iterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+    """
+    Yield ``(end offset, payload, city)`` per line from ``offset`` on;
+    payload is None for lines that do not parse.
+    """
+    header: Optional[List[str]] = None
+    if fmt == "csv":
+        header_line = handle.readline()
+        header = next(csv.reader([header_line.decode("utf-8").strip()]), None)
+        if not header:
+            return
+        offset = offset or len(header_line)
+    handle.seek(offset)
+
+    for line in handle:
+        offset += len(line)
+        text = line.decode("utf-8", errors="replace").strip()
+        if not text:
+            continue
+        try:
+            if header is not None:
+                record = dict(zip(header, next(csv.reader([text]))))
+                yield offset, payload_from_csv(record), record.get("city") or None
+                continue
+            data = json.loads(text)
+            if isinstance(data, dict) and "payload" in data:
+                yield offset, data["payload"], data.get("city")
+            else:
+                yield offset, data, None
+        except (ValueError, StopIteration):
+            yield offset, None, None
+
+
+def _copy_field(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    if isinstance(value, str):
+        return '"' + value.replace('"', '""') + '"'
+    return repr(value)
+
+
+def copy_csv(rows: Sequence[Dict[str, Any]]) -> str:
+    """
+    Render rows as ``COPY ... (FORMAT csv)`` input. Strings are always
+    quoted, so an empty string stays distinct from NULL (an unquoted empty
+    field).
+    """
+    return "".join(
+        ",".join(_copy_field(row[column]) for column in COPY_COLUMNS) + "\n"
+        for row in rows
+    )
+
+
+def write_batch(engine: Engine, rows: List[Dict[str, Any]]) -> None:
+    """
+    Write one batch in one transaction: ``COPY`` on PostgreSQL, multi-row
+    INSERT otherwise.
+    """
+    driver = engine.dialect.driver if engine.dialect.name == "postgresql" else None
+    with engine.begin() as connection:
+        if driver in ("psycopg2", "psycopg"):
+            statement = (
+                f"COPY {WeatherData.__table__.fullname} ({', '.join(COPY_COLUMNS)}) "
+                "FROM STDIN WITH (FORMAT csv)"
+            )
+            dbapi_connection = connection.connection.dbapi_connection
+            with dbapi_connection.cursor() as cursor:
+                if driver == "psycopg2":
+                    cursor.copy_expert(statement, io.StringIO(copy_csv(rows)))
+                else:
+                    with cursor.copy(statement) as copy:
+                        copy.write(copy_csv(rows))
+        else:
+            connection.execute(insert(WeatherData), rows)
+
+
+def read_checkpoint(path: Union[str, Path], source: Path) -> Dict[str, Any]:
+    """
+    Saved progress for ``source``; a fresh state if there is no checkpoint.
+
+    Raises:
+        ValueError: If the checkpoint belongs to another input.
+    """
+    try:
+        state = json.loads(Path(path).read_text())
+    except FileNotFoundError:
+        return {"source": str(source), "offset": 0, "rows": 0, "skipped": 0}
+    if state.get("source") != str(source):
+        raise ValueError(
+            f"Checkpoint {path} is for {state.get('source')}, not {source}"
+        )
+    return state
+
+
+def write_checkpoint(path: Union[str, Path], state: Dict[str, Any]) -> None:
+    path = Path(path)
+    fd, temporary = tempfile.mkstemp(prefix=f".{path.name}.", dir=path.parent)
+    with os.fdopen(fd, "w") as handle:
+        json.dump(state, handle)
+    os.replace(temporary, path)
+
+
+def ingest(
+    engine: Engine,
+    source: Union[str, Path],
+    batch_rows: int = DEFAULT_BATCH_ROWS,
+    checkpoint: Optional[Union[str, Path]] = None,
+    resume: bool = False,
+    city: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Stream one dump into ``weather_data``.
+
+    Args:
+        engine (Engine): Database to write to.
+        source (str | Path): JSONL or CSV dump, optionally gzip-compressed.
+        batch_rows (int): Rows per transaction.
+        checkpoint (str | Path): File to save progress to after each batch.
+        resume (bool): Continue from ``checkpoint`` instead of the start.
+        city (str): City for payloads that do not name one.
+
+    Returns:
+        dict: Final state: ``offset``, ``rows``, ``skipped``, ``seconds``
+        and ``rows_per_second`` for this run.
+    """
+    source = Path(source).resolve()
+    state = {"source": str(source), "offset": 0, "rows": 0, "skipped": 0}
+    if resume and checkpoint is not None:
+        state = read_checkpoint(checkpoint, source)
+        logger.info(
+            "Resuming %s at byte %d (%d rows already written)",
+            source,
+            state["offset"],
+            state["rows"],
+        )
+
+    started = time.perf_counter()
+    default_time = datetime.now(timezone.utc)
+    written = 0
+    batch: List[Dict[str, Any]] = []
+    skipped = 0
+
+    def commit(offset: int) -> None:
+        nonlocal batch, skipped, written
+        if batch:
+            write_batch(engine, batch)
+        written += len(batch)
+        state.update(
+            offset=offset,
+            rows=state["rows"] + len(batch),
+            skipped=state["skipped"] + skipped,
+        )
+        batch, skipped = [], 0
+        if checkpoint is not None:
+            write_checkpoint(checkpoint, state)
+        elapsed = time.perf_counter() - started
+        logger.info(
+            "%d rows written (%.0f rows/s), %d skipped",
+            state["rows"],
+            written / elapsed if elapsed else 0.0,
+            state["skipped"],
+        )
+
+    offset = state["offset"]
+    with open_dump(source) as handle:
+        for offset, payload, record_city in iter_records(
+            handle, dump_format(source), state["offset"]
+        ):
+            try:
+                if payload is None:
+                    raise ValueError("Unparseable line")
+                batch.append(
+                    row_from_payload(payload, record_city or city, default_time)
+                )
+            except ValueError as e:
+                skipped += 1
+                logger.debug("Skipping record ending at byte %d: %s", offset, e)
+                continue
+            if len(batch) >= batch_rows:
+                commit(offset)
+    commit(offset)
+
+    seconds = time.perf_counter() - started
+    return {
+        **state,
+        "written": written,
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(written / seconds, 1) if seconds else 0.0,
+    }
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("source", type=Path, help="JSONL or CSV dump (.gz allowed)")
+    parser.add_argument(
+        "--batch-rows",
+        type=int,
+        default=DEFAULT_BATCH_ROWS,
+        help="Rows per transaction",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        type=Path,
+        default=None,
+        help="Progress file, updated after each batch",
+    )
+    parser.add_argument(
+        "--resume", action="store_true", help="Continue from --checkpoint"
+    )
+    parser.add_argument("--city", default=None, help="City for payloads without a name")
+    args = parser.parse_args(argv)
+    if args.batch_rows <= 0:
+        parser.error("--batch-rows must be positive")
+    if args.resume and args.checkpoint is None:
+        parser.error("--resume needs --checkpoint")
+    return args
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    args = parse_args(argv)
+    from apps.weather_service.db.session import engine
+
+    result = ingest(
+        engine, args.source, args.batch_rows, args.checkpoint, args.resume, args.city
+    )
+    print(
+        f"{result['written']} rows in {result['seconds']:.1f}s "
+        f"({result['rows_per_second']:.0f} rows/s), "
+        f"{result['skipped']} skipped, {result['rows']} total"
+    )
+
+
+if __name__ == "__main__":
+    main()
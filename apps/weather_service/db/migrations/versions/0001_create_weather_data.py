@@ -0,0 +1,70 @@
+"""Create weather_data table
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 00:00:00
+
+This migration script handles schema changes for the database.
+Generated by Alembic.
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# Revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """
+    Create the weather_data table as originally defined by the WeatherData model.
+    """
+    op.create_table(
+        "weather_data",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("city", sa.String(length=100), nullable=False),
+        sa.Column("temperature", sa.Float(), nullable=False),
+        sa.Column("condition", sa.String(length=50), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_weather_data")),
+        schema="public",
+    )
+    op.create_index(
+        op.f("ix_weather_data_id"),
+        "weather_data",
+        ["id"],
+        unique=False,
+        schema="public",
+    )
+    op.create_index(
+        op.f("ix_weather_data_city"),
+        "weather_data",
+        ["city"],
+        unique=False,
+        schema="public",
+    )
+
+
+def downgrade() -> None:
+    """
+    Drop the weather_data table.
+    """
+    op.drop_index(
+        op.f("ix_weather_data_city"), table_name="weather_data", schema="public"
+    )
+    op.drop_index(
+        op.f("ix_weather_data_id"), table_name="weather_data", schema="public"
+    )
+    op.drop_table("weather_data", schema="public")
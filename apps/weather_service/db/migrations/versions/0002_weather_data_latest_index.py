@@ -0,0 +1,63 @@
+"""Add latest-observation index and observation columns to weather_data
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 00:00:00
+
+This migration script handles schema changes for the database.
+Generated by Alembic.
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# Revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """
+    Add the columns needed to answer a request from a stored row, and a
+    composite (city, created_at DESC) index so the latest row per city is a
+    single index seek.
+    """
+    op.add_column(
+        "weather_data",
+        sa.Column("feels_like", sa.Float(), nullable=True),
+        schema="public",
+    )
+    op.add_column(
+        "weather_data",
+        sa.Column("description", sa.String(length=100), nullable=True),
+        schema="public",
+    )
+    op.add_column(
+        "weather_data",
+        sa.Column("observed_at", sa.Integer(), nullable=True),
+        schema="public",
+    )
+    op.create_index(
+        "ix_weather_data_city_created_at",
+        "weather_data",
+        ["city", sa.text("created_at DESC")],
+        unique=False,
+        schema="public",
+    )
+
+
+def downgrade() -> None:
+    """
+    Drop the composite index and the observation columns.
+    """
+    op.drop_index(
+        "ix_weather_data_city_created_at", table_name="weather_data", schema="public"
+    )
+    op.drop_column("weather_data", "observed_at", schema="public")
+    op.drop_column("weather_data", "description", schema="public")
+    op.drop_column("weather_data", "feels_like", schema="public")
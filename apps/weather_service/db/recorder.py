@@ -0,0 +1,196 @@
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.engine import Engine
+
+from apps.weather_service.core.config import settings
+from apps.weather_service.db.session import engine
+from libs.models.observation import WeatherObservation
+from libs.models.weather_model import WeatherData
+from libs.utils.logger import get_logger
+from libs.utils.metrics import STAGE_DB
+from libs.utils.upstream import add_observation_listener, remove_observation_listener
+
+logger = get_logger(__name__)
+
+
+class ObservationRecorder:
+    """
+    Write-behind recorder that persists observations to ``weather_data``.
+
+    ``record`` only appends to an in-memory buffer, so the request path never
+    waits on the database. A background thread flushes the buffer as one
+    multi-row INSERT when it reaches ``batch_size`` rows or when
+    ``flush_interval`` seconds have passed, and once more on ``stop``.
+
+    Overflow policy: the buffer holds at most ``max_queue`` rows. When it is
+    full the oldest buffered row is dropped to make room and counted in
+    ``dropped``. Rows from a failed flush are discarded and counted in
+    ``failed``; history is best effort and must never back up requests.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        batch_size: int = 500,
+        flush_interval: float = 2.0,
+        max_queue: int = 10000,
+    ) -> None:
+        self.engine = engine
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+
+        self._buffer: Deque[Dict] = deque()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._flush_lock = threading.Lock()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.skipped = 0
+
+    def record(self, observation: WeatherObservation) -> None:
+        """
+        Buffer an observation for the next flush. Never blocks on I/O.
+
+        Args:
+            observation (WeatherObservation): Observation to persist.
+        """
+        try:
+            row = WeatherData.values_from_observation(observation)
+        except ValueError as e:
+            self.skipped += 1
+            logger.warning("Not recording observation for %s: %s", observation.city, e)
+            return
+        with self._lock:
+            if len(self._buffer) >= self.max_queue:
+                self._buffer.popleft()
+                self.dropped += 1
+            self._buffer.append(row)
+            self.recorded += 1
+            if len(self._buffer) >= self.batch_size:
+                self._wakeup.notify()
+
+    def _drain(self) -> List[Dict]:
+        with self._lock:
+            count = min(len(self._buffer), self.batch_size)
+            return [self._buffer.popleft() for _ in range(count)]
+
+    def flush(self) -> int:
+        """
+        Write all buffered rows now, in batches of ``batch_size``.
+
+        Returns:
+            int: Number of rows written.
+        """
+        written = 0
+        with self._flush_lock:
+            while True:
+                rows = self._drain()
+                if not rows:
+                    break
+                try:
+                    with STAGE_DB.time(), self.engine.begin() as connection:
+                        connection.execute(insert(WeatherData).values(rows))
+                    written += len(rows)
+                except Exception as e:
+                    self.failed += len(rows)
+                    logger.error(
+                        "Failed to write %d weather observations: %s", len(rows), e
+                    )
+        self.written += written
+        return written
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                if not self._stopping and len(self._buffer) < self.batch_size:
+                    self._wakeup.wait(self.flush_interval)
+                stopping = self._stopping
+            self.flush()
+            if stopping:
+                return
+
+    def start(self) -> None:
+        """Start the background flush thread."""
+        if self._thread is not None:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(
+            target=self._run, name="observation-recorder", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """
+        Stop the background thread after a final flush of buffered rows.
+
+        Args:
+            timeout (float): Seconds to wait for the final flush.
+        """
+        if self._thread is None:
+            return
+        with self._lock:
+            self._stopping = True
+            self._wakeup.notify()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return a snapshot of the recorder counters.
+
+        Returns:
+            dict: Queue depth and recorded/written/dropped/failed/skipped counts.
+        """
+        return {
+            "queued": len(self._buffer),
+            "recorded": self.recorded,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "skipped": self.skipped,
+        }
+
+
+def start_recorder() -> Optional[ObservationRecorder]:
+    """
+    Create and start the recorder from settings and subscribe it to upstream
+    fetches. Called from the application lifespan.
+
+    Returns:
+        ObservationRecorder | None: The running recorder, or None if disabled.
+    """
+    if not settings.RECORDER_ENABLED:
+        return None
+
+    recorder = ObservationRecorder(
+        engine,
+        batch_size=settings.RECORDER_BATCH_SIZE,
+        flush_interval=settings.RECORDER_FLUSH_INTERVAL,
+        max_queue=settings.RECORDER_MAX_QUEUE,
+    )
+    recorder.start()
+    add_observation_listener(recorder.record)
+    return recorder
+
+
+def stop_recorder(recorder: Optional[ObservationRecorder]) -> None:
+    """
+    Unsubscribe the recorder and flush whatever is still buffered.
+
+    Args:
+        recorder (ObservationRecorder | None): Recorder from :func:`start_recorder`.
+    """
+    if recorder is None:
+        return
+    remove_observation_listener(recorder.record)
+    recorder.stop()
+    logger.info("Observation recorder stopped: %s", recorder.stats())
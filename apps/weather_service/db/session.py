@@ -1,7 +1,16 @@
+import logging
+import time
+from typing import TYPE_CHECKING, Any, Optional, Union
+
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
+
 from apps.weather_service.core.config import settings
-import logging
+from libs.utils.metrics import STAGE_DB, gauge
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
 
 # Configure logger
 logger = logging.getLogger(__name__)
@@ -10,21 +19,88 @@ logger = logging.getLogger(__name__)
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,  # Test connections before using them
-    pool_size=10,  # Maximum number of connections in the pool
-    max_overflow=20,  # Additional connections allowed beyond pool_size
-    pool_timeout=30,  # Timeout for getting a connection from the pool
+    pool_size=settings.DB_POOL_SIZE,  # Maximum number of connections in the pool
+    # Additional connections allowed beyond pool_size
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    # Timeout for getting a connection from the pool
+    pool_timeout=settings.DB_POOL_TIMEOUT,
     echo=False,  # Set to True for debugging SQL queries
 )
 
+
+def _pool_samples():
+    pool = engine.pool
+    samples = []
+    for state, method in (
+        ("checked_out", "checkedout"),
+        ("size", "size"),
+        ("overflow", "overflow"),
+    ):
+        if hasattr(pool, method):
+            samples.append(((state,), getattr(pool, method)()))
+    return samples
+
+
+gauge(
+    "db_pool_connections",
+    "Sync database connection pool usage.",
+    _pool_samples,
+    ("state",),
+)
+
 # Create a session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Optional async engine (e.g. postgresql+asyncpg://...), created on first use so
+# sqlalchemy.ext.asyncio and the async driver are only imported when
+# DATABASE_ASYNC_URL is configured.
+_async_engine: Optional["AsyncEngine"] = None
+_async_session_factory: Optional["async_sessionmaker"] = None
+
+
+def get_async_engine() -> Optional["AsyncEngine"]:
+    """
+    Return the async engine, or None if DATABASE_ASYNC_URL is not set.
+    """
+    global _async_engine, _async_session_factory
+    if not settings.DATABASE_ASYNC_URL:
+        return None
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        _async_engine = create_async_engine(
+            settings.DATABASE_ASYNC_URL,
+            pool_pre_ping=True,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            echo=False,
+        )
+        _async_session_factory = async_sessionmaker(
+            _async_engine, autoflush=False, expire_on_commit=False
+        )
+    return _async_engine
+
+
+async def dispose_async_engine() -> None:
+    """
+    Close the async engine's pool. Called from the application lifespan.
+    """
+    global _async_engine, _async_session_factory
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+        _async_session_factory = None
+
 
 # Dependency injection for FastAPI
 def get_db():
     """
     Dependency for database session management.
     Ensures sessions are properly closed after use.
+
+    Only endpoints that declare this dependency get a session, so routes
+    that never touch the database do not pay for one.
     """
     db = SessionLocal()
     try:
@@ -34,3 +110,54 @@ def get_db():
         raise
     finally:
         db.close()
+
+
+async def get_session():
+    """
+    Dependency yielding an AsyncSession when the async engine is configured,
+    and a regular Session otherwise. Use with :func:`execute`.
+    """
+    if get_async_engine() is None:
+        db = SessionLocal()
+        try:
+            yield db
+        except Exception as e:
+            logger.error(f"Database session error: {e}")
+            raise
+        finally:
+            await run_in_threadpool(db.close)
+        return
+
+    async with _async_session_factory() as db:
+        try:
+            yield db
+        except Exception as e:
+            logger.error(f"Database session error: {e}")
+            raise
+
+
+def is_async_session(db: Union[Session, "AsyncSession"]) -> bool:
+    """Whether ``db`` came from the async engine."""
+    return not isinstance(db, Session)
+
+
+async def execute(db: Union[Session, "AsyncSession"], statement: Any):
+    """
+    Execute a statement without blocking the event loop.
+
+    Awaits the async driver directly, or runs a sync session in the threadpool.
+
+    Args:
+        db (Session | AsyncSession): Session from :func:`get_session`.
+        statement: SQLAlchemy statement.
+
+    Returns:
+        Result: Buffered SQLAlchemy result.
+    """
+    started = time.perf_counter()
+    try:
+        if is_async_session(db):
+            return await db.execute(statement)
+        return await run_in_threadpool(db.execute, statement)
+    finally:
+        STAGE_DB.observe(time.perf_counter() - started)
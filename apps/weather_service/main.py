@@ -1,17 +1,83 @@
-from fastapi import FastAPI, Request, HTTPException
-from libs.utils.logger import get_logger
-from apps.weather_service.core.config import settings
-from libs.utils.api_client import fetch_weather
-from libs.utils.weather_logic import should_go_out
-from apps.weather_service.api.endpoints.weather import router as weather_router
-from fastapi.responses import JSONResponse
-from sqlalchemy.exc import DatabaseError
-from apps.weather_service.db.session import SessionLocal
+import asyncio
 import time
 import uuid
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import DatabaseError
+
+from apps.weather_service.api.endpoints.admin import router as admin_router
+from apps.weather_service.api.endpoints.cities import router as cities_router
+from apps.weather_service.api.endpoints.history import router as history_router
+from apps.weather_service.api.endpoints.weather import router as weather_router
+from apps.weather_service.core.config import settings
+from apps.weather_service.db.freshness import disable_read_through, enable_read_through
+from apps.weather_service.db.recorder import start_recorder, stop_recorder
+from apps.weather_service.db.session import dispose_async_engine
+from libs.utils.cities import UnknownCity, get_city_index
+from libs.utils.logger import get_logger
+from libs.utils.metrics import (
+    REQUEST_SECONDS,
+    TimedJSONResponse,
+    metrics_response,
+    route_label,
+    server_timing_header,
+    start_request_timing,
+)
+from libs.utils.profiling import profiler
+from libs.utils.refresh import start_refresh_scheduler, stop_refresh_scheduler
+from libs.utils.responses import (
+    FastJSONResponse,
+    conditional_response,
+    observation_etag,
+)
+from libs.utils.upstream import (
+    cache_fresh_for,
+    close_client,
+    fetch_observation_async,
+    start_shared_cache,
+    stop_shared_cache,
+)
+from libs.utils.warmup import warm_imports
+from libs.utils.weather_logic import (
+    UPSTREAM_UNAVAILABLE,
+    process_weather_decision,
+    unknown_city_error,
+    upstream_unavailable_error,
+)
 
 logger = get_logger(__name__)
-app = FastAPI()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Application lifespan: load the city index, attach the host-wide
+    weather cache (if configured), start the observation recorder, the
+    database read-through tier and the hot-city refresh scheduler, and on
+    shutdown flush the recorder and release the pooled upstream client,
+    database connections and cache file.
+
+    The upstream HTTP transport, which httpx imports on first use, is
+    imported in the background so it does not slow the first request.
+    """
+    warm_imports(["httpcore"])
+    get_city_index()
+    start_shared_cache()
+    recorder = start_recorder()
+    enable_read_through()
+    scheduler = start_refresh_scheduler()
+    yield
+    await stop_refresh_scheduler(scheduler)
+    disable_read_through()
+    await asyncio.to_thread(stop_recorder, recorder)
+    await close_client()
+    stop_shared_cache()
+    await dispose_async_engine()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=TimedJSONResponse)
 
 
 # Middleware for adding request ID and response time logging
@@ -20,9 +86,13 @@ async def add_request_id_and_log(request: Request, call_next):
     request_id = str(uuid.uuid4())
     request.state.request_id = request_id
 
+    timings = start_request_timing()
     start_time = time.time()
     try:
-        response = await call_next(request)
+        if profiler.wanted(request.headers):
+            response = await profiler.run(lambda: call_next(request))
+        else:
+            response = await call_next(request)
     except Exception as exc:
         logger.error(
             "Unhandled error during request processing",
@@ -31,6 +101,9 @@ async def add_request_id_and_log(request: Request, call_next):
         raise
     finally:
         process_time = time.time() - start_time
+        REQUEST_SECONDS.labels(request.method, route_label(request.scope)).observe(
+            process_time
+        )
         logger.info(
             "Request completed",
             extra={
@@ -42,21 +115,11 @@ async def add_request_id_and_log(request: Request, call_next):
 
     response.headers["X-Request-ID"] = request_id
     response.headers["X-Process-Time"] = str(process_time)
+    response.headers["Server-Timing"] = server_timing_header(timings, process_time)
     response.headers["X-Backend-Version"] = settings.PROJECT_NAME
     return response
 
 
-# Middleware for database session lifecycle management
-@app.middleware("http")
-async def db_session_middleware(request: Request, call_next):
-    request.state.db = SessionLocal()
-    try:
-        response = await call_next(request)
-    finally:
-        request.state.db.close()
-    return response
-
-
 # Global exception handler for unexpected errors
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
@@ -86,6 +149,7 @@ async def http_exception_handler(request: Request, exc: HTTPException):
     return JSONResponse(
         status_code=exc.status_code,
         content={"error": exc.detail, "request_id": request_id},
+        headers=exc.headers,
     )
 
 
@@ -109,24 +173,37 @@ if not settings.OPENWEATHER_API_KEY:
 
 
 # Define the weather decision endpoint
-@app.get("/decision")
-def weather_decision(city: str):
+@app.get("/decision", response_class=FastJSONResponse)
+async def weather_decision(request: Request, city: str):
     """
     Get a decision on whether it's suitable to go out based on weather conditions.
 
+    Conditional like ``/api/v1/weather``: ETag of the observation, ``304``
+    on a matching ``If-None-Match``, pre-rendered body on repeated polls.
+
     Args:
+        request (Request): Incoming request, for ``If-None-Match``.
         city (str): Name of the city.
 
     Returns:
-        dict: Decision and reasoning.
+        Response: Decision and reasoning, or 304.
     """
     api_key = settings.OPENWEATHER_API_KEY
     if not api_key:
         raise HTTPException(status_code=500, detail="API key is not configured")
 
     try:
-        weather_data = fetch_weather(api_key, city)
-        return should_go_out(weather_data, city)
+        observation = await fetch_observation_async(api_key, city)
+        return conditional_response(
+            request.headers,
+            observation_etag("decision", observation),
+            lambda: process_weather_decision(observation),
+            max_age=cache_fresh_for(city),
+        )
+    except UPSTREAM_UNAVAILABLE as exc:
+        raise upstream_unavailable_error(exc)
+    except UnknownCity as exc:
+        raise unknown_city_error(exc)
     except Exception as exc:
         logger.error(
             "Error fetching or processing weather data", extra={"error": str(exc)}
@@ -134,5 +211,17 @@ def weather_decision(city: str):
         raise HTTPException(status_code=500, detail="Failed to process weather data")
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Prometheus text exposition of request, stage, upstream, threadpool,
+    database pool and cache metrics for this worker.
+    """
+    return metrics_response()
+
+
 # Include other API routes
 app.include_router(weather_router, prefix="/api/v1", tags=["Weather"])
+app.include_router(history_router, prefix="/api/v1", tags=["History"])
+app.include_router(cities_router, prefix="/api/v1", tags=["Cities"])
+app.include_router(admin_router, tags=["Admin"], include_in_schema=False)
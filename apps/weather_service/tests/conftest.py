@@ -0,0 +1,36 @@
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import StaticPool
+
+from apps.weather_service.db.base import Base
+
+
+@pytest.fixture
+def sqlite_engine():
+    """In-memory SQLite with the "public" schema attached."""
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+
+    @event.listens_for(engine, "connect")
+    def attach_public(dbapi_connection, _):
+        dbapi_connection.execute("ATTACH DATABASE ':memory:' AS public")
+
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+class FakeClock:
+    """Callable clock for components that take ``clock=``; set ``now`` to move time."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
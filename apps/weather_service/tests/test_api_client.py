@@ -0,0 +1,76 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from apps.weather_service.main import app
+from libs.utils.api_client import WeatherClient
+
+client = TestClient(app)
+
+MOCK_PAYLOAD = {
+    "weather": [{"main": "Clear", "description": "clear sky"}],
+    "main": {"temp": 20, "feels_like": 18},
+}
+
+
+def test_async_fetch_reuses_pooled_client():
+    """
+    The async client is created once per event loop and reused across calls.
+    """
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.params["q"])
+        return httpx.Response(200, json=MOCK_PAYLOAD)
+
+    weather_client = WeatherClient(async_transport=httpx.MockTransport(handler))
+
+    async def run():
+        first = await weather_client.fetch_async("key", "London")
+        pooled = weather_client._get_async_client()
+        second = await weather_client.fetch_async("key", "Paris")
+        assert weather_client._get_async_client() is pooled
+        await weather_client.aclose()
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == second == MOCK_PAYLOAD
+    assert calls == ["London", "Paris"]
+
+
+def test_async_fetch_raises_on_http_error():
+    """
+    Upstream error statuses surface as httpx.HTTPStatusError.
+    """
+    transport = httpx.MockTransport(lambda request: httpx.Response(404, json={}))
+    weather_client = WeatherClient(async_transport=transport)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(weather_client.fetch_async("key", "Nowhere"))
+
+
+def test_fetch_rejects_empty_city():
+    """
+    Empty city names are rejected before any network call.
+    """
+    with pytest.raises(ValueError):
+        asyncio.run(WeatherClient().fetch_async("key", "  "))
+
+
+def test_decision_endpoint_awaits_async_client(mocker):
+    """
+    /decision uses the async upstream client.
+    """
+    mocker.patch(
+        "libs.utils.upstream.fetch_weather_async",
+        mocker.AsyncMock(return_value=MOCK_PAYLOAD),
+    )
+
+    response = client.get("/decision?city=London")
+    assert response.status_code == 200
+    assert response.json() == {
+        "decision": "Yes",
+        "reason": "The weather in London is clear and suitable to go out.",
+    }
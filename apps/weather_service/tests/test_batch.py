@@ -0,0 +1,119 @@
+import asyncio
+
+import httpx
+from fastapi.testclient import TestClient
+
+from apps.ai_service.ml_main import app as ai_app
+from apps.weather_service.main import app
+from libs.utils import api_client, ml_processor, upstream, weather_logic
+from libs.utils.upstream import dedupe_cities
+
+client = TestClient(app)
+ai_client = TestClient(ai_app)
+
+
+def make_fake_fetch(state):
+    async def fake_fetch(api_key, city):
+        state["in_flight"] += 1
+        state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+        state["calls"].append(city)
+        await asyncio.sleep(0.01)
+        state["in_flight"] -= 1
+        if city == "Atlantis":
+            request = httpx.Request("GET", api_client.BASE_URL)
+            raise httpx.HTTPStatusError(
+                "not found",
+                request=request,
+                response=httpx.Response(404, request=request),
+            )
+        return {
+            "weather": [{"main": "Clear", "description": "clear sky"}],
+            "main": {"temp": 20},
+        }
+
+    return fake_fetch
+
+
+def test_dedupe_cities():
+    assert dedupe_cities(["London", " london", "", "Paris", "LONDON"]) == [
+        "London",
+        "Paris",
+    ]
+
+
+def test_batch_dedupes_and_reports_partial_failures(mocker):
+    state = {"in_flight": 0, "max_in_flight": 0, "calls": []}
+    mocker.patch.object(upstream, "fetch_weather_async", make_fake_fetch(state))
+
+    response = client.post(
+        "/api/v1/weather/batch", json={"cities": ["London", "london", "Atlantis"]}
+    )
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [item["city"] for item in results] == ["London", "Atlantis"]
+    assert results[0]["status"] == "ok"
+    assert results[0]["result"]["decision"] == "Yes"
+    assert results[1] == {
+        "city": "Atlantis",
+        "status": "error",
+        "result": None,
+        "error": "City not found.",
+    }
+    assert state["calls"] == ["London", "Atlantis"]
+
+
+def test_batch_respects_concurrency_limit(mocker):
+    state = {"in_flight": 0, "max_in_flight": 0, "calls": []}
+    mocker.patch.object(upstream, "fetch_weather_async", make_fake_fetch(state))
+    mocker.patch("apps.weather_service.core.config.settings.BATCH_MAX_CONCURRENCY", 3)
+
+    cities = [f"City{i}" for i in range(20)]
+    response = client.post("/api/v1/weather/batch", json={"cities": cities})
+    assert response.status_code == 200
+    assert len(state["calls"]) == 20
+    assert state["max_in_flight"] <= 3
+
+
+def test_batch_rejects_oversized_requests(mocker):
+    mocker.patch("apps.weather_service.core.config.settings.BATCH_MAX_CITIES", 2)
+    response = client.post("/api/v1/weather/batch", json={"cities": ["A", "B", "C"]})
+    assert response.status_code == 400
+
+
+def test_ml_batch(mocker):
+    state = {"in_flight": 0, "max_in_flight": 0, "calls": []}
+    mocker.patch.object(upstream, "fetch_weather_async", make_fake_fetch(state))
+
+    response = ai_client.post(
+        "/api/v1/ml-decision/batch", json={"cities": ["paris", "Atlantis", "PARIS"]}
+    )
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert results[0]["decision"] == "Yes"
+    # Reasons name the city as resolved, not as typed
+    assert results[0]["reason"].startswith("The weather in Paris ")
+    assert results[1]["status"] == "error"
+    assert len(results) == 2
+
+
+def test_batches_decide_in_one_engine_call(mocker):
+    state = {"in_flight": 0, "max_in_flight": 0, "calls": []}
+    mocker.patch.object(upstream, "fetch_weather_async", make_fake_fetch(state))
+    decide_batch = mocker.spy(weather_logic, "decide_batch")
+    decide_one = mocker.spy(weather_logic, "decide_one")
+    decide_features = mocker.spy(ml_processor, "decide_features_batch")
+
+    cities = ["London", "Atlantis", "Paris", "Rome"]
+    results = client.post("/api/v1/weather/batch", json={"cities": cities}).json()[
+        "results"
+    ]
+    assert [item["status"] for item in results] == ["ok", "error", "ok", "ok"]
+    assert decide_batch.call_count == 1 and not decide_one.called
+    assert len(decide_batch.call_args.args[0]) == 3
+
+    results = ai_client.post(
+        "/api/v1/ml-decision/batch", json={"cities": cities}
+    ).json()["results"]
+    assert [item.get("decision") for item in results] == ["Yes", None, "Yes", "Yes"]
+    assert decide_features.call_count == 1
+    assert decide_features.call_args.args[0].shape == (3, 2)
@@ -0,0 +1,102 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from libs.utils.cache import TTLCache, normalize_city
+
+
+def test_normalize_city():
+    assert normalize_city("  New   York ") == normalize_city("NEW YORK") == "new york"
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = TTLCache(max_entries=10, ttl=60, clock=clock)
+    cache.set("london", {"temp": 10})
+
+    assert cache.get("london") == {"temp": 10}
+    clock.now = 61
+    assert cache.get("london") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_lru_eviction():
+    cache = TTLCache(max_entries=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" becomes least recently used
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_get_or_load_coalesces_threads():
+    cache = TTLCache()
+    calls = []
+    release = threading.Event()
+
+    def loader():
+        calls.append(1)
+        release.wait(1)
+        return "value"
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_load("k", loader)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["value"] * 8
+    assert len(calls) == 1
+    assert cache.stats()["coalesced"] == 7
+
+
+def test_get_or_load_async_coalesces_and_propagates_errors():
+    cache = TTLCache()
+    calls = []
+
+    async def failing_loader():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    async def run():
+        return await asyncio.gather(
+            *(cache.get_or_load_async("k", failing_loader) for _ in range(5)),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+    # Failures are not cached
+    assert cache.get("k") is None
+
+
+def test_zero_ttl_disables_caching():
+    cache = TTLCache(ttl=0)
+    assert cache.get_or_load("k", lambda: 1) == 1
+    assert len(cache) == 0
+
+
+@pytest.mark.parametrize("city", ["London", "london ", "LONDON"])
+def test_fetch_weather_uses_cache(mocker, city):
+    from libs.utils import api_client, upstream
+
+    mocker.patch.object(upstream, "weather_cache", TTLCache())
+    fetch = mocker.patch.object(
+        api_client.WeatherClient, "fetch_async", return_value={"ok": 1}
+    )
+
+    asyncio.run(upstream.fetch_weather_async("key", "London"))
+    asyncio.run(upstream.fetch_weather_async("key", city))
+    assert fetch.call_count == 1
@@ -0,0 +1,167 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from libs.utils import upstream
+from libs.utils.api_client import WeatherClient
+from libs.utils.circuit import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpen
+
+PAYLOAD = {
+    "weather": [{"main": "Clear", "description": "clear sky"}],
+    "main": {"temp": 20},
+}
+
+
+def test_breaker_opens_on_errors_and_recovers_after_trial(clock):
+    breaker = CircuitBreaker(
+        window=10, min_calls=4, error_rate=0.5, open_seconds=30, clock=clock
+    )
+
+    for success in (True, False, True, False):
+        breaker.before_call()
+        breaker.record(success, 0.1)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpen) as excinfo:
+        breaker.before_call()
+    assert excinfo.value.retry_after == pytest.approx(30)
+
+    clock.now = 31
+    assert breaker.state == HALF_OPEN
+    breaker.before_call()  # the trial call
+    with pytest.raises(CircuitOpen):
+        breaker.before_call()  # only one trial at a time
+    breaker.record(True, 0.1)
+    assert breaker.state == CLOSED
+
+
+def test_breaker_opens_on_slow_calls_and_failed_trial_reopens(clock):
+    breaker = CircuitBreaker(
+        min_calls=3,
+        slow_call_seconds=1.0,
+        slow_call_rate=1.0,
+        open_seconds=10,
+        clock=clock,
+    )
+    for _ in range(3):
+        breaker.record(True, 2.0)
+    assert breaker.state == OPEN
+
+    clock.now = 10
+    breaker.before_call()
+    breaker.record(False, 0.1)
+    assert breaker.state == OPEN
+    assert breaker.stats()["opened"] == 2
+
+
+def test_client_fails_fast_against_failing_upstream():
+    requests_seen = []
+
+    def handler(request):
+        requests_seen.append(request)
+        return httpx.Response(500, json={"message": "boom"})
+
+    client = WeatherClient(
+        async_transport=httpx.MockTransport(handler),
+        breaker=CircuitBreaker(window=4, min_calls=4, error_rate=0.5),
+    )
+
+    async def run():
+        for _ in range(4):
+            with pytest.raises(httpx.HTTPStatusError):
+                await client.fetch_async("key", "London")
+        with pytest.raises(CircuitOpen):
+            await client.fetch_async("key", "London")
+        await client.aclose()
+
+    asyncio.run(run())
+    assert len(requests_seen) == 4
+
+
+def test_not_found_does_not_trip_breaker():
+    client = WeatherClient(
+        async_transport=httpx.MockTransport(lambda request: httpx.Response(404)),
+        breaker=CircuitBreaker(window=2, min_calls=2),
+    )
+
+    async def run():
+        for _ in range(3):
+            with pytest.raises(httpx.HTTPStatusError):
+                await client.fetch_async("key", "Atlantis")
+        await client.aclose()
+
+    asyncio.run(run())
+    assert client.breaker.state == CLOSED
+
+
+def test_slow_attempt_is_hedged():
+    calls = []
+
+    async def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            await asyncio.sleep(1.0)
+        return httpx.Response(200, json=PAYLOAD)
+
+    client = WeatherClient(
+        async_transport=httpx.MockTransport(handler),
+        hedge_percentile=95,
+        hedge_min_delay=0.01,
+        hedge_min_samples=5,
+    )
+    for _ in range(5):
+        client.latencies.add(0.02)
+
+    async def run():
+        started = time.monotonic()
+        data = await client.fetch_async("key", "London")
+        elapsed = time.monotonic() - started
+        await client.aclose()
+        return data, elapsed
+
+    data, elapsed = asyncio.run(run())
+    assert data == PAYLOAD
+    assert elapsed < 0.5
+    assert (client.hedged, client.hedge_wins) == (1, 1)
+
+
+def test_hedge_skipped_when_not_admitted():
+    async def handler(request):
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json=PAYLOAD)
+
+    client = WeatherClient(
+        async_transport=httpx.MockTransport(handler),
+        hedge_percentile=50,
+        hedge_min_delay=0.001,
+        hedge_min_samples=1,
+        hedge_admit=lambda api_key: False,
+    )
+    client.latencies.add(0.001)
+
+    async def run():
+        data = await client.fetch_async("key", "London")
+        await client.aclose()
+        return data
+
+    assert asyncio.run(run()) == PAYLOAD
+    assert client.hedged == 0
+
+
+def test_open_circuit_serves_stored_observation(mocker):
+    client = WeatherClient(breaker=CircuitBreaker(min_calls=1))
+    client.breaker.record(False, 0.1)
+    mocker.patch.object(upstream, "get_client", return_value=client)
+    lookups = []
+
+    def read_through(city, max_age=None):
+        lookups.append(max_age)
+        return PAYLOAD if max_age is not None else None
+
+    mocker.patch.object(upstream, "_read_through", read_through)
+    upstream.weather_cache.clear()
+
+    data = asyncio.run(upstream.fetch_weather_async("key", "Outageville"))
+    assert data == PAYLOAD
+    assert lookups == [None, upstream.settings.CIRCUIT_FALLBACK_MAX_AGE]
@@ -0,0 +1,136 @@
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from apps.weather_service.main import app
+from libs.utils import cities, upstream
+from libs.utils.api_client import WeatherClient
+from libs.utils.cache import TTLCache
+from libs.utils.cities import (
+    City,
+    CityIndex,
+    UnknownCity,
+    canonical_city,
+    get_city_index,
+)
+
+client = TestClient(app)
+
+PAYLOAD = {
+    "weather": [{"main": "Clear", "description": "clear sky"}],
+    "main": {"temp": 20},
+}
+
+
+def test_resolve_spellings_and_countries():
+    index = get_city_index()
+    assert canonical_city(" london ") == canonical_city("LONDON") == "London"
+    assert canonical_city("Sao  Paulo") == "São Paulo"
+    assert canonical_city("london, ca") == "London,CA"
+    assert index.resolve("2643743").country == "GB"
+    assert index.resolve("London,FR") is None
+    # Unknown names pass through unless strict
+    assert canonical_city(" Atlantis ") == "Atlantis"
+
+
+def test_suggest_uses_prefix_order():
+    index = CityIndex(
+        [
+            City(1, "Paris", "FR", 0, 0),
+            City(2, "Parma", "IT", 0, 0),
+            City(3, "Paris", "US", 0, 0),
+            City(4, "Pärnu", "EE", 0, 0),
+            City(5, "Perth", "AU", 0, 0),
+        ]
+    )
+    assert [city.id for city in index.suggest("par")] == [1, 3, 2, 4]
+    assert [city.id for city in index.suggest("PARI", limit=1)] == [1]
+    assert index.suggest("x") == [] and index.suggest("  ") == []
+    assert index.canonical_name(index.get(3)) == "Paris,US"
+
+
+def test_suggest_endpoint_is_fast():
+    response = client.get("/api/v1/cities/suggest", params={"q": "lon", "limit": 5})
+    assert response.status_code == 200
+    assert [
+        (item["query"], item["country"]) for item in response.json()["results"]
+    ] == [
+        ("London", "GB"),
+        ("London,CA", "CA"),
+    ]
+
+    index = get_city_index()
+    started = time.perf_counter()
+    for _ in range(1000):
+        index.suggest("s", 10)
+    assert (time.perf_counter() - started) / 1000 < 0.001
+
+
+def test_strict_mode_rejects_unknown_cities_without_upstream_call(mocker):
+    mocker.patch.object(cities.settings, "CITY_INDEX_STRICT", True)
+    mocker.patch.object(upstream, "weather_cache", TTLCache())
+    fetch = mocker.patch.object(
+        upstream, "fetch_weather_async", mocker.AsyncMock(return_value=PAYLOAD)
+    )
+
+    assert client.get("/decision?city=Atlantis").status_code == 404
+    assert (
+        client.get("/api/v1/weather?city=Atlantis").json()["error"] == "City not found."
+    )
+    assert (
+        client.get("/api/v1/weather?city=LONDON")
+        .json()["advice"]
+        .startswith("The weather in London ")
+    )
+    fetch.assert_awaited_once_with(mocker.ANY, "London")
+    with pytest.raises(UnknownCity):
+        asyncio.run(upstream.fetch_observation_async("key", "Atlantis"))
+
+
+def test_openweather_city_list(tmp_path):
+    path = tmp_path / "city.list.json"
+    path.write_text(
+        json.dumps(
+            [
+                {
+                    "id": 3143244,
+                    "name": "Oslo",
+                    "state": "",
+                    "country": "NO",
+                    "coord": {"lon": 10.74609, "lat": 59.91273},
+                },
+                {"id": 0, "name": "", "country": "", "coord": {"lon": 0, "lat": 0}},
+            ]
+        )
+    )
+    index = CityIndex.from_file(path)
+    assert len(index) == 1 and index.resolve("oslo").id == 3143244
+
+
+def test_upstream_404_is_remembered_per_name(mocker):
+    mocker.patch.object(upstream, "weather_cache", TTLCache())
+    mocker.patch.object(upstream, "unknown_cities", TTLCache())
+    mocker.patch.object(upstream, "_read_through", None)
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.params["q"])
+        return httpx.Response(404, json={"cod": "404", "message": "city not found"})
+
+    mocker.patch.object(
+        upstream,
+        "get_client",
+        return_value=WeatherClient(async_transport=httpx.MockTransport(handler)),
+    )
+
+    for spelling in ("Atlantys", " ATLANTYS", "atlantys"):
+        assert client.get("/decision", params={"city": spelling}).status_code == 404
+    assert (
+        client.get("/api/v1/weather", params={"city": "Atlantys"}).json()["error"]
+        == "City not found."
+    )
+    assert calls == ["Atlantys"]
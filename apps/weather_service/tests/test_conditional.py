@@ -0,0 +1,79 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from apps.weather_service.main import app
+from libs.utils import responses, upstream
+from libs.utils.cache import TTLCache
+
+client = TestClient(app)
+
+
+def payload(dt, temp=20):
+    return {
+        "dt": dt,
+        "weather": [{"main": "Clear", "description": "clear sky"}],
+        "main": {"temp": temp},
+    }
+
+
+@pytest.fixture
+def fake_upstream(mocker):
+    mocker.patch.object(upstream, "weather_cache", TTLCache())
+    mocker.patch.object(responses, "rendered_responses", TTLCache())
+    return mocker.patch.object(
+        upstream,
+        "fetch_weather_async",
+        mocker.AsyncMock(return_value=payload(1_700_000_000)),
+    )
+
+
+@pytest.mark.parametrize(
+    "path", ["/decision?city=London", "/api/v1/weather?city=London"]
+)
+def test_if_none_match_gets_304_without_deciding(fake_upstream, mocker, path):
+    first = client.get(path)
+    etag = first.headers["ETag"]
+    assert first.status_code == 200 and first.headers["Cache-Control"].startswith(
+        "public, max-age="
+    )
+
+    decide = mocker.patch("libs.utils.weather_logic.decide_one")
+    dumps = mocker.spy(responses, "dumps")
+    again = client.get(path, headers={"If-None-Match": f'"other", W/{etag}'})
+    assert again.status_code == 304 and again.content == b""
+    assert again.headers["ETag"] == etag
+
+    # Without the header the body comes from the pre-rendered cache
+    cached = client.get(path)
+    assert cached.content == first.content
+    assert not decide.called and not dumps.called
+
+
+def test_etag_follows_observation_time_and_canonical_city(fake_upstream):
+    london = client.get("/decision?city=London")
+    assert client.get("/decision?city=LONDON").headers["ETag"] == london.headers["ETag"]
+    assert (
+        client.get("/decision?city=London,CA").headers["ETag"] != london.headers["ETag"]
+    )
+    assert (
+        client.get("/api/v1/weather?city=London").headers["ETag"]
+        != london.headers["ETag"]
+    )
+
+    fake_upstream.return_value = payload(1_700_000_600, temp=2)
+    upstream.weather_cache.clear()
+    changed = client.get(
+        "/decision?city=London", headers={"If-None-Match": london.headers["ETag"]}
+    )
+    assert changed.status_code == 200 and changed.json()["decision"] == "No"
+
+
+def test_dumps_matches_json_response():
+    content = {"city": "São Paulo", "temperature": 21.5, "ok": True, "none": None}
+    assert (
+        responses.dumps(content)
+        == b'{"city":"S\xc3\xa3o Paulo","temperature":21.5,"ok":true,"none":null}'
+    )
+    assert responses.etag_matches("*", '"x"') and not responses.etag_matches(
+        None, '"x"'
+    )
@@ -0,0 +1,130 @@
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from apps.weather_service.main import app
+from benchmarks.fake_openweather import create_app as create_fake_upstream
+from libs.utils import geo, responses, upstream
+from libs.utils.api_client import WeatherClient
+from libs.utils.cache import TTLCache
+
+client = TestClient(app)
+
+PAYLOAD = {
+    "name": "London",
+    "dt": 1_700_000_000,
+    "weather": [{"main": "Clear", "description": "clear sky"}],
+    "main": {"temp": 20},
+}
+
+
+def test_geohash_matches_reference_and_round_trips():
+    assert geo.encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+    cell = geo.snap(57.64911, 10.40744, 5)
+    assert cell.geohash == "u4pru"
+    assert geo.encode(cell.lat, cell.lon, 5) == "u4pru"
+    assert geo.cell_from_key(geo.cell_key(cell)) == cell
+    assert geo.cell_from_key("london") is None
+    with pytest.raises(ValueError):
+        geo.encode(91, 0, 5)
+    with pytest.raises(ValueError):
+        geo.encode(0, 0, 13)
+
+
+@pytest.fixture
+def fake_upstream(mocker):
+    requests_seen = []
+
+    def handler(request):
+        requests_seen.append(dict(request.url.params))
+        return httpx.Response(200, json=PAYLOAD)
+
+    mocker.patch.object(upstream, "weather_cache", TTLCache())
+    mocker.patch.object(responses, "rendered_responses", TTLCache())
+    mocker.patch.object(
+        upstream,
+        "get_client",
+        return_value=WeatherClient(async_transport=httpx.MockTransport(handler)),
+    )
+    return requests_seen
+
+
+def test_nearby_points_share_one_upstream_call(fake_upstream, mocker):
+    mocker.patch.object(upstream.settings, "GEO_CELL_PRECISION", 5)
+    first = client.get("/api/v1/weather/coordinates?lat=51.5072&lon=-0.1276")
+    # ~300 m away, same 5-character cell
+    nearby = client.get("/api/v1/weather/coordinates?lat=51.5090&lon=-0.1250")
+
+    assert first.status_code == 200 and nearby.content == first.content
+    body = first.json()
+    assert (
+        body["cell"] == "gcpvj"
+        and body["location"] == "London"
+        and body["decision"] == "Yes"
+    )
+    assert len(fake_upstream) == 1
+    # Upstream is asked about the cell centre, not the caller's point
+    assert float(fake_upstream[0]["lat"]) == pytest.approx(body["cell_lat"], abs=1e-6)
+    assert float(fake_upstream[0]["lon"]) == pytest.approx(body["cell_lon"], abs=1e-6)
+
+    again = client.get(
+        "/api/v1/weather/coordinates?lat=51.5090&lon=-0.1250",
+        headers={"If-None-Match": first.headers["ETag"]},
+    )
+    assert again.status_code == 304
+
+
+def test_precision_sets_cell_size(fake_upstream, mocker):
+    mocker.patch.object(upstream.settings, "GEO_CELL_PRECISION", 7)
+    first = client.get("/api/v1/weather/coordinates?lat=51.5072&lon=-0.1276")
+    nearby = client.get("/api/v1/weather/coordinates?lat=51.5090&lon=-0.1250")
+
+    assert first.json()["cell"] == "gcpvj0e" and nearby.json()["cell"] != "gcpvj0e"
+    assert len(fake_upstream) == 2
+    assert client.get("/api/v1/weather/coordinates?lat=95&lon=0").status_code == 422
+
+
+def test_cell_observations_are_not_recorded(fake_upstream, mocker):
+    listener = mocker.Mock()
+    upstream.add_observation_listener(listener)
+    try:
+        assert (
+            client.get(
+                "/api/v1/weather/coordinates?lat=51.5072&lon=-0.1276"
+            ).status_code
+            == 200
+        )
+    finally:
+        upstream.remove_observation_listener(listener)
+    assert not listener.called
+
+
+def test_city_names_cannot_reach_cell_keys(fake_upstream, mocker):
+    cell = geo.snap(51.5072, -0.1276, 5)
+    for name in (geo.cell_key(cell), "geo:" + cell.geohash):
+        key = upstream.city_key(name)
+        assert key != geo.cell_key(cell) and geo.cell_from_key(key) is None
+
+
+def test_fake_upstream_answers_coordinate_lookups(mocker):
+    fake = create_fake_upstream(latency_ms=0, jitter_ms=0, seed=0)
+    mocker.patch.object(upstream, "weather_cache", TTLCache())
+    mocker.patch.object(responses, "rendered_responses", TTLCache())
+    mocker.patch.object(
+        upstream,
+        "get_client",
+        return_value=WeatherClient(
+            base_url="http://fake/data/2.5/weather",
+            async_transport=httpx.ASGITransport(app=fake),
+        ),
+    )
+
+    response = client.get("/api/v1/weather/coordinates?lat=51.5072&lon=-0.1276")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["location"] == f"{body['cell_lat']:.4f},{body['cell_lon']:.4f}"
+    assert fake.state.counts[200] == 1
+
+    assert (
+        TestClient(fake).get("/data/2.5/weather", params={"lat": 1}).status_code == 400
+    )
@@ -0,0 +1,98 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from libs.models.observation import WeatherObservation
+from libs.utils.decision_engine import (
+    COLD_THRESHOLD,
+    CONDITIONS,
+    REASON_BAD_WEATHER,
+    REASON_CLEAR,
+    REASON_FEELS_COLD,
+    REASON_TOO_COLD,
+    RULES,
+    decide_batch,
+    decide_features_batch,
+    decide_one,
+    encode_conditions,
+    observations_to_arrays,
+)
+from libs.utils.ml_processor import make_decision
+
+
+def test_encode_conditions():
+    codes = encode_conditions(["Rain", "clear", "Volcano"])
+    assert codes.dtype == np.int8
+    assert codes[2] == 0
+
+
+def test_decide_batch_rules_and_precedence():
+    temperature = np.array([20.0, 20.0, 2.0, 10.0, np.nan, 1.0])
+    feels_like = np.array([18.0, 18.0, 0.0, 3.0, np.nan, 0.0])
+    codes = encode_conditions(["Clear", "Rain", "Clear", "Clouds", "", "Snow"])
+
+    go_out, reasons = decide_batch(temperature, feels_like, codes)
+    assert go_out.tolist() == [True, False, False, False, True, False]
+    assert reasons.tolist() == [
+        REASON_CLEAR,
+        REASON_BAD_WEATHER,
+        REASON_TOO_COLD,
+        REASON_FEELS_COLD,
+        REASON_CLEAR,
+        REASON_BAD_WEATHER,
+    ]
+
+
+def test_observations_to_arrays_maps_missing_to_nan():
+    temperature, feels_like, codes = observations_to_arrays(
+        [WeatherObservation("A", None, 3.0, "Clear")]
+    )
+    assert np.isnan(temperature[0])
+    assert feels_like[0] == 3.0
+
+
+def test_decide_features_batch():
+    assert decide_features_batch(np.array([[20.0, 0], [20.0, 1]])).tolist() == [
+        True,
+        False,
+    ]
+    with pytest.raises(ValueError):
+        decide_features_batch(np.array([1.0, 2.0, 3.0]))
+
+
+def test_make_decision_wraps_engine():
+    assert make_decision(np.array([-10.0, 0])) == "Yes"
+    assert make_decision(np.array([25.0, 1])) == "No"
+    with pytest.raises(ValueError):
+        make_decision(np.array([1.0]))
+
+
+@pytest.mark.parametrize("cold_threshold", [COLD_THRESHOLD, -3.5])
+def test_decide_one_matches_batch(cold_threshold):
+    """
+    decide_one and decide_batch interpret RULES separately; run both over
+    every combination of condition and temperatures around the threshold.
+    """
+    values = [
+        None,
+        float("nan"),
+        float("-inf"),
+        cold_threshold - 10,
+        cold_threshold - 1e-9,
+        cold_threshold,
+        cold_threshold + 1e-9,
+        cold_threshold + 10,
+    ]
+    conditions = [*CONDITIONS, "Volcano", "RAIN", "Clear"]
+    grid = list(itertools.product(values, values, conditions))
+    observations = [WeatherObservation("A", t, f, c) for t, f, c in grid]
+
+    _, reasons = decide_batch(
+        *observations_to_arrays(observations), cold_threshold=cold_threshold
+    )
+    assert [
+        decide_one(t, f, c, cold_threshold=cold_threshold) for t, f, c in grid
+    ] == reasons.tolist()
+    # Every rule fires somewhere in the grid
+    assert set(reasons.tolist()) == {REASON_CLEAR} | {reason for reason, _, _ in RULES}
@@ -0,0 +1,110 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import insert
+
+from apps.weather_service.db.freshness import LatestObservationSource
+from libs.models.weather_model import WeatherData
+from libs.utils import api_client, upstream
+from libs.utils.cache import TTLCache
+
+
+def insert_row(engine, city, temperature, age_seconds):
+    created_at = datetime.now(timezone.utc) - timedelta(seconds=age_seconds)
+    with engine.begin() as connection:
+        connection.execute(
+            insert(WeatherData).values(
+                city=city,
+                temperature=temperature,
+                condition="Clouds",
+                feels_like=temperature - 1,
+                description="broken clouds",
+                observed_at=1700000000,
+                created_at=created_at,
+            )
+        )
+
+
+def test_returns_latest_fresh_row(sqlite_engine):
+    insert_row(sqlite_engine, "london", 10.0, age_seconds=120)
+    insert_row(sqlite_engine, "london", 12.0, age_seconds=30)
+    source = LatestObservationSource(sqlite_engine, max_age=300)
+
+    payload, age = source("  LONDON ")
+    assert age == pytest.approx(30, abs=5)
+    assert payload["main"] == {"temp": 12.0, "feels_like": 11.0}
+    assert payload["weather"][0] == {"main": "Clouds", "description": "broken clouds"}
+    assert payload["dt"] == 1700000000
+
+
+def test_ignores_stale_rows(sqlite_engine):
+    insert_row(sqlite_engine, "london", 10.0, age_seconds=600)
+    source = LatestObservationSource(sqlite_engine, max_age=300)
+
+    assert source("London") is None
+    assert source.misses == 1
+
+
+def test_read_through_skips_upstream(mocker, sqlite_engine):
+    insert_row(sqlite_engine, "paris", 18.0, age_seconds=10)
+    mocker.patch.object(upstream, "weather_cache", TTLCache())
+    fetch = mocker.patch.object(api_client.WeatherClient, "fetch_async")
+    upstream.set_read_through(LatestObservationSource(sqlite_engine, max_age=300))
+    try:
+        observation = asyncio.run(upstream.fetch_observation_async("key", "Paris"))
+    finally:
+        upstream.set_read_through(None)
+
+    assert fetch.call_count == 0
+    assert observation.city == "Paris"
+    assert observation.temperature == 18.0
+
+
+def test_read_through_errors_fall_back_to_upstream(mocker):
+    mocker.patch.object(upstream, "weather_cache", TTLCache())
+    fetch = mocker.patch.object(
+        api_client.WeatherClient, "fetch_async", return_value={"main": {"temp": 5}}
+    )
+
+    def broken_source(city):
+        raise RuntimeError("database down")
+
+    upstream.set_read_through(broken_source)
+    try:
+        payload = asyncio.run(upstream.fetch_weather_async("key", "Rome"))
+        assert payload == {"main": {"temp": 5}}
+    finally:
+        upstream.set_read_through(None)
+    assert fetch.call_count == 1
+
+
+def test_read_through_rows_expire_from_created_at(mocker, sqlite_engine):
+    insert_row(sqlite_engine, "paris", 18.0, age_seconds=100)
+    mocker.patch.object(upstream, "weather_cache", TTLCache(ttl=120, stale_ttl=60))
+    fetch = mocker.patch.object(
+        api_client.WeatherClient,
+        "fetch_async",
+        mocker.AsyncMock(return_value={"name": "Paris", "main": {"temp": 20}}),
+    )
+    mocker.patch.object(
+        upstream, "_read_through", LatestObservationSource(sqlite_engine, max_age=300)
+    )
+
+    assert (
+        asyncio.run(upstream.fetch_weather_async("key", "Paris"))["main"]["temp"]
+        == 18.0
+    )
+    assert upstream.cache_fresh_for("Paris") == pytest.approx(20, abs=5)
+    assert fetch.call_count == 0
+
+    # Reloads of a stale entry go upstream, not back to the same row
+    async def revalidate():
+        upstream.weather_cache.set("paris", {"main": {"temp": 18.0}}, age=130)
+        stale = await upstream.fetch_weather_async("key", "Paris")
+        await asyncio.gather(*upstream.weather_cache._background)
+        return stale
+
+    assert asyncio.run(revalidate())["main"]["temp"] == 18.0
+    assert fetch.call_count == 1
+    assert upstream.weather_cache.get("paris")["main"]["temp"] == 20
@@ -0,0 +1,191 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+from apps.weather_service.db.session import get_session
+from apps.weather_service.main import app
+from libs.models.observation import WeatherObservation
+from libs.models.weather_model import WeatherData
+
+client = TestClient(app)
+BASE_TIME = datetime(2026, 1, 1, 0, 0, 0)
+
+
+@pytest.fixture
+def history_db(sqlite_engine):
+    """Five half-hourly London rows plus one Paris row, served through get_session."""
+    rows = [
+        {
+            "city": "london",
+            "temperature": float(i),
+            "condition": "Rain" if i % 2 else "Clear",
+            "created_at": BASE_TIME + timedelta(minutes=30 * i),
+        }
+        for i in range(5)
+    ]
+    rows.append(
+        {
+            "city": "paris",
+            "temperature": 20.0,
+            "condition": "Clear",
+            "created_at": BASE_TIME,
+        }
+    )
+    with sqlite_engine.begin() as connection:
+        connection.execute(insert(WeatherData), rows)
+
+    Session = sessionmaker(bind=sqlite_engine)
+
+    async def override_get_session():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_session] = override_get_session
+    yield
+    app.dependency_overrides.pop(get_session, None)
+
+
+def test_keyset_pagination_walks_all_rows(history_db):
+    temperatures = []
+    cursor = None
+    pages = 0
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        body = client.get("/api/v1/history/London", params=params).json()
+        temperatures += [item["temperature"] for item in body["items"]]
+        pages += 1
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+
+    assert temperatures == [4.0, 3.0, 2.0, 1.0, 0.0]
+    assert pages == 3
+
+
+def test_invalid_cursor_is_rejected(history_db):
+    response = client.get("/api/v1/history/London", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+def test_hourly_aggregates(history_db):
+    body = client.get(
+        "/api/v1/history/london/aggregates", params={"bucket": "hour"}
+    ).json()
+    assert [bucket["count"] for bucket in body["buckets"]] == [2, 2, 1]
+    first = body["buckets"][0]
+    assert first["min_temperature"] == 0.0
+    assert first["max_temperature"] == 1.0
+    assert first["avg_temperature"] == 0.5
+    assert first["conditions"] == {"Clear": 1, "Rain": 1}
+
+
+def test_export_streams_ndjson(history_db):
+    response = client.get("/api/v1/history/London/export")
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["temperature"] for line in lines] == [4.0, 3.0, 2.0, 1.0, 0.0]
+
+
+def test_history_uses_canonical_city_keys(history_db, sqlite_engine):
+    observation = WeatherObservation.from_payload(
+        {"main": {"temp": 25.0}, "weather": [{"main": "Clear"}]}, "Sao Paulo"
+    )
+    with sqlite_engine.begin() as connection:
+        connection.execute(
+            insert(WeatherData), [WeatherData.values_from_observation(observation)]
+        )
+
+    assert len(client.get("/api/v1/history/London,GB").json()["items"]) == 5
+    for spelling in ("Sao Paulo", "são paulo"):
+        assert [
+            item["temperature"]
+            for item in client.get(f"/api/v1/history/{spelling}").json()["items"]
+        ] == [25.0]
+    body = client.get("/api/v1/history/SAO PAULO/aggregates").json()
+    assert body["city"] == "são paulo" and body["buckets"][0]["count"] == 1
+
+
+@pytest.fixture
+def async_history_db(tmp_path):
+    """The same London rows, served through an aiosqlite AsyncSession."""
+    pytest.importorskip("greenlet")
+    pytest.importorskip("aiosqlite")
+    from sqlalchemy import event
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    from apps.weather_service.db.base import Base
+
+    public_path = tmp_path / "public.db"
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'main.db'}")
+
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def attach_public(dbapi_connection, _):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"ATTACH DATABASE '{public_path}' AS public")
+        cursor.close()
+
+    async def setup():
+        async with async_engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+            await connection.execute(
+                insert(WeatherData),
+                [
+                    {
+                        "city": "london",
+                        "temperature": float(i),
+                        "condition": "Clear",
+                        "created_at": BASE_TIME + timedelta(minutes=30 * i),
+                    }
+                    for i in range(3)
+                ],
+            )
+
+    import asyncio
+
+    asyncio.run(setup())
+    factory = async_sessionmaker(async_engine)
+
+    async def override_get_session():
+        async with factory() as db:
+            yield db
+
+    app.dependency_overrides[get_session] = override_get_session
+    yield
+    app.dependency_overrides.pop(get_session, None)
+
+
+def test_async_session_pagination_and_export(async_history_db):
+    with TestClient(app) as async_client:
+        body = async_client.get("/api/v1/history/London", params={"limit": 2}).json()
+        assert [item["temperature"] for item in body["items"]] == [2.0, 1.0]
+
+        response = async_client.get("/api/v1/history/London/export")
+        assert [
+            json.loads(line)["temperature"] for line in response.text.splitlines()
+        ] == [
+            2.0,
+            1.0,
+            0.0,
+        ]
+
+
+def test_non_db_routes_do_not_open_sessions(mocker):
+    session_factory = mocker.patch("apps.weather_service.db.session.SessionLocal")
+    mocker.patch(
+        "libs.utils.upstream.fetch_weather_async",
+        mocker.AsyncMock(
+            return_value={"weather": [{"main": "Clear"}], "main": {"temp": 20}}
+        ),
+    )
+
+    assert client.get("/decision?city=London").status_code == 200
+    session_factory.assert_not_called()
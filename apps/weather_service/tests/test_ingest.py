@@ -0,0 +1,116 @@
+import gzip
+import json
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select
+
+from apps.weather_service.db import ingest
+from libs.models.weather_model import WeatherData
+
+
+def payload(name, temp, main="Clear", dt=1_700_000_000):
+    return {
+        "name": name,
+        "dt": dt,
+        "main": {"temp": temp, "feels_like": temp - 1},
+        "weather": [{"main": main, "description": main.lower()}],
+    }
+
+
+def stored_rows(engine):
+    with engine.connect() as connection:
+        return connection.execute(
+            select(
+                WeatherData.city, WeatherData.temperature, WeatherData.condition
+            ).order_by(WeatherData.id)
+        ).all()
+
+
+@pytest.fixture
+def jsonl_dump(tmp_path):
+    lines = [
+        json.dumps(payload("London", float(i), dt=1_700_000_000 + i)) for i in range(5)
+    ]
+    lines.insert(2, "{not json")
+    lines.append(json.dumps({"city": "Paris", "payload": payload(None, 20.0, "Rain")}))
+    path = tmp_path / "dump.jsonl.gz"
+    with gzip.open(path, "wt") as handle:
+        handle.write("\n".join(lines) + "\n")
+    return path
+
+
+def test_ingest_jsonl_skips_bad_lines(sqlite_engine, jsonl_dump):
+    result = ingest.ingest(sqlite_engine, jsonl_dump, batch_rows=2)
+
+    assert (result["rows"], result["skipped"]) == (6, 1)
+    rows = stored_rows(sqlite_engine)
+    assert rows[0] == ("london", 0.0, "Clear")
+    assert rows[-1] == ("paris", 20.0, "Rain")
+
+
+def test_resume_after_interruption(sqlite_engine, jsonl_dump, tmp_path, mocker):
+    checkpoint = tmp_path / "dump.ckpt"
+    write_batch = ingest.write_batch
+    calls = []
+
+    def fail_second_batch(engine, rows):
+        calls.append(len(rows))
+        if len(calls) == 2:
+            raise RuntimeError("connection lost")
+        write_batch(engine, rows)
+
+    mocker.patch.object(ingest, "write_batch", side_effect=fail_second_batch)
+    with pytest.raises(RuntimeError):
+        ingest.ingest(sqlite_engine, jsonl_dump, batch_rows=2, checkpoint=checkpoint)
+    assert json.loads(checkpoint.read_text())["rows"] == 2
+
+    result = ingest.ingest(
+        sqlite_engine, jsonl_dump, batch_rows=2, checkpoint=checkpoint, resume=True
+    )
+    assert (result["written"], result["rows"], result["skipped"]) == (4, 6, 1)
+    assert [row.temperature for row in stored_rows(sqlite_engine)] == [
+        0.0,
+        1.0,
+        2.0,
+        3.0,
+        4.0,
+        20.0,
+    ]
+
+    with pytest.raises(ValueError):
+        ingest.read_checkpoint(checkpoint, tmp_path / "other.jsonl")
+
+
+def test_ingest_flat_csv(sqlite_engine, tmp_path):
+    path = tmp_path / "dump.csv"
+    path.write_text(
+        "city,temp,feels_like,main,description,dt\n"
+        "Oslo,-3.5,-7,Snow,light snow,1700000000\n"
+        "Bergen,not-a-number,,Rain,rain,1700000100\n"
+        'Rome,18,17,Clear,"clear, sunny",\n'
+    )
+    checkpoint = tmp_path / "csv.ckpt"
+    result = ingest.ingest(sqlite_engine, path, batch_rows=1, checkpoint=checkpoint)
+
+    assert (result["rows"], result["skipped"]) == (2, 1)
+    assert stored_rows(sqlite_engine) == [
+        ("oslo", -3.5, "Snow"),
+        ("rome", 18.0, "Clear"),
+    ]
+    # Resuming a finished file writes nothing more
+    assert (
+        ingest.ingest(sqlite_engine, path, checkpoint=checkpoint, resume=True)[
+            "written"
+        ]
+        == 0
+    )
+
+
+def test_copy_csv_keeps_empty_strings_distinct_from_null():
+    row = ingest.row_from_payload(
+        payload("Oslo", 1.0, dt=None), None, datetime(2026, 1, 1)
+    )
+    row.update(description="", feels_like=None)
+
+    assert ingest.copy_csv([row]) == '"oslo",1.0,,"Clear","",,"2026-01-01T00:00:00"\n'
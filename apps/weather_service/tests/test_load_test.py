@@ -0,0 +1,59 @@
+from collections import Counter
+
+from benchmarks.load_test import parse_args, percentile, summarize
+
+
+def test_percentile_nearest_rank():
+    values = [float(i) for i in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 95) == 95.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([], 50) == 0.0
+
+
+def test_summarize_reports_throughput_and_statuses():
+    summary = summarize(
+        [0.01, 0.02, 0.03, 0.04], Counter({"200": 3, "500": 1}), elapsed=2.0
+    )
+    assert summary["requests"] == 4
+    assert summary["ok"] == 3
+    assert summary["throughput_rps"] == 2.0
+    assert summary["latency_ms"]["p50"] == 20.0
+    assert summary["latency_ms"]["max"] == 40.0
+
+
+def test_parse_args_splits_targets_and_levels():
+    args = parse_args(["--targets", "weather,decision", "--concurrency", "2,4"])
+    assert args.targets == ["weather", "decision"]
+    assert args.concurrency == [2, 4]
+
+
+def test_startup_summary_uses_medians():
+    from benchmarks.startup import METRICS
+    from benchmarks.startup import summarize as summarize_startup
+
+    samples = [
+        {
+            **{metric: seconds for metric in METRICS},
+            "heavy_modules": ["sqlalchemy"],
+            "first_status": 200,
+        }
+        for seconds in (0.1, 0.3, 0.2)
+    ]
+    summary = summarize_startup(samples)
+    assert summary["import"] == {"median_ms": 200.0, "max_ms": 300.0}
+    assert summary["heavy_modules"] == ["sqlalchemy"]
+
+
+def test_app_import_does_not_load_numpy():
+    import subprocess
+    import sys
+
+    code = (
+        "import sys, apps.weather_service.main, apps.ai_service.ml_main; "
+        "print('numpy' in sys.modules)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == "False"
@@ -0,0 +1,81 @@
+import asyncio
+import io
+import logging
+import queue
+
+import httpx
+
+from libs.utils import api_client
+from libs.utils.logger import BatchingQueueListener, DroppingQueueHandler, get_logger
+
+
+class CountingStream(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, text):
+        self.writes += 1
+        return super().write(text)
+
+
+def make_record(message, *args):
+    return logging.LogRecord("test", logging.INFO, __file__, 1, message, args, None)
+
+
+def test_full_queue_drops_and_counts():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=2))
+    for i in range(5):
+        handler.handle(make_record("message %d", i))
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+
+
+def test_arguments_bound_before_enqueue():
+    handler = DroppingQueueHandler(queue.Queue())
+    values = ["before"]
+    handler.handle(make_record("value %s", values))
+    values.append("after")
+    assert handler.queue.get_nowait().getMessage() == "value ['before']"
+
+
+def test_listener_writes_in_batches():
+    log_queue = queue.Queue()
+    for i in range(10):
+        log_queue.put(make_record("line %d", i))
+    stream = CountingStream()
+    listener = BatchingQueueListener(
+        log_queue, logging.Formatter("%(message)s"), stream, batch_size=4
+    )
+    listener.start()
+    listener.stop()
+
+    assert stream.getvalue().splitlines() == [f"line {i}" for i in range(10)]
+    assert stream.writes <= 3
+
+
+def test_handlers_live_on_root_only():
+    first = get_logger("libs.utils.example")
+    get_logger("libs.utils.example")
+    assert first.handlers == []
+    assert (
+        sum(getattr(h, "_weather_handler", False) for h in logging.getLogger().handlers)
+        == 1
+    )
+
+
+def test_api_key_is_not_logged(caplog):
+    weather_client = api_client.WeatherClient(
+        async_transport=httpx.MockTransport(
+            lambda request: httpx.Response(200, json={})
+        )
+    )
+
+    async def run():
+        await weather_client.fetch_async("super-secret-key", "London")
+        await weather_client.aclose()
+
+    with caplog.at_level(logging.DEBUG):
+        asyncio.run(run())
+    assert "London" in caplog.text
+    assert "super-secret-key" not in caplog.text
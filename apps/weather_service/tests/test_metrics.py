@@ -0,0 +1,119 @@
+import asyncio
+
+import httpx
+from fastapi.testclient import TestClient
+
+from apps.ai_service.ml_main import app as ai_app
+from apps.weather_service.main import app
+from libs.utils import api_client, upstream
+from libs.utils.metrics import (
+    UPSTREAM_RESPONSES,
+    CallbackMetric,
+    Counter,
+    Histogram,
+    Registry,
+)
+
+client = TestClient(app)
+ai_client = TestClient(ai_app)
+
+PAYLOAD = {
+    "weather": [{"main": "Clear", "description": "clear sky"}],
+    "main": {"temp": 20},
+}
+
+
+def sample(text, line_prefix):
+    for line in text.splitlines():
+        if line.startswith(line_prefix):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    latency = registry.register(
+        Histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+    )
+    child = latency.labels("/a")
+    for value in (0.05, 0.5, 0.5, 5.0):
+        child.observe(value)
+
+    text = registry.render()
+    assert '# TYPE latency_seconds histogram' in text
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{route="/a",le="1.0"} 3' in text
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 4' in text
+    assert 'latency_seconds_count{route="/a"} 4' in text
+    assert sample(text, 'latency_seconds_sum{route="/a"}') == 6.05
+
+
+def test_counter_children_are_cached_and_labels_escaped():
+    registry = Registry()
+    errors = registry.register(Counter("errors_total", "Errors.", ("kind",)))
+    assert errors.labels('bad "quote"') is errors.labels('bad "quote"')
+    errors.labels('bad "quote"').inc(2)
+    assert 'errors_total{kind="bad \\"quote\\""} 2' in registry.render()
+
+
+def test_failing_callback_is_omitted():
+    registry = Registry()
+
+    def broken():
+        raise RuntimeError("no pool")
+
+    registry.register(CallbackMetric("pool", "Pool.", broken))
+    assert registry.render().strip() == ""
+
+
+def test_upstream_status_counted():
+    weather_client = api_client.WeatherClient(
+        async_transport=httpx.MockTransport(lambda request: httpx.Response(404))
+    )
+    before = UPSTREAM_RESPONSES.labels(404).value
+
+    async def run():
+        try:
+            await weather_client.fetch_async("key", "Atlantis")
+        except httpx.HTTPStatusError:
+            pass
+        await weather_client.aclose()
+
+    asyncio.run(run())
+    assert UPSTREAM_RESPONSES.labels(404).value == before + 1
+
+
+def test_metrics_endpoints_expose_routes_and_stages(mocker):
+    mocker.patch.object(
+        upstream, "fetch_weather_async", mocker.AsyncMock(return_value=PAYLOAD)
+    )
+
+    assert client.get("/decision?city=London").status_code == 200
+    assert ai_client.get("/api/v1/ml-decision?city=London").status_code == 200
+
+    text = client.get("/metrics").text
+    assert (
+        sample(
+            text, 'http_request_duration_seconds_count{method="GET",route="/decision"}'
+        )
+        >= 1
+    )
+    assert (
+        sample(
+            text,
+            "http_request_duration_seconds_count"
+            '{method="GET",route="/api/v1/ml-decision"}',
+        )
+        >= 1
+    )
+    for stage in ("parse", "decision", "serialization"):
+        assert (
+            sample(text, f'request_stage_duration_seconds_count{{stage="{stage}"}}')
+            >= 1
+        )
+    assert 'threadpool_threads{state="limit"}' in text
+    assert 'weather_cache_entries{state="capacity"}' in text
+    assert 'db_pool_connections{state="size"}' in text
+
+    response = ai_client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain")
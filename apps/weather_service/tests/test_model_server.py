@@ -0,0 +1,190 @@
+import asyncio
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from apps.ai_service.ml_main import app as ai_app
+from libs.utils import model_server, upstream
+from libs.utils.ml_processor import make_decision_async
+from libs.utils.model_registry import ModelRegistry
+
+PAYLOAD = {
+    "weather": [{"main": "Clear", "description": "clear sky"}],
+    "main": {"temp": 20},
+}
+
+
+class CountingModel:
+    """Stand-in classifier: go out unless the bad-weather flag is set."""
+
+    classes_ = np.array([0, 1])
+
+    def __init__(self):
+        self.calls = []
+
+    def predict_proba(self, matrix):
+        self.calls.append(len(matrix))
+        go_out = np.where(matrix[:, 1] == 0, 0.9, 0.1)
+        return np.column_stack([1 - go_out, go_out])
+
+
+@pytest.fixture
+def trained_model_path(tmp_path):
+    sklearn_linear = pytest.importorskip("sklearn.linear_model")
+    joblib = pytest.importorskip("joblib")
+    features = np.array(
+        [[t, bad] for t in range(-10, 35, 5) for bad in (0, 1)], dtype=float
+    )
+    labels = ((features[:, 1] == 0) & (features[:, 0] >= 5)).astype(int)
+    model = sklearn_linear.LogisticRegression().fit(features, labels)
+    path = tmp_path / "model.joblib"
+    joblib.dump(model, path)
+    return str(path)
+
+
+def test_concurrent_requests_share_one_model_call():
+    model = CountingModel()
+    batcher = model_server.MicroBatcher(model, max_batch=64, max_wait=0.01)
+
+    async def run():
+        return await asyncio.gather(
+            *(batcher.predict([20.0, i % 2]) for i in range(10))
+        )
+
+    predictions = asyncio.run(run())
+    assert model.calls == [10]
+    assert predictions[0] == (pytest.approx(0.9), "static")
+    assert predictions[1][0] == pytest.approx(0.1)
+    assert batcher.stats()["mean_batch_size"] == 10
+
+
+def test_full_batch_flushes_without_waiting():
+    model = CountingModel()
+    batcher = model_server.MicroBatcher(model, max_batch=4, max_wait=10.0)
+
+    async def run():
+        return await asyncio.wait_for(
+            asyncio.gather(*(batcher.predict([20.0, 0]) for _ in range(8))), timeout=1.0
+        )
+
+    asyncio.run(run())
+    assert model.calls == [4, 4]
+
+
+def test_scoring_errors_reach_every_waiter():
+    class BrokenModel(CountingModel):
+        def predict_proba(self, matrix):
+            raise RuntimeError("bad model")
+
+    batcher = model_server.MicroBatcher(BrokenModel(), max_wait=0.001)
+
+    async def run():
+        return await asyncio.gather(
+            batcher.predict([1.0, 0]), batcher.predict([2.0, 0]), return_exceptions=True
+        )
+
+    assert all(isinstance(result, RuntimeError) for result in asyncio.run(run()))
+
+
+def test_positive_column_requires_known_label():
+    class Labelled(CountingModel):
+        classes_ = np.array(["No", "Yes"])
+
+    assert model_server.positive_column(Labelled()) == 1
+    with pytest.raises(ValueError):
+        model_server.positive_column(type("M", (), {"classes_": ["a", "b"]})())
+
+
+def test_rules_without_model(mocker):
+    mocker.patch.object(model_server, "_server", None)
+    assert asyncio.run(make_decision_async(np.array([25.0, 1]))) == ("No", "rules")
+    assert asyncio.run(make_decision_async(np.array([-10.0, 0]))) == ("Yes", "rules")
+
+
+def test_endpoint_uses_loaded_model(mocker, trained_model_path):
+    mocker.patch.object(model_server.settings, "ML_MODEL_PATH", trained_model_path)
+    mocker.patch.object(
+        upstream,
+        "fetch_weather_async",
+        mocker.AsyncMock(return_value={**PAYLOAD, "main": {"temp": -8}}),
+    )
+    with TestClient(ai_app) as client:
+        assert client.get("/api/v1/ml-model").json()["mode"] == "model"
+        # The rules only look at the condition; the trained model also finds
+        # -8°C too cold.
+        response = client.get("/api/v1/ml-decision?city=Oslo")
+        assert response.json()["decision"] == "No"
+        assert response.headers["X-Model-Version"] == "model.joblib"
+        batch = client.post(
+            "/api/v1/ml-decision/batch", json={"cities": ["Oslo", "Bergen"]}
+        ).json()
+        assert [item["decision"] for item in batch["results"]] == ["No", "No"]
+    assert model_server.get_model_server() is None
+
+
+def test_unloadable_model_falls_back_to_rules(mocker, tmp_path):
+    path = tmp_path / "broken.joblib"
+    path.write_bytes(b"not a model")
+    mocker.patch.object(model_server.settings, "ML_MODEL_PATH", str(path))
+    assert model_server.start_model_server() is None
+    assert model_server.get_model_server() is None
+
+
+class ConstantModel:
+    classes_ = np.array([0, 1])
+
+    def __init__(self, probability):
+        self.probability = probability
+
+    def predict_proba(self, matrix):
+        return np.tile([1 - self.probability, self.probability], (len(matrix), 1))
+
+
+def test_registry_publish_and_mmap_load(tmp_path, trained_model_path):
+    joblib = pytest.importorskip("joblib")
+    registry = ModelRegistry(tmp_path / "models")
+    assert registry.current_version() is None
+
+    registry.publish(joblib.load(trained_model_path), "v1")
+    registry.publish(ConstantModel(0.2), "v2", activate=False)
+    assert registry.versions() == ["v1", "v2"]
+    assert registry.current_version() == "v1"
+
+    model = registry.load("v1")
+    assert isinstance(model.coef_, np.memmap)
+    with pytest.raises(FileExistsError):
+        registry.publish(ConstantModel(0.2), "v1")
+
+
+def test_watcher_swaps_between_batches(tmp_path):
+    registry = ModelRegistry(tmp_path)
+    registry.publish(ConstantModel(0.9), "v1")
+    batcher = model_server.MicroBatcher(
+        registry.load("v1"), version="v1", max_wait=0.001
+    )
+    watcher = model_server.ModelWatcher(registry, batcher)
+
+    async def run():
+        before = await batcher.predict([1.0, 0])
+        assert not await watcher.check()
+        registry.publish(ConstantModel(0.1), "v2")
+        in_flight = asyncio.ensure_future(batcher.predict([1.0, 0]))
+        await asyncio.sleep(0)
+        assert await watcher.check()
+        return before, await in_flight, await batcher.predict([1.0, 0])
+
+    before, _, after = asyncio.run(run())
+    assert before == (pytest.approx(0.9), "v1")
+    assert after == (pytest.approx(0.1), "v2")
+
+
+def test_watcher_keeps_serving_when_new_version_is_broken(tmp_path):
+    registry = ModelRegistry(tmp_path)
+    registry.publish(ConstantModel(0.9), "v1")
+    registry.publish(object(), "v2")
+    batcher = model_server.MicroBatcher(ConstantModel(0.9), version="v1")
+    watcher = model_server.ModelWatcher(registry, batcher)
+
+    assert not asyncio.run(watcher.check())
+    assert batcher.version == "v1"
@@ -0,0 +1,78 @@
+from fastapi.testclient import TestClient
+
+from apps.weather_service.main import app
+from libs.models.observation import WeatherObservation
+from libs.models.weather_model import WeatherData
+from libs.utils.ml_processor import make_decision, preprocess_weather_data
+from libs.utils.weather_logic import process_weather_decision
+
+client = TestClient(app)
+
+PAYLOAD = {
+    "dt": 1700000000,
+    "weather": [{"main": "Rain", "description": "light rain"}],
+    "main": {"temp": 12.5, "feels_like": 11.0},
+}
+
+
+def test_from_payload():
+    observation = WeatherObservation.from_payload(PAYLOAD, "London")
+    assert observation.city == "London"
+    assert observation.temperature == 12.5
+    assert observation.feels_like == 11.0
+    assert observation.condition == "Rain"
+    assert observation.description == "light rain"
+    assert observation.observed_at == 1700000000
+    assert observation.is_bad_weather
+    assert not hasattr(observation, "__dict__")
+
+
+def test_from_payload_tolerates_missing_fields():
+    observation = WeatherObservation.from_payload({}, "London")
+    assert observation.temperature is None
+    assert observation.condition == ""
+    assert process_weather_decision(observation)["decision"] == "Yes"
+
+
+def test_both_decision_paths_share_observation():
+    observation = WeatherObservation.from_payload(PAYLOAD, "London")
+    assert process_weather_decision(observation) == {
+        "decision": "No",
+        "reason": "The weather in London is rain, not ideal to go out.",
+    }
+    features = preprocess_weather_data(observation)
+    assert list(features) == [12.5, 1]
+    assert make_decision(features) == "No"
+
+
+def test_cold_weather_decision():
+    observation = WeatherObservation("Oslo", -3.0, -8.0, "Clear")
+    decision = process_weather_decision(observation)
+    assert decision["decision"] == "No"
+    assert "too cold" in decision["reason"]
+
+
+def test_weather_data_from_observation():
+    row = WeatherData.from_observation(
+        WeatherObservation.from_payload(PAYLOAD, "London")
+    )
+    assert (row.city, row.temperature, row.condition) == ("london", 12.5, "Rain")
+    assert row.observed_at == 1700000000
+
+
+def test_get_weather_makes_one_upstream_call(mocker):
+    fetch = mocker.patch(
+        "libs.utils.upstream.fetch_weather_async",
+        mocker.AsyncMock(return_value=PAYLOAD),
+    )
+
+    response = client.get("/api/v1/weather?city=London")
+    assert response.status_code == 200
+    assert response.json() == {
+        "temperature": 12.5,
+        "condition": "Rain",
+        "description": "Light rain",
+        "decision": "No",
+        "advice": "The weather in London is rain, not ideal to go out.",
+    }
+    assert fetch.await_count == 1
@@ -0,0 +1,129 @@
+import asyncio
+import marshal
+
+import pytest
+from fastapi.testclient import TestClient
+
+from apps.ai_service.ml_main import app as ai_app
+from apps.weather_service.main import app
+from libs.utils import upstream
+from libs.utils.metrics import server_timing_header
+from libs.utils.profiling import RequestProfiler, profiler
+from libs.utils.responses import rendered_responses
+
+client = TestClient(app)
+ai_client = TestClient(ai_app)
+
+PAYLOAD = {
+    "weather": [{"main": "Clear", "description": "clear sky"}],
+    "main": {"temp": 20},
+}
+
+
+@pytest.fixture
+def fake_upstream(mocker):
+    return mocker.patch.object(
+        upstream, "fetch_weather_async", mocker.AsyncMock(return_value=PAYLOAD)
+    )
+
+
+ADMIN = {"X-Admin-Token": "secret"}
+
+
+@pytest.fixture
+def enabled_profiler(mocker):
+    mocker.patch.object(profiler, "enabled", True)
+    mocker.patch.object(profiler, "token", "secret")
+    profiler.reset()
+    yield profiler
+    profiler.reset()
+
+
+def test_server_timing_header_format():
+    header = server_timing_header({"upstream": 0.0123, "parse": 0.0001}, 0.015)
+    assert header == "upstream;dur=12.30, parse;dur=0.10, total;dur=15.00"
+
+
+def test_server_timing_lists_request_stages(fake_upstream):
+    rendered_responses.clear()  # A cached body skips the decision and serialization
+    response = client.get("/decision?city=London")
+    assert response.status_code == 200
+    stages = [
+        entry.split(";")[0] for entry in response.headers["Server-Timing"].split(", ")
+    ]
+    assert {"parse", "decision", "serialization"} <= set(stages)
+    assert stages[-1] == "total"
+
+    response = ai_client.get("/api/v1/ml-decision?city=London")
+    assert "decision;dur=" in response.headers["Server-Timing"]
+
+
+def test_sampling_and_debug_header():
+    sampled = RequestProfiler(enabled=True, sample_rate=0.5, rng=lambda: 0.4)
+    assert sampled.wanted({})
+    assert not RequestProfiler(enabled=True, sample_rate=0.5, rng=lambda: 0.6).wanted(
+        {}
+    )
+    assert not RequestProfiler(enabled=False, sample_rate=1.0).wanted({})
+
+    guarded = RequestProfiler(enabled=True, header="X-Debug-Profile", token="secret")
+    assert guarded.wanted({"x-debug-profile": "secret"})
+    assert not guarded.wanted({"x-debug-profile": "guess"})
+    assert not guarded.wanted({"x-debug-profile": "sécret"})
+    # Without a token the header is ignored
+    assert not RequestProfiler(enabled=True).wanted({"x-debug-profile": "1"})
+
+
+def test_concurrent_profiles_are_skipped():
+    profiled = RequestProfiler(enabled=True)
+
+    async def inner():
+        return "inner"
+
+    async def outer():
+        return await profiled.run(inner)
+
+    assert asyncio.run(profiled.run(outer)) == "inner"
+    assert profiled.profiled == 1
+    assert profiled.skipped == 1
+
+
+def test_debug_header_profile_is_downloadable(fake_upstream, enabled_profiler):
+    assert client.get("/admin/profile", headers=ADMIN).status_code == 404
+
+    for _ in range(2):
+        client.get("/decision?city=London", headers={"X-Debug-Profile": "secret"})
+    client.get("/decision?city=London")
+    assert client.get("/admin/profile/stats", headers=ADMIN).json()["profiled"] == 2
+
+    response = client.get("/admin/profile", headers=ADMIN)
+    assert response.status_code == 200
+    stats = marshal.loads(response.content)
+    assert any(function == "weather_decision" for _, _, function in stats)
+
+    params = {"format": "text", "sort": "tottime"}
+    text = client.get("/admin/profile", params=params, headers=ADMIN).text
+    assert "function calls" in text
+
+    assert client.delete("/admin/profile", headers=ADMIN).json()["profiled"] == 0
+
+
+def test_admin_token_required(mocker):
+    mocker.patch.object(profiler, "token", "secret")
+    assert client.get("/admin/profile/stats").status_code == 403
+    assert client.get("/admin/profile/stats", headers=ADMIN).status_code == 200
+    # Header bytes outside ASCII are refused, not a server error
+    non_ascii = {"X-Admin-Token": "s\xe9cret".encode("latin-1")}
+    assert client.get("/admin/profile/stats", headers=non_ascii).status_code == 403
+
+
+def test_admin_endpoints_closed_without_token(mocker):
+    mocker.patch.object(profiler, "token", None)
+    for app_client in (client, ai_client):
+        assert app_client.get("/admin/profile/stats").status_code == 404
+        assert (
+            app_client.delete(
+                "/admin/profile", headers={"X-Admin-Token": ""}
+            ).status_code
+            == 404
+        )
@@ -0,0 +1,125 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from apps.weather_service.main import app
+from libs.utils import api_client, upstream
+from libs.utils.quota import Priority, QuotaExceeded, QuotaScheduler, upstream_priority
+
+client = TestClient(app)
+
+
+def test_low_priority_calls_leave_reserve_for_interactive(clock):
+    quota = QuotaScheduler(calls_per_minute=10, low_priority_reserve=0.2, clock=clock)
+
+    for _ in range(8):
+        quota.acquire_sync("key", Priority.BACKGROUND)
+    with pytest.raises(QuotaExceeded):
+        quota.acquire_sync("key", Priority.BACKGROUND)
+
+    # The reserved 20% is still there for interactive calls
+    quota.acquire_sync("key", Priority.INTERACTIVE)
+    quota.acquire_sync("key", Priority.INTERACTIVE)
+    assert quota.stats()["keys"]["...key"]["minute_remaining"] == 0
+    assert quota.stats()["shed"] == 1
+
+
+def test_budgets_are_per_key_and_refill(clock):
+    quota = QuotaScheduler(
+        calls_per_minute=1, max_wait={Priority.INTERACTIVE: 0.0}, clock=clock
+    )
+
+    quota.acquire_sync("a")
+    quota.acquire_sync("b")
+    with pytest.raises(QuotaExceeded) as excinfo:
+        quota.acquire_sync("a")
+    assert excinfo.value.retry_after == pytest.approx(60.0)
+
+    clock.now = 60.0
+    quota.acquire_sync("a")
+
+
+def test_day_budget_limits_all_priorities(clock):
+    quota = QuotaScheduler(
+        calls_per_minute=100,
+        calls_per_day=2,
+        max_wait={Priority.INTERACTIVE: 0.0},
+        clock=clock,
+    )
+    quota.acquire_sync("key")
+    quota.acquire_sync("key")
+    with pytest.raises(QuotaExceeded):
+        quota.acquire_sync("key")
+    # The minute token of the rejected call was returned
+    assert quota.stats()["keys"]["...key"]["minute_remaining"] == 98
+
+
+def test_waiters_are_served_in_priority_order():
+    quota = QuotaScheduler(
+        calls_per_minute=600,
+        low_priority_reserve=0.0,
+        max_wait={Priority.BATCH: 5.0, Priority.INTERACTIVE: 5.0},
+    )
+    order = []
+
+    async def call(name, priority):
+        await quota.acquire("key", priority)
+        order.append(name)
+
+    async def run():
+        quota._buckets("key")[0].drain()
+        batch = asyncio.create_task(call("batch", Priority.BATCH))
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(call("interactive", Priority.INTERACTIVE))
+        await asyncio.sleep(0)
+        assert quota.stats()["queue_depth"] == 2
+        await asyncio.gather(batch, interactive)
+
+    asyncio.run(run())
+    assert order == ["interactive", "batch"]
+    assert quota.stats()["queue_depth"] == 0
+
+
+def test_priority_follows_context(clock):
+    quota = QuotaScheduler(calls_per_minute=10, clock=clock)
+    for _ in range(8):
+        quota.acquire_sync("key")
+
+    with upstream_priority(Priority.BACKGROUND):
+        with pytest.raises(QuotaExceeded):
+            asyncio.run(quota.acquire("key"))
+    asyncio.run(quota.acquire("key"))
+
+
+def test_quota_exhaustion_returns_429(mocker):
+    mocker.patch.object(
+        upstream.upstream_quota,
+        "acquire",
+        side_effect=QuotaExceeded("exhausted", 12.5),
+    )
+    mocker.patch.object(upstream, "_read_through", None)
+    upstream.weather_cache.clear()
+
+    response = client.get("/decision", params={"city": "Quotaville"})
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "13"
+
+
+def test_upstream_429_drains_budget(mocker):
+    request = httpx.Request("GET", api_client.BASE_URL)
+    mocker.patch.object(
+        api_client.WeatherClient,
+        "fetch_async",
+        side_effect=httpx.HTTPStatusError(
+            "too many", request=request, response=httpx.Response(429, request=request)
+        ),
+    )
+    mocker.patch.object(upstream, "_read_through", None)
+    penalize = mocker.patch.object(upstream.upstream_quota, "penalize")
+    upstream.weather_cache.clear()
+
+    response = client.get("/api/v1/weather", params={"city": "Ratelimitburg"})
+    assert response.status_code == 429
+    penalize.assert_called_once()
@@ -0,0 +1,89 @@
+import asyncio
+
+from sqlalchemy import create_engine, func, select
+
+from apps.weather_service.db.recorder import ObservationRecorder
+from libs.models.observation import WeatherObservation
+from libs.models.weather_model import WeatherData
+from libs.utils import api_client, upstream
+from libs.utils.cache import TTLCache
+
+
+def count_rows(engine):
+    with engine.connect() as connection:
+        return connection.execute(
+            select(func.count()).select_from(WeatherData)
+        ).scalar()
+
+
+def observation(city="London", temperature=10.0):
+    return WeatherObservation(city, temperature, temperature, "Clear")
+
+
+def test_flush_writes_buffered_rows_in_batches(sqlite_engine):
+    recorder = ObservationRecorder(sqlite_engine, batch_size=3)
+    for i in range(7):
+        recorder.record(observation(temperature=float(i)))
+
+    assert count_rows(sqlite_engine) == 0
+    assert recorder.flush() == 7
+    assert count_rows(sqlite_engine) == 7
+    assert recorder.stats()["queued"] == 0
+
+
+def test_overflow_drops_oldest(sqlite_engine):
+    recorder = ObservationRecorder(sqlite_engine, max_queue=2)
+    for city in ("A", "B", "C"):
+        recorder.record(observation(city=city))
+    recorder.flush()
+
+    with sqlite_engine.connect() as connection:
+        cities = connection.execute(select(WeatherData.city)).scalars().all()
+    assert sorted(cities) == ["b", "c"]
+    assert recorder.stats()["dropped"] == 1
+
+
+def test_background_thread_flushes_on_size_and_stop(sqlite_engine):
+    recorder = ObservationRecorder(sqlite_engine, batch_size=2, flush_interval=60)
+    recorder.start()
+    recorder.record(observation())
+    recorder.record(observation())
+    recorder.record(observation())
+    recorder.stop()
+
+    assert count_rows(sqlite_engine) == 3
+
+
+def test_failed_flush_is_counted_not_raised():
+    recorder = ObservationRecorder(create_engine("sqlite://"))
+    recorder.record(observation())
+    assert recorder.flush() == 0
+    assert recorder.stats()["failed"] == 1
+
+
+def test_observation_without_temperature_is_skipped(sqlite_engine):
+    recorder = ObservationRecorder(sqlite_engine)
+    recorder.record(WeatherObservation("London", None, None, "Clear"))
+    recorder.record(observation())
+
+    assert recorder.flush() == 1
+    assert recorder.stats()["skipped"] == 1
+
+
+def test_upstream_fetches_notify_listeners_once(mocker):
+    mocker.patch.object(upstream, "weather_cache", TTLCache())
+    mocker.patch.object(
+        api_client.WeatherClient,
+        "fetch_async",
+        return_value={"weather": [{"main": "Clear"}], "main": {"temp": 20}},
+    )
+    seen = []
+    upstream.add_observation_listener(seen.append)
+    try:
+        asyncio.run(upstream.fetch_weather_async("key", "London"))
+        # Cache hit, not recorded again
+        asyncio.run(upstream.fetch_weather_async("key", "London"))
+    finally:
+        upstream.remove_observation_listener(seen.append)
+
+    assert [o.city for o in seen] == ["London"]
@@ -0,0 +1,136 @@
+import asyncio
+import threading
+
+from libs.utils import api_client, upstream
+from libs.utils.cache import TTLCache
+from libs.utils.quota import Priority, current_priority
+from libs.utils.refresh import RefreshScheduler
+from libs.utils.upstream import loader_for_key
+
+
+def test_stale_value_served_while_refreshing_async(clock):
+    cache = TTLCache(ttl=60, stale_ttl=30, clock=clock)
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return len(calls)
+
+    async def run():
+        assert await cache.get_or_load_async("k", loader) == 1
+        clock.now = 70  # expired, inside the grace window
+        stale = await asyncio.gather(
+            *(cache.get_or_load_async("k", loader) for _ in range(5))
+        )
+        await asyncio.sleep(0.05)  # let the background refresh finish
+        return stale, await cache.get_or_load_async("k", loader)
+
+    stale, refreshed = asyncio.run(run())
+    assert stale == [1] * 5
+    assert refreshed == 2
+    assert len(calls) == 2
+    assert cache.stats()["stale_hits"] == 5
+    assert cache.stats()["refreshes"] == 1
+
+
+def test_stale_value_served_while_refreshing_sync(clock):
+    cache = TTLCache(ttl=60, stale_ttl=30, clock=clock)
+    refreshed = threading.Event()
+
+    def loader():
+        refreshed.set()
+        return "new"
+
+    cache.set("k", "old")
+    clock.now = 70
+    assert cache.get_or_load("k", loader) == "old"
+    assert refreshed.wait(1)
+
+
+def test_entries_past_grace_window_are_reloaded(clock):
+    cache = TTLCache(ttl=60, stale_ttl=30, clock=clock)
+    cache.set("k", "old")
+    clock.now = 100
+    assert cache.get_or_load("k", lambda: "new") == "new"
+
+
+def test_scheduler_refreshes_hot_keys_within_budget(clock):
+    cache = TTLCache(ttl=60, clock=clock)
+    refreshed = []
+
+    def loader_factory(key):
+        async def load():
+            refreshed.append(key)
+            return key
+
+        return load
+
+    async def run():
+        for key, hits in (("london", 5), ("paris", 3), ("rome", 1)):
+            for _ in range(hits):
+                await cache.get_or_load_async(key, loader_factory(key))
+        refreshed.clear()
+
+        scheduler = RefreshScheduler(
+            cache,
+            loader_factory,
+            top_n=2,
+            interval=60,
+            refresh_ahead=10,
+            budget_per_minute=1,
+        )
+        assert await scheduler.run_once() == 0  # nothing close to expiry yet
+
+        clock.now = 55
+        assert await scheduler.run_once() == 1  # budget allows only one
+        return scheduler
+
+    scheduler = asyncio.run(run())
+    assert refreshed == ["london"]
+    assert scheduler.stats()["skipped_for_budget"] == 1
+    assert cache.expires_in("london") == 60
+
+
+def test_scheduled_reloads_skip_read_through(mocker):
+    read_through = mocker.Mock(return_value={"main": {"temp": 1}})
+    mocker.patch.object(upstream, "_read_through", read_through)
+    fetch = mocker.patch.object(
+        api_client.WeatherClient,
+        "fetch_async",
+        mocker.AsyncMock(return_value={"main": {"temp": 2}}),
+    )
+
+    payload = asyncio.run(loader_for_key("key", "london")())
+    assert payload == {"main": {"temp": 2}}
+    assert not read_through.called and fetch.call_count == 1
+
+
+def test_stale_reloads_run_at_background_priority(mocker, clock):
+    cache = TTLCache(ttl=60, stale_ttl=30, clock=clock)
+    mocker.patch.object(upstream, "weather_cache", cache)
+    mocker.patch.object(upstream, "_read_through", None)
+    mocker.patch.object(
+        api_client.WeatherClient,
+        "fetch_async",
+        mocker.AsyncMock(return_value={"main": {"temp": 2}}),
+    )
+    seen = []
+
+    async def acquire(api_key):
+        seen.append(current_priority.get())
+
+    mocker.patch.object(upstream.upstream_quota, "acquire", side_effect=acquire)
+
+    async def run():
+        cache.set("london", {"main": {"temp": 1}})
+        clock.now = 70
+        stale = await upstream.fetch_weather_async("key", "London")
+        await asyncio.gather(*cache._background)
+        await upstream.fetch_weather_async("key", "Paris")
+        return stale
+
+    assert asyncio.run(run()) == {"main": {"temp": 1}}
+    assert cache.get("london") == {"main": {"temp": 2}}
+    # The reload waits as background work; the miss that follows does not
+    assert seen == [Priority.BACKGROUND, Priority.INTERACTIVE]
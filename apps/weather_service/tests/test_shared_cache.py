@@ -0,0 +1,95 @@
+import asyncio
+import multiprocessing
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from apps.weather_service.main import app
+from libs.utils import upstream
+from libs.utils.cache import TTLCache
+from libs.utils.shared_cache import RECORD_HEADER, SharedCache
+
+
+def write_entries(path, count):
+    store = SharedCache(path, slots=16, record_size=256)
+    for i in range(count):
+        # Each value is self-consistent so a torn read would be detectable
+        store.set("london", {"seq": i, "check": [i] * (i % 20)})
+    store.close()
+
+
+def test_entries_written_by_another_process_are_visible(tmp_path):
+    path = tmp_path / "weather.cache"
+    reader = SharedCache(path, slots=16, record_size=256)
+    process = multiprocessing.get_context("fork").Process(
+        target=write_entries, args=(path, 2000)
+    )
+    process.start()
+    seen = set()
+    while process.is_alive():
+        entry = reader.get("london")
+        if entry is not None:
+            value, age = entry
+            assert value["check"] == [value["seq"]] * (value["seq"] % 20)
+            seen.add(value["seq"])
+    process.join()
+
+    value, age = reader.get("london")
+    assert value["seq"] == 1999 and 0 <= age < 60
+    assert reader.get("paris") is None
+    assert seen
+
+
+def test_torn_records_are_misses(tmp_path):
+    store = SharedCache(tmp_path / "weather.cache", slots=8, record_size=128)
+    store.set("oslo", {"temp": 1})
+    assert store.set("oslo", {"blob": "x" * 200}) is False
+    slot = next(s for s in range(8) if store._read_slot(s) is not None)
+    store._map[store._offset(slot) + RECORD_HEADER.size + 6] ^= 0xFF
+
+    assert store.get("oslo") is None
+    assert store.stats()["torn_reads"] == 1 and store.stats()["oversize"] == 1
+
+
+def test_geometry_mismatch_is_rejected(tmp_path):
+    SharedCache(tmp_path / "weather.cache", slots=8, record_size=128).close()
+    with pytest.raises(ValueError):
+        SharedCache(tmp_path / "weather.cache", slots=16, record_size=128)
+
+
+def test_ttl_caches_share_loads_and_keep_entry_age(tmp_path):
+    path = tmp_path / "weather.cache"
+    first = TTLCache(ttl=60, shared=SharedCache(path, slots=8, record_size=512))
+    second = TTLCache(ttl=60, shared=SharedCache(path, slots=8, record_size=512))
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        return {"temp": 12}
+
+    first.get_or_load("london", lambda: {"temp": 10})
+    second.shared.set("paris", {"temp": 20}, stored_at=time.time() - 50)
+
+    assert second.get_or_load("london", lambda: calls.append(1)) == {"temp": 10}
+    assert asyncio.run(first.get_or_load_async("paris", loader)) == {"temp": 20}
+    assert first.expires_in("paris") == pytest.approx(10, abs=1)
+    assert not calls and second.stats()["shared_hits"] == 1
+    # Too old to be fresh anywhere: load and publish
+    second.shared.set("rome", {"temp": 30}, stored_at=time.time() - 120)
+    assert asyncio.run(second.get_or_load_async("rome", loader)) == {"temp": 12}
+    assert first.shared.get("rome")[0] == {"temp": 12}
+
+
+def test_lifespan_attaches_configured_cache(mocker, tmp_path):
+    mocker.patch.object(
+        upstream.settings,
+        "WEATHER_SHARED_CACHE_PATH",
+        str(tmp_path / "weather.cache"),
+    )
+    mocker.patch.object(upstream.settings, "WEATHER_SHARED_CACHE_SLOTS", 8)
+    mocker.patch.object(upstream, "weather_cache", TTLCache())
+
+    with TestClient(app):
+        assert isinstance(upstream.weather_cache.shared, SharedCache)
+    assert upstream.weather_cache.shared is None
@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy import insert
+
+from libs.models.observation import WeatherObservation
+from libs.models.weather_model import WeatherData
+from libs.utils import training_set
+from libs.utils.ml_processor import preprocess_weather_data
+
+BASE_TIME = datetime(2026, 1, 1, 0, 0, 0)
+CONDITIONS = ("Clear", "Rain", "Snow", "Clouds", "Tornado")
+
+
+@pytest.fixture
+def weather_rows(sqlite_engine):
+    rows = [
+        {
+            "city": "london",
+            "temperature": float(2 * i),
+            "feels_like": None if i % 3 == 0 else float(2 * i - 1),
+            "condition": CONDITIONS[i % len(CONDITIONS)],
+            "observed_at": None if i == 4 else 1_700_000_000 + i,
+            "created_at": BASE_TIME + timedelta(hours=i),
+        }
+        for i in range(7)
+    ]
+    with sqlite_engine.begin() as connection:
+        connection.execute(insert(WeatherData), rows)
+    return rows
+
+
+def test_chunks_match_preprocess_weather_data(sqlite_engine, weather_rows, tmp_path):
+    output = tmp_path / "set"
+    manifest = training_set.build_training_set(sqlite_engine, output, chunk_rows=3)
+
+    assert [shard["rows"] for shard in manifest["shards"]] == [3, 3, 1]
+    assert manifest["rows"] == 7 and manifest["last_id"] == 7
+    loaded = training_set.load_training_set(output, training_set.COLUMNS)
+
+    expected = np.array(
+        [
+            preprocess_weather_data(
+                WeatherObservation(
+                    row["city"], row["temperature"], row["feels_like"], row["condition"]
+                )
+            )
+            for row in weather_rows
+        ]
+    )
+    np.testing.assert_array_equal(loaded["features"], expected)
+    assert loaded["id"].tolist() == list(range(1, 8))
+    assert loaded["observed_at"][4] == -1
+    # Rules: too cold, rain, snow, then mild clouds/tornado/clear, then rain
+    assert loaded["label"].tolist() == [0, 0, 0, 1, 1, 1, 0]
+
+
+def test_after_id_and_empty_sets(sqlite_engine, weather_rows, tmp_path):
+    manifest = training_set.build_training_set(
+        sqlite_engine, tmp_path / "tail", after_id=5
+    )
+    assert manifest["rows"] == 2
+    assert training_set.load_training_set(tmp_path / "tail")["label"].tolist() == [1, 0]
+
+    empty = training_set.build_training_set(
+        sqlite_engine, tmp_path / "empty", after_id=7
+    )
+    assert empty["rows"] == 0 and empty["last_id"] == 7
+    assert training_set.load_training_set(tmp_path / "empty")["features"].shape == (
+        0,
+        2,
+    )
+
+    with pytest.raises(FileExistsError):
+        training_set.build_training_set(sqlite_engine, tmp_path / "tail")
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["empty", "tail"]
@@ -1,47 +1,49 @@
 import os
+
+import httpx
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy.orm import Session
+
+from apps.weather_service.core.config import settings
 from apps.weather_service.main import app
-from libs.utils.weather_logic import health_check_db, health_check_weather_api
+from benchmarks.fake_openweather import create_app as create_fake_upstream
+from benchmarks.fake_openweather import fake_payload
+from libs.utils import api_client, upstream
 
 # Initialize TestClient for FastAPI app
 client = TestClient(app)
 
-# Mock Environment Variables
-API_KEY = "test_api_key"  # Replace with a valid test API key for integration tests
-os.environ["OPENWEATHER_API_KEY"] = API_KEY
 
+@pytest.fixture(autouse=True)
+def no_read_through(mocker):
+    """Keep lookups away from the database and start from an empty cache."""
+    mocker.patch.object(upstream, "_read_through", None)
+    upstream.weather_cache.clear()
 
-# Helper function to mock database session
-@pytest.fixture
-def mock_session():
-    from sqlalchemy import create_engine
-    from sqlalchemy.orm import sessionmaker
-    from apps.weather_service.db.models import Base
 
-    # In-memory SQLite database for testing
-    engine = create_engine("sqlite:///:memory:")
-    Base.metadata.create_all(bind=engine)
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    db = SessionLocal()
-    yield db
-    db.close()
+def mock_upstream(mocker, **kwargs):
+    """
+    Patch the fetch path to return a fixed payload (or raise).
+    """
+    return mocker.patch.object(
+        upstream, "fetch_weather_async", mocker.AsyncMock(**kwargs)
+    )
 
 
 ### UNIT TESTS ###
 
+
 def test_should_go_out_success(mocker):
     """
-    Test should_go_out with a mock API response.
+    Test /decision with a mock API response.
     """
     mock_response = {
         "weather": [{"main": "Clear"}],
         "main": {"temp": 20, "feels_like": 18},
     }
-    mocker.patch("libs.utils.api_client.fetch_weather", return_value=mock_response)
+    mock_upstream(mocker, return_value=mock_response)
 
-    response = client.get("/api/v1/decision?city=London")
+    response = client.get("/decision?city=London")
     assert response.status_code == 200
     assert response.json() == {
         "decision": "Yes",
@@ -51,15 +53,15 @@ def test_should_go_out_success(mocker):
 
 def test_should_go_out_bad_weather(mocker):
     """
-    Test should_go_out with bad weather conditions.
+    Test /decision with bad weather conditions.
     """
     mock_response = {
         "weather": [{"main": "Rain"}],
         "main": {"temp": 15, "feels_like": 13},
     }
-    mocker.patch("libs.utils.api_client.fetch_weather", return_value=mock_response)
+    mock_upstream(mocker, return_value=mock_response)
 
-    response = client.get("/api/v1/decision?city=London")
+    response = client.get("/decision?city=London")
     assert response.status_code == 200
     assert response.json() == {
         "decision": "No",
@@ -69,75 +71,78 @@ def test_should_go_out_bad_weather(mocker):
 
 def test_should_go_out_missing_api_key(mocker):
     """
-    Test should_go_out when API key is missing.
+    Test /decision when API key is missing.
     """
-    mocker.patch.dict(os.environ, {"OPENWEATHER_API_KEY": ""})
+    mocker.patch.object(settings, "OPENWEATHER_API_KEY", "")
 
-    response = client.get("/api/v1/decision?city=London")
+    response = client.get("/decision?city=London")
     assert response.status_code == 500
-    assert response.json()["detail"] == "API key is not configured or missing."
+    assert response.json()["error"] == "API key is not configured"
 
 
 def test_should_go_out_api_error(mocker):
     """
-    Test should_go_out when API fetch fails.
+    Test /decision when API fetch fails.
     """
-    mocker.patch("libs.utils.api_client.fetch_weather", side_effect=Exception("API error"))
+    mock_upstream(mocker, side_effect=Exception("API error"))
 
-    response = client.get("/api/v1/decision?city=London")
+    response = client.get("/decision?city=London")
     assert response.status_code == 500
-    assert "Error fetching or processing weather data" in response.json()["detail"]
-
+    assert response.json()["error"] == "Failed to process weather data"
 
-### INTEGRATION TESTS ###
 
-def test_integration_should_go_out():
+def test_missing_temperature_is_reported_as_null(mocker):
     """
-    Integration test for should_go_out with live API.
+    Test /api/v1/weather when upstream omits the temperature.
     """
-    response = client.get(f"/api/v1/decision?city=London")
-    assert response.status_code == 200
-    assert "decision" in response.json()
-    assert "reason" in response.json()
+    mock_upstream(mocker, return_value={"weather": [{"main": "Clear"}], "main": {}})
 
+    response = client.get("/api/v1/weather?city=London")
+    assert response.status_code == 200
+    assert response.json()["temperature"] is None
 
-### HEALTH CHECK TESTS ###
 
-def test_health_check_db(mock_session):
+def test_endpoints_against_fake_upstream(mocker):
     """
-    Test database health check.
+    Run the real fetch path against the local stand-in OpenWeather server.
     """
-    health_status = health_check_db(mock_session)
-    assert health_status["status"] == "Healthy"
-    assert health_status["service"] == "Database"
+    fake = create_fake_upstream(latency_ms=0, jitter_ms=0, seed=0)
+    weather_client = api_client.WeatherClient(
+        base_url="http://fake/data/2.5/weather",
+        async_transport=httpx.ASGITransport(app=fake),
+    )
+    mocker.patch.object(upstream, "get_client", return_value=weather_client)
 
+    response = client.get("/api/v1/weather?city=Lisbon")
+    assert response.status_code == 200
+    expected = fake_payload("Lisbon")
+    assert response.json()["temperature"] == expected["main"]["temp"]
+    assert response.json()["condition"] == expected["weather"][0]["main"]
 
-def test_health_check_weather_api_success():
-    """
-    Test weather API health check with a valid API key.
-    """
-    health_status = health_check_weather_api(API_KEY)
-    assert health_status["status"] == "Healthy"
-    assert health_status["service"] == "OpenWeather API"
+    # Served from the cache: the fake upstream is only called once
+    assert client.get("/decision?city=lisbon").status_code == 200
+    assert fake.state.counts[200] == 1
 
 
-def test_health_check_weather_api_failure(mocker):
-    """
-    Test weather API health check when the API key is invalid.
-    """
-    mocker.patch("requests.get", return_value=type("MockResponse", (), {"status_code": 401, "json": lambda: {"message": "Invalid API key"}})())
-    health_status = health_check_weather_api("invalid_key")
-    assert health_status["status"] == "Unhealthy"
-    assert health_status["service"] == "OpenWeather API"
-    assert "Invalid API key" in health_status["error"]
+def test_fake_upstream_injects_errors():
+    fake = create_fake_upstream(latency_ms=0, jitter_ms=0, error_rate=1.0, seed=0)
+    response = TestClient(fake).get("/data/2.5/weather", params={"q": "Oslo"})
+    assert response.status_code == 500
+
+
+### INTEGRATION TESTS ###
 
 
-def test_health_check_weather_api_connection_error(mocker):
+@pytest.mark.skipif(
+    not os.environ.get("OPENWEATHER_LIVE_TESTS"),
+    reason="Set OPENWEATHER_LIVE_TESTS=1 and a real OPENWEATHER_API_KEY "
+    "to call the live API.",
+)
+def test_integration_should_go_out():
     """
-    Test weather API health check when there's a connection error.
+    Integration test for /decision with live API.
     """
-    mocker.patch("requests.get", side_effect=Exception("Connection error"))
-    health_status = health_check_weather_api(API_KEY)
-    assert health_status["status"] == "Unhealthy"
-    assert health_status["service"] == "OpenWeather API"
-    assert "Connection error" in health_status["error"]
+    response = client.get("/decision?city=London")
+    assert response.status_code == 200
+    assert "decision" in response.json()
+    assert "reason" in response.json()
@@ -0,0 +1,93 @@
+"""
+Compare the vectorized decision engine against the per-row scalar path.
+
+Usage:
+    python -m benchmarks.bench_decision_engine --rows 100000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from libs.models.observation import BAD_WEATHER_CONDITIONS, WeatherObservation
+from libs.utils.decision_engine import (
+    COLD_THRESHOLD,
+    CONDITIONS,
+    REASON_BAD_WEATHER,
+    REASON_CLEAR,
+    REASON_FEELS_COLD,
+    REASON_TOO_COLD,
+    decide_batch,
+    observations_to_arrays,
+)
+from libs.utils.weather_logic import process_weather_decision
+
+
+def scalar_rules(temperature: float, feels_like: float, condition: str) -> int:
+    """Pure-Python reference for the rules, one row at a time."""
+    if condition in BAD_WEATHER_CONDITIONS:
+        return REASON_BAD_WEATHER
+    if temperature < COLD_THRESHOLD:
+        return REASON_TOO_COLD
+    if feels_like < COLD_THRESHOLD:
+        return REASON_FEELS_COLD
+    return REASON_CLEAR
+
+
+def timed(label: str, rows: int, func):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed * 1000:10.2f} ms  {rows / elapsed:14,.0f} rows/s")
+    return result, elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    temperature = rng.uniform(-20, 40, args.rows)
+    feels_like = temperature - rng.uniform(0, 6, args.rows)
+    codes = rng.integers(1, len(CONDITIONS), args.rows).astype(np.int8)
+    conditions = [CONDITIONS[code] for code in codes]
+    observations = [
+        WeatherObservation("City", float(t), float(f), c)
+        for t, f, c in zip(temperature, feels_like, conditions)
+    ]
+
+    print(f"rows={args.rows}")
+    scalar, scalar_time = timed(
+        "scalar rules (python loop)",
+        args.rows,
+        lambda: [
+            scalar_rules(t, f, c)
+            for t, f, c in zip(temperature.tolist(), feels_like.tolist(), conditions)
+        ],
+    )
+    (_, reasons), vector_time = timed(
+        "decide_batch (arrays)",
+        args.rows,
+        lambda: decide_batch(temperature, feels_like, codes),
+    )
+    timed(
+        "decide_batch (observations)",
+        args.rows,
+        lambda: decide_batch(*observations_to_arrays(observations)),
+    )
+    wrapper_rows = min(args.rows, 10_000)
+    timed(
+        "process_weather_decision",
+        wrapper_rows,
+        lambda: [process_weather_decision(o) for o in observations[:wrapper_rows]],
+    )
+
+    assert reasons.tolist() == scalar, "vectorized and scalar results differ"
+    print(f"speedup (arrays vs scalar): {scalar_time / vector_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Local stand-in for the OpenWeather current-weather endpoint, for load tests.
+
+Answers ``GET /data/2.5/weather?q=<city>`` (or ``?lat=<lat>&lon=<lon>``)
+with a deterministic payload per city or point after an injected delay, and
+fails a configurable share of requests with 500 or 429 responses.
+
+Usage:
+    python -m benchmarks.fake_openweather --port 9001 --latency-ms 80 --error-rate 0.01
+
+Then start the services with
+``OPENWEATHER_BASE_URL=http://127.0.0.1:9001/data/2.5/weather``.
+"""
+
+import argparse
+import asyncio
+import random
+import zlib
+from collections import Counter
+from typing import Dict, Optional
+
+from fastapi import FastAPI, Query
+from fastapi.responses import JSONResponse
+
+CONDITIONS = ("Clear", "Clouds", "Rain", "Snow", "Mist", "Drizzle")
+
+
+def fake_payload(city: str) -> Dict:
+    """
+    Build a stable OpenWeather-shaped payload for ``city``.
+
+    The same city always gets the same weather, so service responses are
+    comparable between runs.
+    """
+    seed = zlib.crc32(city.strip().casefold().encode())
+    temperature = round(-10 + (seed % 400) / 10, 1)
+    condition = CONDITIONS[seed % len(CONDITIONS)]
+    return {
+        "name": city,
+        "dt": 1_700_000_000 + seed % 86_400,
+        "weather": [{"main": condition, "description": condition.lower()}],
+        "main": {"temp": temperature, "feels_like": round(temperature - 1.5, 1)},
+    }
+
+
+def fake_coords_payload(lat: float, lon: float) -> Dict:
+    """
+    Build a stable OpenWeather-shaped payload for a point, named after it.
+    """
+    payload = fake_payload(f"{lat:.4f},{lon:.4f}")
+    payload["coord"] = {"lat": lat, "lon": lon}
+    return payload
+
+
+def create_app(
+    latency_ms: float = 50.0,
+    jitter_ms: float = 10.0,
+    error_rate: float = 0.0,
+    rate_limit_rate: float = 0.0,
+    seed: Optional[int] = None,
+) -> FastAPI:
+    """
+    Create the fake upstream application.
+
+    Args:
+        latency_ms (float): Mean response delay in milliseconds.
+        jitter_ms (float): Standard deviation of the delay in milliseconds.
+        error_rate (float): Share of requests answered with 500.
+        rate_limit_rate (float): Share of requests answered with 429.
+        seed (int): Seed for reproducible delays and failures.
+
+    Returns:
+        FastAPI: The application; ``app.state.counts`` tallies responses by status.
+    """
+    app = FastAPI()
+    rng = random.Random(seed)
+    app.state.counts = Counter()
+
+    @app.get("/data/2.5/weather")
+    async def weather(
+        q: Optional[str] = Query(None, min_length=1),
+        lat: Optional[float] = Query(None, ge=-90, le=90),
+        lon: Optional[float] = Query(None, ge=-180, le=180),
+        appid: str = Query(""),
+        units: str = Query("metric"),
+    ):
+        if q is None and (lat is None or lon is None):
+            # What OpenWeather answers without a city or a full point
+            app.state.counts[400] += 1
+            return JSONResponse(
+                {"cod": "400", "message": "Nothing to geocode"}, status_code=400
+            )
+
+        delay = max(0.0, rng.gauss(latency_ms, jitter_ms)) / 1000.0
+        if delay:
+            await asyncio.sleep(delay)
+
+        roll = rng.random()
+        if roll < error_rate:
+            app.state.counts[500] += 1
+            return JSONResponse(
+                {"cod": 500, "message": "injected error"}, status_code=500
+            )
+        if roll < error_rate + rate_limit_rate:
+            app.state.counts[429] += 1
+            return JSONResponse(
+                {"cod": 429, "message": "injected rate limit"}, status_code=429
+            )
+        app.state.counts[200] += 1
+        return fake_payload(q) if q is not None else fake_coords_payload(lat, lon)
+
+    @app.get("/stats")
+    async def stats():
+        return {str(status): count for status, count in app.state.counts.items()}
+
+    return app
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9001)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    app = create_app(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        seed=args.seed,
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+"""
+End-to-end load test for the weather and AI services.
+
+Drives ``/decision``, ``/api/v1/weather`` and ``/api/v1/ml-decision`` at
+each requested concurrency level for a fixed duration, and reports
+throughput and p50/p95/p99 latency. Results are written as JSON so runs can
+be compared between commits.
+
+With ``--spawn`` the script starts the fake upstream
+(:mod:`benchmarks.fake_openweather`) and both services itself, configured
+so that only the code under test limits throughput (no quota, no recorder,
+no database read-through).
+
+Usage:
+    python -m benchmarks.load_test --spawn --concurrency 1,16,64 --duration 10
+    python -m benchmarks.load_test --spawn --compare benchmarks/results/<old>.json
+    python -m benchmarks.load_test --weather-url http://127.0.0.1:8000 \\
+        --ai-url http://127.0.0.1:8001 --targets weather
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import httpx
+
+# target name -> (service, path)
+TARGETS = {
+    "decision": ("weather", "/decision"),
+    "weather": ("weather", "/api/v1/weather"),
+    "ml-decision": ("ai", "/api/v1/ml-decision"),
+}
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def percentile(sorted_values: Sequence[float], percent: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted sequence (0.0 if empty).
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(percent / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies: List[float], statuses: Counter, elapsed: float) -> Dict:
+    """
+    Reduce raw samples to throughput, latency percentiles and status counts.
+
+    Args:
+        latencies (List[float]): Request latencies in seconds.
+        statuses (Counter): Count per HTTP status or error name.
+        elapsed (float): Wall-clock duration of the run in seconds.
+
+    Returns:
+        dict: Summary suitable for the JSON report.
+    """
+    ordered = sorted(latencies)
+    ok = sum(count for status, count in statuses.items() if status == "200")
+    return {
+        "requests": len(ordered),
+        "ok": ok,
+        "throughput_rps": round(len(ordered) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(ordered, 50) * 1000, 2),
+            "p95": round(percentile(ordered, 95) * 1000, 2),
+            "p99": round(percentile(ordered, 99) * 1000, 2),
+            "mean": round(sum(ordered) / len(ordered) * 1000, 2) if ordered else 0.0,
+            "max": round(ordered[-1] * 1000, 2) if ordered else 0.0,
+        },
+        "statuses": dict(statuses),
+    }
+
+
+async def run_level(
+    client: httpx.AsyncClient,
+    url: str,
+    concurrency: int,
+    duration: float,
+    cities: Iterator[str],
+) -> Dict:
+    """
+    Keep ``concurrency`` requests in flight against ``url`` for ``duration`` seconds.
+
+    Returns:
+        dict: See :func:`summarize`.
+    """
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    started = time.perf_counter()
+    stop_at = started + duration
+
+    async def worker() -> None:
+        while time.perf_counter() < stop_at:
+            request_started = time.perf_counter()
+            try:
+                response = await client.get(url, params={"city": next(cities)})
+                statuses[str(response.status_code)] += 1
+            except httpx.HTTPError as e:
+                statuses[type(e).__name__] += 1
+            latencies.append(time.perf_counter() - request_started)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, statuses, time.perf_counter() - started)
+
+
+def city_stream(pool_size: int) -> Iterator[str]:
+    """
+    Cycle through ``pool_size`` city names; 0 yields a unique name per
+    request so every call misses the cache.
+    """
+    if pool_size <= 0:
+        return (f"City{i}" for i in itertools.count())
+    return itertools.cycle([f"City{i}" for i in range(pool_size)])
+
+
+async def run_benchmark(args: argparse.Namespace) -> List[Dict]:
+    base_urls = {"weather": args.weather_url, "ai": args.ai_url}
+    limits = httpx.Limits(
+        max_connections=max(args.concurrency),
+        max_keepalive_connections=max(args.concurrency),
+    )
+    results = []
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        for target in args.targets:
+            service, path = TARGETS[target]
+            url = base_urls[service].rstrip("/") + path
+            for concurrency in args.concurrency:
+                cities = city_stream(args.cities)
+                if args.warmup > 0:
+                    await run_level(client, url, concurrency, args.warmup, cities)
+                summary = await run_level(
+                    client, url, concurrency, args.duration, cities
+                )
+                summary.update(target=target, concurrency=concurrency)
+                results.append(summary)
+                latency = summary["latency_ms"]
+                print(
+                    f"{target:<12} c={concurrency:<4} "
+                    f"{summary['throughput_rps']:>9.1f} req/s  "
+                    f"p50={latency['p50']:>8.2f}ms p95={latency['p95']:>8.2f}ms "
+                    f"p99={latency['p99']:>8.2f}ms  statuses={summary['statuses']}"
+                )
+    return results
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: List[Dict], baseline_path: Path) -> None:
+    """
+    Print throughput and latency changes against an earlier report.
+    """
+    baseline = {
+        (row["target"], row["concurrency"]): row
+        for row in json.loads(baseline_path.read_text())["results"]
+    }
+    print(f"\nchange vs {baseline_path}:")
+    for row in results:
+        old = baseline.get((row["target"], row["concurrency"]))
+        if old is None:
+            continue
+
+        def delta(new: float, before: float) -> str:
+            return f"{(new - before) / before * 100:+6.1f}%" if before else "   n/a"
+
+        print(
+            f"{row['target']:<12} c={row['concurrency']:<4} "
+            f"rps {delta(row['throughput_rps'], old['throughput_rps'])}  "
+            + "  ".join(
+                f"{p} {delta(row['latency_ms'][p], old['latency_ms'][p])}"
+                for p in ("p50", "p95", "p99")
+            )
+        )
+
+
+def wait_until_ready(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not become ready within {timeout}s")
+
+
+@contextmanager
+def spawned_stack(args: argparse.Namespace) -> Iterator[None]:
+    """
+    Start the fake upstream and both services as subprocesses.
+    """
+    upstream_port, weather_port, ai_port = (
+        args.base_port,
+        args.base_port + 1,
+        args.base_port + 2,
+    )
+    env = {
+        **os.environ,
+        "OPENWEATHER_BASE_URL": f"http://127.0.0.1:{upstream_port}/data/2.5/weather",
+        "OPENWEATHER_API_KEY": os.environ.get("OPENWEATHER_API_KEY", "benchmark"),
+        "DATABASE_URL": os.environ.get("DATABASE_URL", "sqlite:///./benchmark.db"),
+        "RECORDER_ENABLED": "false",
+        "DB_READ_THROUGH_MAX_AGE": "0",
+        "QUOTA_CALLS_PER_MINUTE": str(10**9),
+        "LOG_LEVEL": os.environ.get("LOG_LEVEL", "WARNING"),
+    }
+    commands = [
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.fake_openweather",
+            "--port",
+            str(upstream_port),
+            "--latency-ms",
+            str(args.upstream_latency_ms),
+            "--error-rate",
+            str(args.upstream_error_rate),
+            "--seed",
+            "0",
+        ],
+    ]
+    for module, port in (
+        ("apps.weather_service.main:app", weather_port),
+        ("apps.ai_service.ml_main:app", ai_port),
+    ):
+        commands.append(
+            [
+                sys.executable,
+                "-m",
+                "uvicorn",
+                module,
+                "--port",
+                str(port),
+                "--workers",
+                str(args.workers),
+                "--log-level",
+                "warning",
+            ]
+        )
+
+    processes = [subprocess.Popen(command, env=env) for command in commands]
+    try:
+        wait_until_ready(f"http://127.0.0.1:{upstream_port}/stats")
+        wait_until_ready(f"http://127.0.0.1:{weather_port}/openapi.json")
+        wait_until_ready(f"http://127.0.0.1:{ai_port}/openapi.json")
+        args.weather_url = f"http://127.0.0.1:{weather_port}"
+        args.ai_url = f"http://127.0.0.1:{ai_port}"
+        yield
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--weather-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--ai-url", default="http://127.0.0.1:8001")
+    parser.add_argument(
+        "--targets",
+        default=",".join(TARGETS),
+        help="Comma-separated: " + ", ".join(TARGETS),
+    )
+    parser.add_argument(
+        "--concurrency", default="1,8,32", help="Comma-separated concurrency levels"
+    )
+    parser.add_argument(
+        "--duration", type=float, default=10.0, help="Seconds per target and level"
+    )
+    parser.add_argument(
+        "--warmup", type=float, default=1.0, help="Unrecorded seconds before each level"
+    )
+    parser.add_argument(
+        "--cities",
+        type=int,
+        default=50,
+        help="Distinct cities to cycle (0 = always unique)",
+    )
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--output", type=Path, default=None, help="JSON report path")
+    parser.add_argument(
+        "--compare", type=Path, default=None, help="Earlier JSON report to diff against"
+    )
+    parser.add_argument(
+        "--spawn", action="store_true", help="Start fake upstream and services locally"
+    )
+    parser.add_argument("--base-port", type=int, default=9001)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--upstream-latency-ms", type=float, default=50.0)
+    parser.add_argument("--upstream-error-rate", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    args.targets = [
+        target.strip() for target in args.targets.split(",") if target.strip()
+    ]
+    unknown = set(args.targets) - set(TARGETS)
+    if unknown:
+        parser.error(f"unknown targets: {', '.join(sorted(unknown))}")
+    args.concurrency = [int(level) for level in args.concurrency.split(",")]
+    return args
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    args = parse_args(argv)
+    if args.spawn:
+        with spawned_stack(args):
+            results = asyncio.run(run_benchmark(args))
+    else:
+        results = asyncio.run(run_benchmark(args))
+
+    commit = git_commit()
+    report = {
+        "meta": {
+            "commit": commit,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": {
+                key: (str(value) if isinstance(value, Path) else value)
+                for key, value in vars(args).items()
+            },
+        },
+        "results": results,
+    }
+    output = args.output or RESULTS_DIR / (
+        f"{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}-{commit or 'unknown'}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nwrote {output}")
+
+    if args.compare is not None:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
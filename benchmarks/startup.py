@@ -0,0 +1,245 @@
+"""
+Cold-start benchmark for the weather and AI services.
+
+Each sample runs in a fresh interpreter and measures:
+
+- ``import``: importing the app module;
+- ``startup``: running the app lifespan;
+- ``first_request`` / ``second_request``: latency of the first two requests
+  (the first pays for lazily created clients and imports, and sent right
+  after startup it may wait on background warm-up imports);
+- ``first_response``: import start to first response, the number that
+  decides how quickly a new worker adds capacity;
+- ``process``: wall time of the whole child process, interpreter start-up
+  included.
+
+It also records which heavy modules the import pulled in. Requests go to a
+local fake upstream (:mod:`benchmarks.fake_openweather`) started by the
+script, and the recorder, refresh scheduler and database read-through are
+disabled.
+
+Usage:
+    python -m benchmarks.startup --repeat 5
+    python -m benchmarks.startup --apps ai \
+        --compare benchmarks/results/startup-<old>.json
+"""
+
+import argparse
+import importlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from benchmarks.load_test import RESULTS_DIR, git_commit, wait_until_ready
+
+# app name -> (module, attribute, request path)
+APPS = {
+    "weather": ("apps.weather_service.main", "app", "/decision"),
+    "ai": ("apps.ai_service.ml_main", "app", "/api/v1/ml-decision"),
+}
+HEAVY_MODULES = (
+    "numpy",
+    "pandas",
+    "sklearn",
+    "requests",
+    "sqlalchemy",
+    "pythonjsonlogger",
+)
+METRICS = (
+    "import",
+    "startup",
+    "first_request",
+    "second_request",
+    "first_response",
+    "process",
+)
+
+
+def measure_in_process(app_name: str) -> Dict:
+    """
+    Import, start and query one app in this (fresh) interpreter.
+
+    Returns:
+        dict: Durations in seconds plus the heavy modules loaded by the import.
+    """
+    module_name, attribute, path = APPS[app_name]
+    started = time.perf_counter()
+    app = getattr(importlib.import_module(module_name), attribute)
+    imported = time.perf_counter()
+    heavy = [name for name in HEAVY_MODULES if name in sys.modules]
+
+    from fastapi.testclient import TestClient
+
+    with TestClient(app) as client:
+        ready = time.perf_counter()
+        first = client.get(path, params={"city": "London"})
+        first_done = time.perf_counter()
+        client.get(path, params={"city": "Paris"})
+        second_done = time.perf_counter()
+
+    return {
+        "import": imported - started,
+        "startup": ready - imported,
+        "first_request": first_done - ready,
+        "second_request": second_done - first_done,
+        "first_response": first_done - started,
+        "first_status": first.status_code,
+        "heavy_modules": heavy,
+    }
+
+
+def child_env(upstream_port: int) -> Dict[str, str]:
+    return {
+        **os.environ,
+        "OPENWEATHER_BASE_URL": f"http://127.0.0.1:{upstream_port}/data/2.5/weather",
+        "OPENWEATHER_API_KEY": os.environ.get("OPENWEATHER_API_KEY", "benchmark"),
+        "DATABASE_URL": os.environ.get("DATABASE_URL", "sqlite:///./benchmark.db"),
+        "RECORDER_ENABLED": "false",
+        "REFRESH_ENABLED": "false",
+        "DB_READ_THROUGH_MAX_AGE": "0",
+        "LOG_LEVEL": os.environ.get("LOG_LEVEL", "WARNING"),
+    }
+
+
+def sample(app_name: str, env: Dict[str, str]) -> Dict:
+    """
+    Run :func:`measure_in_process` in a child interpreter.
+    """
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup", "--child", app_name],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result["process"] = time.perf_counter() - started
+    return result
+
+
+def summarize(samples: List[Dict]) -> Dict:
+    """
+    Median and max (in ms) of each metric over the samples.
+    """
+    summary = {}
+    for metric in METRICS:
+        values = [s[metric] * 1000 for s in samples]
+        summary[metric] = {
+            "median_ms": round(statistics.median(values), 2),
+            "max_ms": round(max(values), 2),
+        }
+    summary["heavy_modules"] = samples[0]["heavy_modules"]
+    summary["first_status"] = samples[0]["first_status"]
+    return summary
+
+
+def compare(results: Dict, baseline_path: Path) -> None:
+    baseline = json.loads(baseline_path.read_text())["results"]
+    print(f"\nchange vs {baseline_path}:")
+    for app_name, summary in results.items():
+        old = baseline.get(app_name)
+        if old is None:
+            continue
+        changes = []
+        for metric in METRICS:
+            if metric not in old:
+                continue
+            before, after = old[metric]["median_ms"], summary[metric]["median_ms"]
+            changes.append(
+                f"{metric} {(after - before) / before * 100:+.1f}%"
+                if before
+                else f"{metric} n/a"
+            )
+        print(f"{app_name:<8} " + "  ".join(changes))
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--apps", default=",".join(APPS), help="Comma-separated: " + ", ".join(APPS)
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh processes per app")
+    parser.add_argument("--upstream-port", type=int, default=9101)
+    parser.add_argument("--output", type=Path, default=None, help="JSON report path")
+    parser.add_argument(
+        "--compare", type=Path, default=None, help="Earlier JSON report to diff against"
+    )
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    args.apps = [name.strip() for name in args.apps.split(",") if name.strip()]
+    unknown = set(args.apps) - set(APPS)
+    if unknown:
+        parser.error(f"unknown apps: {', '.join(sorted(unknown))}")
+    return args
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    args = parse_args(argv)
+    if args.child:
+        print(json.dumps(measure_in_process(args.child)))
+        return
+
+    upstream = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.fake_openweather",
+            "--port",
+            str(args.upstream_port),
+            "--latency-ms",
+            "0",
+            "--seed",
+            "0",
+        ]
+    )
+    try:
+        wait_until_ready(f"http://127.0.0.1:{args.upstream_port}/stats")
+        env = child_env(args.upstream_port)
+        results = {}
+        for app_name in args.apps:
+            samples = [sample(app_name, env) for _ in range(args.repeat)]
+            results[app_name] = summary = summarize(samples)
+            print(
+                f"{app_name:<8} "
+                + "  ".join(
+                    f"{metric}={summary[metric]['median_ms']:.1f}ms"
+                    for metric in METRICS
+                )
+                + f"  heavy={','.join(summary['heavy_modules']) or '-'}"
+            )
+    finally:
+        upstream.terminate()
+        upstream.wait(timeout=10)
+
+    commit = git_commit()
+    report = {
+        "meta": {
+            "commit": commit,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    stamp = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}"
+    output = args.output or RESULTS_DIR / f"startup-{stamp}-{commit or 'unknown'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nwrote {output}")
+
+    if args.compare is not None:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+from typing import Any, Dict, Optional
+
+# Conditions considered unsuitable for going out, lower-cased.
+BAD_WEATHER_CONDITIONS = frozenset({"rain", "snow", "storm"})
+
+
+class WeatherObservation:
+    """
+    A single weather observation parsed once from an OpenWeather payload.
+
+    Shared by the rule-based and ML decision paths, the response models and
+    persistence, so the raw JSON is only walked once per request.
+
+    Attributes:
+        city (str): City the observation was requested for.
+        temperature (float | None): Temperature in °C.
+        feels_like (float | None): Feels-like temperature in °C.
+        condition (str): Main condition group, e.g. "Rain".
+        description (str): Human readable description, e.g. "light rain".
+        observed_at (int | None): Upstream observation time (``dt``, Unix seconds).
+    """
+
+    __slots__ = (
+        "city",
+        "temperature",
+        "feels_like",
+        "condition",
+        "description",
+        "observed_at",
+    )
+
+    def __init__(
+        self,
+        city: str,
+        temperature: Optional[float],
+        feels_like: Optional[float],
+        condition: str,
+        description: str = "",
+        observed_at: Optional[int] = None,
+    ) -> None:
+        self.city = city
+        self.temperature = temperature
+        self.feels_like = feels_like
+        self.condition = condition
+        self.description = description
+        self.observed_at = observed_at
+
+    @classmethod
+    def from_payload(cls, payload: Dict[str, Any], city: str) -> "WeatherObservation":
+        """
+        Parse an OpenWeather ``/weather`` response (metric units).
+
+        Args:
+            payload (dict): The raw weather data from the API.
+            city (str): The city the data was requested for.
+
+        Returns:
+            WeatherObservation: Parsed observation.
+
+        Raises:
+            ValueError: If the payload does not have the expected structure.
+        """
+        try:
+            main = payload.get("main") or {}
+            weather = (payload.get("weather") or [{}])[0]
+            temperature = main.get("temp")
+            feels_like = main.get("feels_like")
+            observed_at = payload.get("dt")
+            return cls(
+                city=city,
+                temperature=float(temperature) if temperature is not None else None,
+                feels_like=float(feels_like) if feels_like is not None else None,
+                condition=weather.get("main", ""),
+                description=weather.get("description", ""),
+                observed_at=int(observed_at) if observed_at is not None else None,
+            )
+        except (AttributeError, TypeError, ValueError) as e:
+            raise ValueError("Invalid weather data format") from e
+
+    @property
+    def is_bad_weather(self) -> bool:
+        """Whether the condition is one of :data:`BAD_WEATHER_CONDITIONS`."""
+        return self.condition.lower() in BAD_WEATHER_CONDITIONS
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, WeatherObservation):
+            return NotImplemented
+        return all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"<WeatherObservation(city={self.city}, temperature={self.temperature}, "
+            f"condition={self.condition}, observed_at={self.observed_at})>"
+        )
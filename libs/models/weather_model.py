@@ -1,20 +1,79 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, func
+from sqlalchemy import Column, DateTime, Float, Index, Integer, String, func
+
 from apps.weather_service.db.base import Base
+from libs.models.observation import WeatherObservation
+from libs.utils.cities import city_key
+
 
 class WeatherData(Base):
     """
     Model representing weather data for a city.
     Stores city name, temperature, condition, and timestamps.
+
+    ``city`` holds the normalized city key so lookups match regardless of
+    how the city was spelled in the request.
     """
+
     __tablename__ = "weather_data"
 
     id = Column(Integer, primary_key=True, index=True)
     city = Column(String(100), index=True, nullable=False)  # Max length of 100
     temperature = Column(Float, nullable=False)  # Ensure temperature is required
     condition = Column(String(50), nullable=False)  # Max length of 50
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    feels_like = Column(Float, nullable=True)
+    description = Column(String(100), nullable=True)
+    observed_at = Column(Integer, nullable=True)  # Upstream "dt", Unix seconds
+    created_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    __table_args__ = (
+        # Latest row per city is a single index seek
+        Index("ix_weather_data_city_created_at", city, created_at.desc()),
+        {"schema": "public"},
+    )
+
+    @staticmethod
+    def values_from_observation(observation: WeatherObservation) -> dict:
+        """
+        Column values for a parsed observation, for bulk inserts.
+
+        Raises:
+            ValueError: If the observation has no temperature; a stored row
+                would otherwise read as a real 0 °C measurement.
+        """
+        if observation.temperature is None:
+            raise ValueError("Observation has no temperature")
+        return {
+            "city": city_key(observation.city),
+            "temperature": observation.temperature,
+            "condition": observation.condition,
+            "feels_like": observation.feels_like,
+            "description": observation.description,
+            "observed_at": observation.observed_at,
+        }
+
+    @classmethod
+    def from_observation(cls, observation: WeatherObservation) -> "WeatherData":
+        """
+        Build a row from a parsed observation.
+        """
+        return cls(**cls.values_from_observation(observation))
+
+    def to_payload(self) -> dict:
+        """
+        Render the row in the shape of an OpenWeather ``/weather`` response,
+        so it can stand in for an upstream call.
+        """
+        return {
+            "name": self.city,
+            "dt": self.observed_at,
+            "main": {"temp": self.temperature, "feels_like": self.feels_like},
+            "weather": [
+                {"main": self.condition, "description": self.description or ""}
+            ],
+        }
+
     def __repr__(self) -> str:
         return f"<WeatherData(city={self.city}, temperature={self.temperature}, condition={self.condition})>"
-
@@ -1,56 +1,292 @@
-import requests
-from typing import Dict
+import asyncio
+import time
+from typing import Callable, Dict, Optional, Union
+
+import httpx
+
+from libs.utils.circuit import CircuitBreaker, CircuitOpen, LatencyWindow
 from libs.utils.logger import get_logger
-from apps.weather_service.core.config import settings
+from libs.utils.metrics import STAGE_UPSTREAM, UPSTREAM_RESPONSES
+from libs.utils.quota import QuotaExceeded
 
 logger = get_logger(__name__)
 
 BASE_URL = "http://api.openweathermap.org/data/2.5/weather"
 
 
-def fetch_weather(api_key: str, city: str) -> Dict:
+def upstream_status(error: Exception) -> Optional[int]:
+    """
+    Return the upstream HTTP status carried by a fetch error, if any.
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code
+    return None
+
+
+def _is_upstream_failure(error: Exception) -> bool:
     """
-    Fetch weather data for a given city from the OpenWeatherMap API.
+    Whether an error means upstream is unhealthy (network failure or 5xx),
+    as opposed to a client-side answer such as 404 or 429.
+    """
+    status_code = upstream_status(error)
+    if status_code is not None:
+        return status_code >= 500
+    return isinstance(error, httpx.RequestError)
+
+
+def _build_params(api_key: str, city: str) -> Dict:
+    """
+    Validate the city and build the query parameters for an upstream call.
 
     Args:
         api_key (str): API key for OpenWeatherMap.
         city (str): Name of the city.
 
     Returns:
-        Dict: Parsed JSON response from the API.
+        Dict: Query parameters for the weather endpoint.
 
     Raises:
         ValueError: If the city name is invalid.
-        HTTPError: If the API response contains an error.
-        RequestException: For other network-related issues.
     """
-
     if not city or not city.strip():
         logger.error("City name is required but was not provided.")
         raise ValueError("City name cannot be empty.")
 
-    params = {
+    logger.debug("Fetching weather data for city: %s", city)
+    return {
         "q": city,
         "appid": api_key,
         "units": "metric",  # Fetch temperature in Celsius
     }
 
-    try:
-        logger.info("Fetching weather data for city: %s", city)
-        logger.info("Using API key: %s", api_key)
-        response = requests.get(
-            BASE_URL, params=params, timeout=10
-        )  # Set timeout to 10 seconds
+
+class WeatherClient:
+    """
+    Long-lived client for the OpenWeatherMap API.
+
+    Holds a pooled ``httpx.AsyncClient``, so keep-alive connections are
+    reused across requests instead of being opened for every lookup.
+
+    With a ``breaker``, calls fail fast with :class:`CircuitOpen` while
+    upstream is failing or slow. With ``hedge_percentile`` set, an async call
+    that has not answered within that percentile of recent latencies sends a
+    second attempt and takes whichever answers first; ``hedge_admit`` (called
+    with the API key) can veto the extra call, e.g. when quota is short.
+    """
+
+    def __init__(
+        self,
+        base_url: str = BASE_URL,
+        pool_size: int = 20,
+        connect_timeout: float = 3.0,
+        read_timeout: float = 10.0,
+        async_transport: Optional[httpx.AsyncBaseTransport] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        hedge_percentile: Optional[float] = None,
+        hedge_min_delay: float = 0.05,
+        hedge_min_samples: int = 20,
+        hedge_admit: Optional[Callable[[str], bool]] = None,
+    ) -> None:
+        self.base_url = base_url
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.breaker = breaker
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_admit = hedge_admit
+        self.latencies = LatencyWindow()
+        self.hedged = 0
+        self.hedge_wins = 0
+
+        self._async_transport = async_transport
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        """
+        Return the async client bound to the running event loop.
+
+        httpx connections belong to the loop that opened them, so a new
+        client is created if the loop has changed (e.g. between test runs).
+        """
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            connect_timeout, read_timeout = self.timeout
+            self._async_client = httpx.AsyncClient(
+                timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+                limits=httpx.Limits(
+                    max_connections=self.pool_size,
+                    max_keepalive_connections=self.pool_size,
+                ),
+                transport=self._async_transport,
+            )
+            self._async_loop = loop
+        return self._async_client
+
+    def _record(self, success: bool, duration: float, status: Union[int, str]) -> None:
+        STAGE_UPSTREAM.observe(duration)
+        UPSTREAM_RESPONSES.labels(status).inc()
+        if success:
+            self.latencies.add(duration)
+        if self.breaker is not None:
+            self.breaker.record(success, duration)
+
+    @staticmethod
+    def _log_error(error: Exception) -> None:
+        if isinstance(error, httpx.HTTPStatusError):
+            logger.error("HTTP error occurred: %s", error)
+        elif isinstance(error, httpx.RequestError):
+            logger.error("Request exception occurred: %s", error)
+        else:
+            logger.error(
+                "Unexpected error occurred while fetching weather data: %s", error
+            )
+
+    def hedge_delay(self) -> Optional[float]:
+        """
+        Seconds to wait before sending a hedged attempt, or None if hedging
+        is off or there are too few latency samples yet.
+        """
+        if (
+            self.hedge_percentile is None
+            or len(self.latencies) < self.hedge_min_samples
+        ):
+            return None
+        return max(
+            self.hedge_min_delay, self.latencies.percentile(self.hedge_percentile)
+        )
+
+    async def _get_json(self, params: Dict) -> Dict:
+        response = await self._get_async_client().get(self.base_url, params=params)
         response.raise_for_status()
-        data = response.json()
-        logger.info("Weather data fetched successfully for city: %s", city)
-        return data
-    except requests.exceptions.HTTPError as http_err:
-        logger.error("HTTP error occurred: %s", http_err)
-        raise
-    except requests.exceptions.RequestException as req_err:
-        logger.error("Request exception occurred: %s", req_err)
-        raise
-    except Exception as e:
-        logger.error("Unexpected error occurred while fetching weather data: %s", e)
-        raise
+        return response.json()
+
+    async def _get_json_hedged(self, api_key: str, params: Dict) -> Dict:
+        """
+        Run one attempt, adding a second if the first is slower than the
+        hedge delay; the first success wins and the other is cancelled.
+        """
+        delay = self.hedge_delay()
+        if delay is None:
+            return await self._get_json(params)
+
+        first = asyncio.ensure_future(self._get_json(params))
+        pending = {first}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return first.result()
+            if self.hedge_admit is not None and not self.hedge_admit(api_key):
+                return await first
+            self.hedged += 1
+            pending.add(asyncio.ensure_future(self._get_json(params)))
+
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for attempt in done:
+                    if attempt.exception() is None:
+                        if attempt is not first:
+                            self.hedge_wins += 1
+                        return attempt.result()
+                    error = attempt.exception()
+            raise error
+        finally:
+            for attempt in pending:
+                attempt.cancel()
+
+    async def fetch_async(self, api_key: str, city: str) -> Dict:
+        """
+        Fetch weather data for a city without blocking the event loop.
+
+        Args:
+            api_key (str): API key for OpenWeatherMap.
+            city (str): Name of the city.
+
+        Returns:
+            Dict: Parsed JSON response from the API.
+
+        Raises:
+            ValueError: If the city name is invalid.
+            httpx.HTTPStatusError: If the API response contains an error.
+            httpx.RequestError: For other network-related issues.
+            CircuitOpen: If the circuit breaker is open.
+        """
+        return await self._fetch_params_async(
+            api_key, _build_params(api_key, city), city
+        )
+
+    async def fetch_coords_async(self, api_key: str, lat: float, lon: float) -> Dict:
+        """
+        Fetch weather data for a point without blocking the event loop.
+
+        Args:
+            api_key (str): API key for OpenWeatherMap.
+            lat (float): Latitude in degrees.
+            lon (float): Longitude in degrees.
+
+        Returns:
+            Dict: Parsed JSON response from the API.
+
+        Raises:
+            httpx.HTTPStatusError: If the API response contains an error.
+            httpx.RequestError: For other network-related issues.
+            CircuitOpen: If the circuit breaker is open.
+        """
+        params = {"lat": lat, "lon": lon, "appid": api_key, "units": "metric"}
+        return await self._fetch_params_async(api_key, params, f"{lat:.5f},{lon:.5f}")
+
+    async def _fetch_params_async(
+        self, api_key: str, params: Dict, location: str
+    ) -> Dict:
+        if self.breaker is not None:
+            self.breaker.before_call()
+
+        started = time.monotonic()
+        try:
+            data = await self._get_json_hedged(api_key, params)
+            self._record(True, time.monotonic() - started, 200)
+            logger.info("Weather data fetched successfully for %s", location)
+            return data
+        except Exception as e:
+            self._record(
+                not _is_upstream_failure(e),
+                time.monotonic() - started,
+                upstream_status(e) or type(e).__name__,
+            )
+            self._log_error(e)
+            raise
+
+    async def aclose(self) -> None:
+        """Close the async client."""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+            self._async_loop = None
+
+
+def describe_upstream_error(error: Exception) -> str:
+    """
+    Turn a fetch failure into a short, client-safe message.
+
+    Args:
+        error (Exception): Exception raised while fetching or parsing.
+
+    Returns:
+        str: Error message for per-item batch results.
+    """
+    if isinstance(error, QuotaExceeded):
+        return "Upstream quota exhausted; please retry later."
+    if isinstance(error, CircuitOpen):
+        return "Weather API is temporarily unavailable; please retry later."
+    status_code = upstream_status(error)
+    if status_code == 404:
+        return "City not found."
+    if status_code is not None:
+        return f"Weather API returned status {status_code}."
+    if isinstance(error, ValueError):
+        return str(error)
+    return "Failed to fetch weather data."
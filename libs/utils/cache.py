@@ -0,0 +1,474 @@
+import asyncio
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+)
+
+if TYPE_CHECKING:
+    from libs.utils.shared_cache import SharedCache
+
+_MISSING = object()
+
+
+class Aged(NamedTuple):
+    """
+    Loader result that is already ``age`` seconds old (e.g. a stored row).
+    The cache keeps it only for the rest of its TTL and returns ``value``.
+    """
+
+    value: Any
+    age: float
+
+
+def _unwrap(result: Any) -> Tuple[Any, float]:
+    if isinstance(result, Aged):
+        return result.value, max(0.0, result.age)
+    return result, 0.0
+
+
+def normalize_city(city: str) -> str:
+    """
+    Normalize a city name into a cache key.
+
+    Collapses whitespace and case so "London", "london " and "LONDON"
+    share one entry.
+
+    Args:
+        city (str): City name as received from the client.
+
+    Returns:
+        str: Normalized cache key.
+    """
+    return " ".join(city.split()).casefold()
+
+
+class _Flight:
+    """An in-progress synchronous load that other threads can wait on."""
+
+    __slots__ = ("event", "value", "error")
+
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class TTLCache:
+    """
+    Bounded, thread-safe LRU cache whose entries expire after a fixed TTL.
+
+    ``get_or_load`` and ``get_or_load_async`` coalesce concurrent misses for
+    the same key: only one loader runs, and every other caller waits for
+    its result (or its exception).
+
+    With ``stale_ttl`` > 0 they also serve stale-while-revalidate: for
+    ``stale_ttl`` seconds after an entry expires, the stale value is returned
+    immediately and a single background load refreshes it.
+
+    Loaders may return :class:`Aged` for values that are not new; their
+    expiry counts from when the value was produced, not when it was loaded.
+    A separate ``revalidate`` loader can be given for the background reloads
+    of stale entries, e.g. one that skips a warm tier the miss path reads.
+
+    With a ``shared`` :class:`~libs.utils.shared_cache.SharedCache` (string
+    keys, JSON values) the cache becomes the local tier of a host-wide one:
+    before running a loader, the leading caller takes the entry from the
+    shared store if it is fresher than the local one, and every loaded value
+    is published there for the other processes. A shared entry keeps its
+    original age, so it expires on the same schedule in every process.
+
+    Attributes:
+        hits (int): Lookups answered from the cache.
+        misses (int): Lookups that had to load the value.
+        stale_hits (int): Lookups answered with a stale value during the grace window.
+        refreshes (int): Background or scheduled loads of an existing key.
+        evictions (int): Entries dropped to stay within ``max_entries``.
+        expirations (int): Entries dropped because their TTL and grace window elapsed.
+        coalesced (int): Misses that waited on another caller's load.
+        shared_hits (int): Loads answered from the shared store instead of the loader.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: float = 120.0,
+        stale_ttl: float = 0.0,
+        clock: Callable[[], float] = time.monotonic,
+        shared: Optional["SharedCache"] = None,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._clock = clock
+        self.shared = shared
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._async_flights: Dict[Hashable, asyncio.Future] = {}
+        self._background: Set[asyncio.Task] = set()
+        self._requests: Counter = Counter()
+
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.refreshes = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.coalesced = 0
+        self.shared_hits = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _lookup(self, key: Hashable) -> Tuple[Any, bool]:
+        """
+        Return ``(value, is_stale)`` or ``(_MISSING, False)``.
+        Caller must hold the lock.
+        """
+        entry = self._data.get(key)
+        if entry is None:
+            return _MISSING, False
+        fresh_until, value = entry
+        now = self._clock()
+        if fresh_until <= now:
+            if now < fresh_until + self.stale_ttl:
+                self._data.move_to_end(key)
+                return value, True
+            del self._data[key]
+            self.expirations += 1
+            return _MISSING, False
+        self._data.move_to_end(key)
+        return value, False
+
+    def _store(
+        self, key: Hashable, value: Any, fresh_until: Optional[float] = None
+    ) -> None:
+        """
+        Insert a value and evict the least recently used.
+        Caller must hold the lock.
+        """
+        self._data[key] = (
+            self._clock() + self.ttl if fresh_until is None else fresh_until,
+            value,
+        )
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Return the fresh cached value for ``key``, or ``default`` if absent,
+        expired or only available as stale.
+        """
+        with self._lock:
+            value, stale = self._lookup(key)
+            if value is _MISSING or stale:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, age: float = 0.0) -> None:
+        """Store ``value`` under ``key``, fresh for the TTL less ``age`` seconds."""
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._store(key, value, self._clock() + self.ttl - age)
+
+    def clear(self) -> None:
+        """Drop all entries; counters are kept."""
+        with self._lock:
+            self._data.clear()
+            self._requests.clear()
+
+    def expires_in(self, key: Hashable) -> Optional[float]:
+        """
+        Seconds until ``key`` stops being fresh (negative once stale), or None.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            return None if entry is None else entry[0] - self._clock()
+
+    def hot_keys(self, count: int) -> List[Hashable]:
+        """
+        The ``count`` most requested keys since the last :meth:`decay`.
+        """
+        with self._lock:
+            return [key for key, _ in self._requests.most_common(count)]
+
+    def decay(self) -> None:
+        """
+        Halve request counts so popularity tracks recent traffic, and forget
+        keys that are no longer requested.
+        """
+        with self._lock:
+            self._decay_locked()
+
+    def _decay_locked(self) -> None:
+        for key in list(self._requests):
+            self._requests[key] //= 2
+            if not self._requests[key]:
+                del self._requests[key]
+
+    def _count_request(self, key: Hashable) -> None:
+        """Track popularity for :meth:`hot_keys`. Caller must hold the lock."""
+        self._requests[key] += 1
+        if len(self._requests) > 4 * self.max_entries:
+            self._decay_locked()
+
+    def _from_shared(self, key: Hashable) -> Any:
+        """
+        Take ``key`` from the shared store if it is fresher than the local
+        entry; ``_MISSING`` otherwise.
+        """
+        shared = self.shared
+        if shared is None or not isinstance(key, str) or self.ttl <= 0:
+            return _MISSING
+        try:
+            entry = shared.get(key)
+        except Exception:
+            return _MISSING  # The shared tier is an optimization; load instead
+        if entry is None:
+            return _MISSING
+        value, age = entry
+        with self._lock:
+            now = self._clock()
+            local = self._data.get(key)
+            if age >= self.ttl or (
+                local is not None and local[0] - now >= self.ttl - age
+            ):
+                return _MISSING
+            self._store(key, value, now + self.ttl - age)
+            self.shared_hits += 1
+        return value
+
+    def _share(self, key: Hashable, value: Any, age: float = 0.0) -> None:
+        shared = self.shared
+        if shared is None or not isinstance(key, str) or self.ttl <= 0:
+            return
+        try:
+            shared.set(key, value, stored_at=time.time() - age)
+        except Exception:
+            pass  # Not JSON-serializable or the file is gone: stay process-local
+
+    def _load_sync(
+        self, key: Hashable, flight: _Flight, loader: Callable[[], Any]
+    ) -> Any:
+        """Run a sync load as the flight leader."""
+        try:
+            flight.value = self._from_shared(key)
+            if flight.value is _MISSING:
+                flight.value, age = _unwrap(loader())
+                self.set(key, flight.value, age)
+                self._share(key, flight.value, age)
+            return flight.value
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.event.set()
+
+    def _refresh_in_background(
+        self, key: Hashable, flight: _Flight, loader: Callable[[], Any]
+    ) -> None:
+        try:
+            self._load_sync(key, flight, loader)
+        except Exception:
+            pass  # The stale value stays until the grace window ends
+
+    def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Any],
+        revalidate: Optional[Callable[[], Any]] = None,
+    ) -> Any:
+        """
+        Return the cached value, or run ``loader`` once for all concurrent callers.
+
+        Args:
+            key (Hashable): Cache key.
+            loader (Callable): Zero-argument function producing the value.
+            revalidate (Callable): Loader for background reloads of a stale
+                entry; defaults to ``loader``.
+
+        Returns:
+            Any: Cached or freshly loaded value.
+
+        Raises:
+            Exception: Whatever ``loader`` raised; failures are not cached.
+        """
+        with self._lock:
+            self._count_request(key)
+            value, stale = self._lookup(key)
+            if value is not _MISSING and not stale:
+                self.hits += 1
+                return value
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            if stale:
+                self.stale_hits += 1
+                if leader:
+                    self.refreshes += 1
+                    threading.Thread(
+                        target=self._refresh_in_background,
+                        args=(key, flight, revalidate or loader),
+                        daemon=True,
+                    ).start()
+                return value
+            self.misses += 1
+            if not leader:
+                self.coalesced += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        return self._load_sync(key, flight, loader)
+
+    async def _load_async(
+        self,
+        key: Hashable,
+        future: asyncio.Future,
+        loader: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """Run an async load as the flight leader."""
+        try:
+            value = self._from_shared(key)
+            if value is _MISSING:
+                value, age = _unwrap(await loader())
+                self.set(key, value, age)
+                self._share(key, value, age)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            # Mark retrieved so an unobserved failure is not logged as a warning.
+            future.exception()
+            raise
+        finally:
+            with self._lock:
+                if self._async_flights.get(key) is future:
+                    del self._async_flights[key]
+
+    def _claim_async_flight(self, key: Hashable) -> Tuple[asyncio.Future, bool]:
+        """
+        Return the in-flight future for ``key`` and whether the caller leads it.
+        Caller must hold the lock.
+        """
+        loop = asyncio.get_running_loop()
+        future = self._async_flights.get(key)
+        if future is not None and future.get_loop() is loop:
+            return future, False
+        future = loop.create_future()
+        self._async_flights[key] = future
+        return future, True
+
+    def _spawn(self, coro: Awaitable[Any]) -> None:
+        task = asyncio.ensure_future(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        # Failures leave the stale value in place; retrieve to silence warnings.
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    async def get_or_load_async(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        revalidate: Optional[Callable[[], Awaitable[Any]]] = None,
+    ) -> Any:
+        """
+        Async variant of :meth:`get_or_load` for coroutine loaders.
+
+        Args:
+            key (Hashable): Cache key.
+            loader (Callable): Zero-argument coroutine function producing the value.
+            revalidate (Callable): Loader for background reloads of a stale
+                entry; defaults to ``loader``.
+
+        Returns:
+            Any: Cached or freshly loaded value.
+        """
+        with self._lock:
+            self._count_request(key)
+            value, stale = self._lookup(key)
+            if value is not _MISSING and not stale:
+                self.hits += 1
+                return value
+            future, leader = self._claim_async_flight(key)
+            if stale:
+                self.stale_hits += 1
+                if leader:
+                    self.refreshes += 1
+                    self._spawn(self._load_async(key, future, revalidate or loader))
+                return value
+            self.misses += 1
+            if not leader:
+                self.coalesced += 1
+
+        if not leader:
+            return await asyncio.shield(future)
+
+        return await self._load_async(key, future, loader)
+
+    async def refresh_async(
+        self, key: Hashable, loader: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """
+        Reload ``key`` now regardless of freshness, joining any load in flight.
+
+        Args:
+            key (Hashable): Cache key.
+            loader (Callable): Zero-argument coroutine function producing the value.
+
+        Returns:
+            Any: The reloaded value.
+        """
+        with self._lock:
+            future, leader = self._claim_async_flight(key)
+            if leader:
+                self.refreshes += 1
+        if not leader:
+            return await asyncio.shield(future)
+        return await self._load_async(key, future, loader)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return a snapshot of the cache counters.
+
+        Returns:
+            dict: Size and hit/miss/stale/refresh/eviction/expiration/coalesced counts.
+        """
+        return {
+            "size": len(self._data),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale_hits": self.stale_hits,
+            "refreshes": self.refreshes,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "coalesced": self.coalesced,
+            "shared_hits": self.shared_hits,
+        }
@@ -0,0 +1,178 @@
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpen(Exception):
+    """
+    Raised instead of calling upstream while the circuit is open.
+
+    Attributes:
+        retry_after (float): Seconds until a trial call will be allowed.
+    """
+
+    def __init__(self, message: str, retry_after: float) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Thread-safe circuit breaker over a rolling window of recent calls.
+
+    The circuit opens when, over the last ``window`` calls (and at least
+    ``min_calls``), the share of failures reaches ``error_rate`` or the share
+    of calls slower than ``slow_call_seconds`` reaches ``slow_call_rate``.
+    While open, :meth:`before_call` raises :class:`CircuitOpen` so callers
+    fail fast instead of tying up a worker for the full timeout. After
+    ``open_seconds`` one trial call is let through (half-open): success
+    closes the circuit, failure opens it again.
+    """
+
+    def __init__(
+        self,
+        window: int = 20,
+        min_calls: int = 10,
+        error_rate: float = 0.5,
+        slow_call_seconds: float = 3.0,
+        slow_call_rate: float = 0.8,
+        open_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self._clock = clock
+        self._calls: Deque[Tuple[bool, bool]] = deque(maxlen=window)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._trial_started: Optional[float] = None
+        self._lock = threading.Lock()
+
+        self.opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        """Current state: "closed", "open" or "half_open"."""
+        with self._lock:
+            if (
+                self._state == OPEN
+                and self._clock() - self._opened_at >= self.open_seconds
+            ):
+                return HALF_OPEN
+            return self._state
+
+    def check(self) -> None:
+        """
+        Fail fast while open, without claiming the half-open trial call.
+
+        Raises:
+            CircuitOpen: If the circuit is open and not yet due for a trial.
+        """
+        with self._lock:
+            if self._state != OPEN:
+                return
+            retry_after = self._opened_at + self.open_seconds - self._clock()
+            if retry_after <= 0:
+                return
+            self.rejected += 1
+        raise CircuitOpen("Upstream circuit is open", retry_after)
+
+    def before_call(self) -> None:
+        """
+        Admit a call or fail fast.
+
+        Raises:
+            CircuitOpen: While the circuit is open, or while a half-open
+                trial call is still in flight.
+        """
+        with self._lock:
+            if self._state == CLOSED:
+                return
+            now = self._clock()
+            retry_after = self._opened_at + self.open_seconds - now
+            # A trial that never reported back (e.g. cancelled) is abandoned
+            # after another open period.
+            trial_free = (
+                self._trial_started is None
+                or now - self._trial_started >= self.open_seconds
+            )
+            if retry_after <= 0 and trial_free:
+                self._state = HALF_OPEN
+                self._trial_started = now
+                return
+            self.rejected += 1
+        raise CircuitOpen("Upstream circuit is open", max(retry_after, 0.0))
+
+    def record(self, success: bool, duration: float) -> None:
+        """
+        Record the outcome of an admitted call.
+
+        Args:
+            success (bool): Whether upstream answered without a server-side error.
+            duration (float): Call duration in seconds.
+        """
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._trial_started = None
+                if success and duration < self.slow_call_seconds:
+                    self._state = CLOSED
+                    self._calls.clear()
+                else:
+                    self._open_locked()
+                return
+
+            self._calls.append((not success, duration >= self.slow_call_seconds))
+            if self._state == CLOSED and len(self._calls) >= self.min_calls:
+                failures = sum(failed for failed, _ in self._calls) / len(self._calls)
+                slow = sum(was_slow for _, was_slow in self._calls) / len(self._calls)
+                if failures >= self.error_rate or slow >= self.slow_call_rate:
+                    self._open_locked()
+
+    def _open_locked(self) -> None:
+        self._state = OPEN
+        self._opened_at = self._clock()
+        self._calls.clear()
+        self.opened += 1
+
+    def stats(self) -> Dict:
+        """
+        Return the current state and counters.
+
+        Returns:
+            dict: State, times opened and calls rejected while open.
+        """
+        return {"state": self.state, "opened": self.opened, "rejected": self.rejected}
+
+
+class LatencyWindow:
+    """
+    Rolling sample of recent call latencies used to pick a hedging delay.
+    """
+
+    def __init__(self, size: int = 200) -> None:
+        self._samples: Deque[float] = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def add(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """
+        Return the ``percent`` percentile of the window, or None if empty.
+        """
+        samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(len(samples) * percent / 100.0))
+        return samples[index]
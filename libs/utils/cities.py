@@ -0,0 +1,236 @@
+"""
+Local city index: canonical names before any cache or upstream lookup, and
+prefix autocomplete.
+
+The index is built once per process from a city list: the bundled starter
+list (``libs/utils/data/cities.csv``) or, with ``CITY_LIST_PATH``,
+OpenWeather's full ``city.list.json`` (optionally gzipped) or a CSV with the
+same ``id,name,country,lat,lon`` columns. Row order is preference order:
+when several cities share a name, a bare name ("London") means the first
+one, and the others are addressed as "Name,CC" ("London,CA"), the form
+OpenWeather's ``q`` parameter accepts.
+
+Names are folded for matching (case, repeated whitespace and accents), so
+"london ", "LONDON" and "Sao Paulo" resolve to "London" and "São Paulo".
+With ``CITY_INDEX_STRICT`` unknown names raise :class:`UnknownCity` instead
+of costing an upstream call that would return 404; by default they pass
+through unchanged, because the bundled list only covers major cities.
+
+Autocomplete uses a sorted array of folded names searched with ``bisect``:
+one binary search plus a slice per query.
+"""
+
+import csv
+import gzip
+import io
+import json
+import threading
+import unicodedata
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Union
+
+from apps.weather_service.core.config import settings
+from libs.utils.cache import normalize_city
+from libs.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+BUNDLED_CITY_LIST = Path(__file__).with_name("data") / "cities.csv"
+
+
+class City(NamedTuple):
+    id: int
+    name: str
+    country: str
+    lat: float
+    lon: float
+
+
+class UnknownCity(ValueError):
+    """Raised for a city name the index does not know, in strict mode."""
+
+    def __init__(self, city: str) -> None:
+        super().__init__("City not found.")
+        self.city = city
+
+
+def fold_name(name: str) -> str:
+    """
+    Matching key for a city name: accents stripped, whitespace collapsed,
+    case folded.
+    """
+    decomposed = unicodedata.normalize("NFKD", name)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(stripped.split()).casefold()
+
+
+class CityIndex:
+    """
+    In-memory index over a city list.
+
+    Args:
+        cities (Iterable[City]): Cities in preference order.
+    """
+
+    def __init__(self, cities: Iterable[City]) -> None:
+        self._by_name: Dict[str, List[City]] = {}
+        self._by_id: Dict[int, City] = {}
+        for city in cities:
+            if city.id in self._by_id:
+                continue
+            self._by_id[city.id] = city
+            self._by_name.setdefault(fold_name(city.name), []).append(city)
+
+        # Parallel sorted arrays for prefix search; preference order within a name
+        entries = sorted(
+            (
+                (key, rank, city)
+                for key, same_name in self._by_name.items()
+                for rank, city in enumerate(same_name)
+            ),
+            key=lambda entry: (entry[0], entry[1]),
+        )
+        self._keys: List[str] = [key for key, _, _ in entries]
+        self._sorted: List[City] = [city for _, _, city in entries]
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def get(self, city_id: int) -> Optional[City]:
+        return self._by_id.get(city_id)
+
+    def resolve(self, query: str) -> Optional[City]:
+        """
+        City for a user-supplied name, "Name,CC" or numeric OpenWeather id.
+
+        Returns:
+            City | None: The match, or None if the index does not know it.
+        """
+        query = query.strip()
+        if query.isdigit():
+            return self._by_id.get(int(query))
+        name, _, country = query.partition(",")
+        candidates = self._by_name.get(fold_name(name))
+        if not candidates:
+            return None
+        country = country.strip().upper()
+        if not country:
+            return candidates[0]
+        return next((city for city in candidates if city.country == country), None)
+
+    def canonical_name(self, city: City) -> str:
+        """
+        Name that resolves back to ``city``: the plain name for the preferred
+        city of that name, "Name,CC" otherwise.
+        """
+        if self._by_name[fold_name(city.name)][0] == city:
+            return city.name
+        return f"{city.name},{city.country}"
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[City]:
+        """
+        Up to ``limit`` cities whose name starts with ``prefix``, alphabetically.
+        """
+        key = fold_name(prefix)
+        if not key or limit <= 0:
+            return []
+        start = bisect_left(self._keys, key)
+        matches: List[City] = []
+        for position in range(start, min(start + limit, len(self._keys))):
+            if not self._keys[position].startswith(key):
+                break
+            matches.append(self._sorted[position])
+        return matches
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path]) -> "CityIndex":
+        """
+        Load a CSV (``id,name,country,lat,lon``) or OpenWeather
+        ``city.list.json`` file; ``.gz`` files are decompressed.
+        """
+        path = Path(path)
+        opener = gzip.open if path.suffix == ".gz" else open
+        with opener(path, "rb") as handle:
+            raw = handle.read()
+        if path.name.removesuffix(".gz").endswith(".json"):
+            cities = (
+                City(
+                    int(item["id"]),
+                    item["name"],
+                    item.get("country", ""),
+                    float(item["coord"]["lat"]),
+                    float(item["coord"]["lon"]),
+                )
+                for item in json.loads(raw)
+                if item.get("name")
+            )
+        else:
+            cities = (
+                City(
+                    int(row["id"]),
+                    row["name"],
+                    row["country"],
+                    float(row["lat"]),
+                    float(row["lon"]),
+                )
+                for row in csv.DictReader(io.StringIO(raw.decode("utf-8")))
+            )
+        return cls(cities)
+
+
+_index: Optional[CityIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_city_index() -> CityIndex:
+    """
+    The process-wide index, loaded on first use from ``CITY_LIST_PATH`` or
+    the bundled list. Called from the application lifespan so the first
+    request does not pay for loading.
+    """
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                path = settings.CITY_LIST_PATH or BUNDLED_CITY_LIST
+                _index = CityIndex.from_file(path)
+                logger.info("Loaded %d cities from %s", len(_index), path)
+    return _index
+
+
+def canonical_city(city: str) -> str:
+    """
+    Canonical spelling of a requested city, used for cache keys, upstream
+    queries and response text.
+
+    Args:
+        city (str): City as received from the client.
+
+    Returns:
+        str: Canonical name, or the whitespace-trimmed input if the index
+        does not know it (non-strict mode).
+
+    Raises:
+        UnknownCity: If the city is unknown and ``CITY_INDEX_STRICT`` is set.
+    """
+    index = get_city_index()
+    match = index.resolve(city)
+    if match is not None:
+        return index.canonical_name(match)
+    if settings.CITY_INDEX_STRICT:
+        raise UnknownCity(city)
+    return " ".join(city.split())
+
+
+def city_key(city: str) -> str:
+    """
+    Lookup key for a city: its canonical name, normalized. Used for
+    ``weather_cache`` keys, the ``weather_data.city`` column, the database
+    read-through and history queries, so every spelling reaches the same
+    entries and rows.
+
+    Raises:
+        UnknownCity: If the city is unknown and ``CITY_INDEX_STRICT`` is set.
+    """
+    return normalize_city(canonical_city(city))
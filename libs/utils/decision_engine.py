@@ -0,0 +1,232 @@
+"""
+Rule-based go-out decisions.
+
+The rules are defined once, as data, in :data:`RULES`. :func:`decide_batch`
+evaluates them over NumPy arrays for N observations; :func:`decide_one`
+evaluates the same table for a single observation in plain Python, so the
+single-city request path never imports NumPy (which is imported on the first
+batch call). Neither function restates a rule: changing a threshold, a
+condition or the precedence is an edit to the constants below. The two
+interpreters are checked against each other over a grid of inputs (see
+``test_decide_one_matches_batch``); a new kind of rule test must be added
+to both.
+"""
+
+from __future__ import annotations
+
+import math
+from functools import lru_cache
+from typing import TYPE_CHECKING, Iterable, Optional, Sequence, Tuple
+
+from libs.models.observation import BAD_WEATHER_CONDITIONS, WeatherObservation
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Temperature (°C) below which it is too cold to go out.
+COLD_THRESHOLD = 5.0
+
+# Condition vocabulary (lower-cased OpenWeather "main" groups). Code 0 is
+# reserved for missing or unknown conditions.
+CONDITIONS: Tuple[str, ...] = (
+    "",
+    "clear",
+    "clouds",
+    "drizzle",
+    "rain",
+    "snow",
+    "storm",
+    "thunderstorm",
+    "mist",
+    "smoke",
+    "haze",
+    "dust",
+    "fog",
+    "sand",
+    "ash",
+    "squall",
+    "tornado",
+)
+CONDITION_CODES = {name: code for code, name in enumerate(CONDITIONS)}
+
+BAD_CONDITION_CODES = frozenset(
+    code for code, name in enumerate(CONDITIONS) if name in BAD_WEATHER_CONDITIONS
+)
+
+# Reason codes returned by decide_one and decide_batch.
+REASON_CLEAR = 0
+REASON_BAD_WEATHER = 1
+REASON_TOO_COLD = 2
+REASON_FEELS_COLD = 3
+
+# Tests a rule can apply to its input.
+BAD_CONDITION = "bad_condition"  # condition code is in BAD_CONDITION_CODES
+BELOW_THRESHOLD = "below_threshold"  # value is known and below cold_threshold
+
+# (reason, input, test) in order of precedence; the first rule that holds
+# gives the reason, and REASON_CLEAR if none does. Unknown temperatures
+# (None or NaN) never hold.
+RULES: Tuple[Tuple[int, str, str], ...] = (
+    (REASON_BAD_WEATHER, "condition", BAD_CONDITION),
+    (REASON_TOO_COLD, "temperature", BELOW_THRESHOLD),
+    (REASON_FEELS_COLD, "feels_like", BELOW_THRESHOLD),
+)
+
+
+@lru_cache(maxsize=None)
+def bad_condition_mask() -> np.ndarray:
+    """
+    Lookup table: ``bad_condition_mask()[code]`` is True for bad-weather conditions.
+    """
+    import numpy as np
+
+    return np.array([code in BAD_CONDITION_CODES for code in range(len(CONDITIONS))])
+
+
+def decide_one(
+    temperature: Optional[float],
+    feels_like: Optional[float],
+    condition: str,
+    cold_threshold: float = COLD_THRESHOLD,
+) -> int:
+    """
+    Reason code for a single observation: :data:`RULES` evaluated in plain
+    Python, matching :func:`decide_batch` row for row.
+
+    Args:
+        temperature (Optional[float]): Temperature in °C, None if unknown.
+        feels_like (Optional[float]): Feels-like temperature in °C, None if unknown.
+        condition (str): Condition name, any case.
+        cold_threshold (float): Temperature below which it is too cold.
+
+    Returns:
+        int: One of the ``REASON_*`` codes; ``REASON_CLEAR`` means go out.
+    """
+    inputs = {
+        "temperature": temperature,
+        "feels_like": feels_like,
+        "condition": CONDITION_CODES.get(condition.lower(), 0),
+    }
+    for reason, name, test in RULES:
+        value = inputs[name]
+        if test == BAD_CONDITION:
+            holds = value in BAD_CONDITION_CODES
+        else:
+            holds = (
+                value is not None and not math.isnan(value) and value < cold_threshold
+            )
+        if holds:
+            return reason
+    return REASON_CLEAR
+
+
+def encode_conditions(conditions: Iterable[str]) -> np.ndarray:
+    """
+    Map condition names to integer codes.
+
+    Args:
+        conditions (Iterable[str]): Condition names, any case.
+
+    Returns:
+        np.ndarray: ``int8`` codes; unknown conditions map to 0.
+    """
+    import numpy as np
+
+    return np.fromiter(
+        (CONDITION_CODES.get(condition.lower(), 0) for condition in conditions),
+        dtype=np.int8,
+    )
+
+
+def observations_to_arrays(
+    observations: Sequence[WeatherObservation],
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Convert observations to the columnar inputs of :func:`decide_batch`.
+
+    Missing temperatures become NaN, which never trips a threshold.
+
+    Args:
+        observations (Sequence[WeatherObservation]): Parsed observations.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: temperature, feels_like
+        and condition code arrays.
+    """
+    import numpy as np
+
+    nan = float("nan")
+    count = len(observations)
+    temperature = np.fromiter(
+        (nan if o.temperature is None else o.temperature for o in observations),
+        dtype=np.float64,
+        count=count,
+    )
+    feels_like = np.fromiter(
+        (nan if o.feels_like is None else o.feels_like for o in observations),
+        dtype=np.float64,
+        count=count,
+    )
+    codes = encode_conditions(o.condition for o in observations)
+    return temperature, feels_like, codes
+
+
+def decide_batch(
+    temperature: np.ndarray,
+    feels_like: np.ndarray,
+    condition_codes: np.ndarray,
+    cold_threshold: float = COLD_THRESHOLD,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Rule-based go-out decisions for N observations in one vectorized pass.
+
+    Evaluates :data:`RULES` in order of precedence. NaN temperatures are
+    treated as unknown and never trigger a rule.
+
+    Args:
+        temperature (np.ndarray): Temperatures in °C, shape (N,).
+        feels_like (np.ndarray): Feels-like temperatures in °C, shape (N,).
+        condition_codes (np.ndarray): Codes from :func:`encode_conditions`, shape (N,).
+        cold_threshold (float): Temperature below which it is too cold.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Boolean go-out array and ``int8`` reason codes.
+    """
+    import numpy as np
+
+    inputs = {
+        "temperature": np.asarray(temperature, dtype=np.float64),
+        "feels_like": np.asarray(feels_like, dtype=np.float64),
+        "condition": np.asarray(condition_codes, dtype=np.intp),
+    }
+    conditions = []
+    with np.errstate(invalid="ignore"):
+        for _, name, test in RULES:
+            if test == BAD_CONDITION:
+                conditions.append(bad_condition_mask()[inputs[name]])
+            else:
+                # NaN compares False
+                conditions.append(inputs[name] < cold_threshold)
+
+    reasons = np.select(
+        conditions, [reason for reason, _, _ in RULES], default=REASON_CLEAR
+    ).astype(np.int8)
+    return reasons == REASON_CLEAR, reasons
+
+
+def decide_features_batch(features: np.ndarray) -> np.ndarray:
+    """
+    ML-path decisions for a matrix of ``[temperature, is_bad_weather]`` rows.
+
+    Args:
+        features (np.ndarray): Feature matrix of shape (N, 2).
+
+    Returns:
+        np.ndarray: Boolean go-out array of shape (N,).
+    """
+    import numpy as np
+
+    features = np.asarray(features, dtype=np.float64)
+    if features.ndim != 2 or features.shape[1] != 2:
+        raise ValueError("Expected a feature matrix of shape (N, 2)")
+    return features[:, 1] == 0
@@ -1,11 +1,18 @@
-import os
+"""
+Environment helpers for scripts and tooling.
+
+Nothing runs at import time. The settings object itself is built once, in
+:mod:`apps.weather_service.core.config`; :func:`validate_env` only reports
+on it.
+"""
+
+import logging
+
 from dotenv import load_dotenv
-from pydantic_settings import BaseSettings
 from pydantic import ValidationError
-from libs.utils.logger import get_logger
-from apps.weather_service.core.config import settings
 
-logger = get_logger(__name__)
+# Plain logging: libs.utils.logger imports the settings this module checks.
+logger = logging.getLogger(__name__)
 
 
 def load_env():
@@ -15,16 +22,24 @@ def load_env():
     load_dotenv()
     logger.info("Environment variables loaded from .env file.")
 
-try:
-    # Load environment variables and validate
-    settings = settings()
-    # Access the API key in your application
-    api_key = settings.OPENWEATHER_API_KEY
+
+def validate_env():
+    """
+    Return the shared settings, turning validation errors into a readable error.
+
+    Returns:
+        Settings: The application settings.
+
+    Raises:
+        RuntimeError: If required environment variables are missing or invalid.
+    """
+    try:
+        from apps.weather_service.core.config import settings
+    except ValidationError as e:
+        missing_vars = [err["loc"][0] for err in e.errors()]
+        logger.error(
+            f"Environment variables validation failed. Missing or invalid variables: {missing_vars}"
+        )
+        raise RuntimeError(f"Environment variables validation failed: {e}") from e
     logger.info("Environment variables successfully validated and loaded.")
-except ValidationError as e:
-    # Log detailed error message
-    missing_vars = [err['loc'][0] for err in e.errors()]
-    logger.error(
-        f"Environment variables validation failed. Missing or invalid variables: {missing_vars}"
-    )
-    raise RuntimeError(f"Environment variables validation failed: {e}")
+    return settings
@@ -0,0 +1,166 @@
+"""
+Snap coordinates to geohash cells so nearby lookups share one observation.
+
+A geohash interleaves longitude and latitude bisections into base-32
+characters; every extra character narrows the cell. Approximate cell sizes
+at the equator:
+
+    precision  cell (lat x lon)
+    3          156 km x 156 km
+    4          39 km x 20 km
+    5          4.9 km x 4.9 km
+    6          1.2 km x 0.6 km
+    7          153 m x 153 m
+
+Coordinate lookups are cached and sent upstream as the cell centre, so
+every user inside a cell gets the same observation from one upstream call.
+Lower precision means bigger cells and more sharing; higher precision means
+the observation is taken closer to the user. ``GEO_CELL_PRECISION`` picks
+the trade-off.
+"""
+
+from typing import NamedTuple, Optional, Tuple
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+MIN_PRECISION = 1
+MAX_PRECISION = 12
+
+# Cache keys for cells. City keys are always case-folded (see
+# libs.utils.cache.normalize_city), so no city name can produce a key that
+# starts with this upper-case prefix.
+CELL_KEY_PREFIX = "GEO:"
+
+
+class GeoCell(NamedTuple):
+    geohash: str
+    # Centre of the cell, the point sent upstream
+    lat: float
+    lon: float
+
+
+def _bounds(geohash: str) -> Tuple[float, float, float, float]:
+    """
+    ``(lat_min, lat_max, lon_min, lon_max)`` of a geohash cell.
+
+    Raises:
+        ValueError: If ``geohash`` contains a character outside the alphabet.
+    """
+    lat_min, lat_max, lon_min, lon_max = -90.0, 90.0, -180.0, 180.0
+    even = True
+    for char in geohash:
+        index = BASE32.find(char)
+        if index < 0:
+            raise ValueError(f"Invalid geohash character: {char!r}")
+        for shift in range(4, -1, -1):
+            bit = (index >> shift) & 1
+            if even:
+                middle = (lon_min + lon_max) / 2
+                if bit:
+                    lon_min = middle
+                else:
+                    lon_max = middle
+            else:
+                middle = (lat_min + lat_max) / 2
+                if bit:
+                    lat_min = middle
+                else:
+                    lat_max = middle
+            even = not even
+    return lat_min, lat_max, lon_min, lon_max
+
+
+def encode(lat: float, lon: float, precision: int) -> str:
+    """
+    Geohash of the cell containing a point.
+
+    Args:
+        lat (float): Latitude in degrees, -90 to 90.
+        lon (float): Longitude in degrees, -180 to 180.
+        precision (int): Number of geohash characters.
+
+    Returns:
+        str: The geohash.
+
+    Raises:
+        ValueError: If the point or precision is out of range.
+    """
+    if not -90.0 <= lat <= 90.0 or not -180.0 <= lon <= 180.0:
+        raise ValueError("Coordinates out of range.")
+    if not MIN_PRECISION <= precision <= MAX_PRECISION:
+        raise ValueError(
+            f"Geohash precision must be between {MIN_PRECISION} and {MAX_PRECISION}."
+        )
+
+    lat_min, lat_max, lon_min, lon_max = -90.0, 90.0, -180.0, 180.0
+    chars = []
+    index, bits, even = 0, 0, True
+    while len(chars) < precision:
+        if even:
+            middle = (lon_min + lon_max) / 2
+            if lon >= middle:
+                index = index * 2 + 1
+                lon_min = middle
+            else:
+                index *= 2
+                lon_max = middle
+        else:
+            middle = (lat_min + lat_max) / 2
+            if lat >= middle:
+                index = index * 2 + 1
+                lat_min = middle
+            else:
+                index *= 2
+                lat_max = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[index])
+            index, bits = 0, 0
+    return "".join(chars)
+
+
+def decode(geohash: str) -> GeoCell:
+    """
+    Cell for a geohash, with its centre point.
+
+    Raises:
+        ValueError: If ``geohash`` is empty, too long or not a geohash.
+    """
+    if not MIN_PRECISION <= len(geohash) <= MAX_PRECISION:
+        raise ValueError(
+            f"Geohash precision must be between {MIN_PRECISION} and {MAX_PRECISION}."
+        )
+    lat_min, lat_max, lon_min, lon_max = _bounds(geohash)
+    return GeoCell(geohash, (lat_min + lat_max) / 2, (lon_min + lon_max) / 2)
+
+
+def snap(lat: float, lon: float, precision: int) -> GeoCell:
+    """
+    Cell of the given precision containing a point.
+
+    Args:
+        lat (float): Latitude in degrees.
+        lon (float): Longitude in degrees.
+        precision (int): Number of geohash characters.
+
+    Returns:
+        GeoCell: The cell and its centre.
+    """
+    return decode(encode(lat, lon, precision))
+
+
+def cell_key(cell: GeoCell) -> str:
+    """
+    ``weather_cache`` key for a cell.
+    """
+    return CELL_KEY_PREFIX + cell.geohash
+
+
+def cell_from_key(key: str) -> Optional[GeoCell]:
+    """
+    Cell for a ``weather_cache`` key made by :func:`cell_key`, or None for a
+    city key.
+    """
+    if not key.startswith(CELL_KEY_PREFIX):
+        return None
+    return decode(key[len(CELL_KEY_PREFIX) :])
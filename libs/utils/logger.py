@@ -1,46 +1,222 @@
+import atexit
 import logging
+import queue
 import sys
-from pythonjsonlogger import jsonlogger
-from apps.weather_service.core.config import settings
+import threading
+from logging.handlers import QueueHandler
+from typing import TYPE_CHECKING, List, Optional, TextIO
 
+if TYPE_CHECKING:
+    from apps.weather_service.core.config import Settings
 
-def get_logger(name: str) -> logging.Logger:
+_configure_lock = threading.Lock()
+_configured = False
+_listener: Optional["BatchingQueueListener"] = None
+_queue_handler: Optional["DroppingQueueHandler"] = None
+
+QUIET_LOGGERS = ("httpx", "httpcore", "urllib3")
+
+
+class DroppingQueueHandler(QueueHandler):
     """
-    Create and configure a logger instance.
+    QueueHandler for a bounded queue that drops records when it is full.
 
-    Args:
-        name (str): The name of the logger.
+    Formatting is left to the listener; the calling thread only renders the
+    message arguments, so a slow log sink never blocks a request.
+    """
 
-    Returns:
-        logging.Logger: Configured logger instance.
+    def __init__(self, log_queue: queue.Queue) -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Bind the arguments now; they may be mutated after this call returns.
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BatchingQueueListener:
+    """
+    Background thread that drains the log queue, formats records and writes
+    them in batches (one write and one flush per batch).
+
+    Args:
+        log_queue (queue.Queue): Queue filled by :class:`DroppingQueueHandler`.
+        formatter (logging.Formatter): Formatter applied to each record.
+        stream (TextIO): Destination stream.
+        batch_size (int): Most records written per batch.
     """
 
-    logger = logging.getLogger(name)
+    _STOP = object()
+
+    def __init__(
+        self,
+        log_queue: queue.Queue,
+        formatter: logging.Formatter,
+        stream: TextIO = sys.stdout,
+        batch_size: int = 256,
+    ) -> None:
+        self.queue = log_queue
+        self.formatter = formatter
+        self.stream = stream
+        self.batch_size = batch_size
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(
+            target=self._run, name="log-listener", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Write everything queued so far and stop the thread.
+        """
+        if self._thread is None:
+            return
+        # Blocking put: the stop marker must not be dropped when the queue is full.
+        self.queue.put(self._STOP)
+        self._thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            batch: List[logging.LogRecord] = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stopping = any(record is self._STOP for record in batch)
+            self._write([record for record in batch if record is not self._STOP])
+            if stopping:
+                return
 
-    # Avoid duplicate handlers
-    if logger.hasHandlers():
-        return logger
+    def _write(self, records: List[logging.LogRecord]) -> None:
+        lines = []
+        for record in records:
+            try:
+                lines.append(self.formatter.format(record))
+            except Exception:
+                lines.append(
+                    f"{record.levelname} {record.name} {record.msg} "
+                    "(unformattable record)"
+                )
+        if not lines:
+            return
+        try:
+            self.stream.write("\n".join(lines) + "\n")
+            self.stream.flush()
+        except Exception:
+            pass
 
-    # Stream handler for console output
-    handler = logging.StreamHandler(sys.stdout)
 
-    # Select formatter based on environment
-    if settings.PROJECT_NAME == "production":
+def _build_formatter(settings: "Settings") -> logging.Formatter:
+    # Keyed on ENVIRONMENT: PROJECT_NAME is the service's display name and
+    # never equals "production", so JSON logs could not be switched on.
+    if settings.ENVIRONMENT == "production":
         # JSON Formatter for production
-        formatter = jsonlogger.JsonFormatter(
+        from pythonjsonlogger import jsonlogger
+
+        return jsonlogger.JsonFormatter(
             "%(asctime)s %(name)s %(levelname)s %(message)s %(request_id)s"
         )
-    else:
-        # Standard text formatter for debugging
-        formatter = logging.Formatter(
-            "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-        )
+    # Standard text formatter for debugging
+    return logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
 
-    handler.setFormatter(formatter)
-    logger.addHandler(handler)
+def configure_logging(force: bool = False) -> None:
+    """
+    Configure the root logger once per process.
 
-    # Set logging level from environment or default to INFO
-    log_level = settings.LOG_LEVEL if hasattr(settings, "LOG_LEVEL") else "INFO"
-    logger.setLevel(getattr(logging, log_level.upper(), logging.INFO))
+    With ``LOG_ASYNC`` enabled (the default) records go through a bounded
+    queue to a background listener that formats and writes them in batches;
+    records arriving while the queue is full are dropped and counted (see
+    :func:`dropped_log_records`). Otherwise a plain synchronous stream
+    handler is used.
 
-    return logger
+    Args:
+        force (bool): Reconfigure even if logging was already set up.
+    """
+    global _configured, _listener, _queue_handler
+
+    # Read here rather than at import time, so importing this module does not
+    # load (and freeze) the settings.
+    from apps.weather_service.core.config import settings
+
+    with _configure_lock:
+        if _configured and not force:
+            return
+        root = logging.getLogger()
+        shutdown_logging()
+        for handler in [
+            h for h in root.handlers if getattr(h, "_weather_handler", False)
+        ]:
+            root.removeHandler(handler)
+
+        formatter = _build_formatter(settings)
+        if settings.LOG_ASYNC:
+            log_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+            handler: logging.Handler = DroppingQueueHandler(log_queue)
+            _queue_handler = handler
+            _listener = BatchingQueueListener(
+                log_queue, formatter, sys.stdout, batch_size=settings.LOG_BATCH_SIZE
+            )
+            _listener.start()
+        else:
+            handler = logging.StreamHandler(sys.stdout)
+            handler.setFormatter(formatter)
+            _queue_handler = None
+        handler._weather_handler = True
+        root.addHandler(handler)
+        root.setLevel(getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO))
+        # These log every upstream request at INFO; keep them to warnings.
+        for name in QUIET_LOGGERS:
+            logging.getLogger(name).setLevel(logging.WARNING)
+        _configured = True
+
+
+def shutdown_logging() -> None:
+    """
+    Flush queued records and stop the background listener, if any.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def dropped_log_records() -> int:
+    """
+    Number of records dropped because the log queue was full.
+    """
+    return _queue_handler.dropped if _queue_handler is not None else 0
+
+
+def log_queue_depth() -> int:
+    return _queue_handler.queue.qsize() if _queue_handler is not None else 0
+
+
+atexit.register(shutdown_logging)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    Return a logger; handlers live on the root logger, which is configured
+    on first use (see :func:`configure_logging`).
+
+    Args:
+        name (str): The name of the logger.
+
+    Returns:
+        logging.Logger: Logger instance.
+    """
+    configure_logging()
+    return logging.getLogger(name)
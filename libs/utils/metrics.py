@@ -0,0 +1,443 @@
+"""
+In-process metrics rendered in the Prometheus text exposition format.
+
+Recording is designed for the request path: label children are created once
+and cached, and ``observe``/``inc`` only bump preallocated slots without
+taking a lock. (Under the GIL a concurrent increment can very rarely be
+lost, which is acceptable for monitoring.) Gauges are callbacks evaluated
+only when ``/metrics`` is scraped, so they cost nothing per request.
+
+Each worker process keeps its own metrics; scrape every worker or aggregate
+upstream.
+
+Stage observations made while a request is being timed (see
+:func:`start_request_timing`) are also summed per request, for the
+``Server-Timing`` response header.
+"""
+
+import abc
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+from starlette.responses import JSONResponse, Response
+
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Sample = Tuple[Tuple[Hashable, ...], float]
+
+
+def _escape(value: Hashable) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(
+    names: Sequence[str], values: Sequence[Hashable], extra: str = ""
+) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric(abc.ABC):
+    """Base for labelled metrics; children are created once per label set."""
+
+    kind = ""
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[Hashable, ...], object] = {}
+        self._lock = threading.Lock()
+
+    @abc.abstractmethod
+    def _new_child(self) -> object:
+        """Create the per-label-set child that records values."""
+
+    def labels(self, *values: Hashable):
+        """
+        Return the child for a label set, creating it on first use.
+
+        Bind children for fixed label values once (e.g. at import time) to
+        keep the hot path free of lookups.
+        """
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def header(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+
+class Counter(_Metric):
+    """Monotonic counter."""
+
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for values, child in list(self._children.items()):
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f"{self.name}{labels} {_format_value(child.value)}")
+        return lines
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: Tuple[float, ...]) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def time(self) -> "_Timer":
+        """Context manager observing the duration of its block."""
+        return _Timer(self)
+
+
+class _Timer:
+    __slots__ = ("child", "started")
+
+    def __init__(self, child: _HistogramChild) -> None:
+        self.child = child
+
+    def __enter__(self) -> "_Timer":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.child.observe(time.perf_counter() - self.started)
+
+
+class Histogram(_Metric):
+    """Histogram with fixed upper bounds, in seconds by convention."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for values, child in list(self._children.items()):
+            counts = list(child.counts)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(
+                    self.labelnames, values, f'le="{_format_value(bound)}"'
+                )
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+# Per-request stage totals; None outside a timed request (e.g. background jobs).
+# Tasks and worker threads started by the request copy the context, so they
+# add to the same dict.
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar(
+    "request_timings", default=None
+)
+
+
+class _StageChild(_HistogramChild):
+    __slots__ = ("stage",)
+
+    def __init__(self, bounds: Tuple[float, ...], stage: str) -> None:
+        super().__init__(bounds)
+        self.stage = stage
+
+    def observe(self, value: float) -> None:
+        super().observe(value)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings[self.stage] = timings.get(self.stage, 0.0) + value
+
+
+class StageHistogram(Histogram):
+    """
+    Histogram labelled by stage whose observations also count towards the
+    current request's ``Server-Timing`` breakdown.
+    """
+
+    def labels(self, *values: Hashable):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(
+                    values, _StageChild(self.buckets, str(values[0]))
+                )
+        return child
+
+
+class CallbackMetric:
+    """
+    Gauge (or counter) whose samples are produced by a callback at scrape time.
+
+    The callback returns ``(label_values, value)`` pairs; an exception or an
+    empty result simply omits the samples.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], Iterable[Sample]],
+        labelnames: Sequence[str] = (),
+        kind: str = "gauge",
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+        self.labelnames = tuple(labelnames)
+        self.kind = kind
+
+    def render(self) -> List[str]:
+        try:
+            samples = list(self.callback())
+        except Exception:
+            return []
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        for values, value in samples:
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f"{self.name}{labels} {_format_value(value)}")
+        return lines
+
+
+class Registry:
+    """Ordered set of metrics rendered together by :meth:`render`."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, object] = {}
+
+    def register(self, metric):
+        """
+        Add a metric, or return the one already registered under its name
+        (so re-imports do not duplicate it).
+        """
+        return self._metrics.setdefault(metric.name, metric)
+
+    def unregister(self, name: str) -> None:
+        self._metrics.pop(name, None)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    """Create (or fetch) a counter in the default registry."""
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def histogram(
+    name: str,
+    documentation: str,
+    labelnames: Sequence[str] = (),
+    buckets: Sequence[float] = DEFAULT_BUCKETS,
+) -> Histogram:
+    """Create (or fetch) a histogram in the default registry."""
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+
+def gauge(
+    name: str,
+    documentation: str,
+    callback: Callable[[], Iterable[Sample]],
+    labelnames: Sequence[str] = (),
+    kind: str = "gauge",
+) -> CallbackMetric:
+    """Register a scrape-time callback metric in the default registry."""
+    return REGISTRY.register(
+        CallbackMetric(name, documentation, callback, labelnames, kind)
+    )
+
+
+REQUEST_SECONDS = histogram(
+    "http_request_duration_seconds", "Request latency by route.", ("method", "route")
+)
+STAGE_SECONDS = REGISTRY.register(
+    StageHistogram(
+        "request_stage_duration_seconds", "Time spent per request stage.", ("stage",)
+    )
+)
+UPSTREAM_RESPONSES = counter(
+    "upstream_responses_total",
+    "Upstream weather API responses by status or error.",
+    ("status",),
+)
+
+# Pre-bound stage children: observing them is a list increment and an add.
+STAGE_UPSTREAM = STAGE_SECONDS.labels("upstream")
+STAGE_PARSE = STAGE_SECONDS.labels("parse")
+STAGE_DECISION = STAGE_SECONDS.labels("decision")
+STAGE_DB = STAGE_SECONDS.labels("db")
+STAGE_SERIALIZATION = STAGE_SECONDS.labels("serialization")
+
+
+def _threadpool_samples() -> Iterable[Sample]:
+    import anyio.to_thread
+
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    return [(("in_use",), limiter.borrowed_tokens), (("limit",), limiter.total_tokens)]
+
+
+gauge(
+    "threadpool_threads",
+    "Threads of the default worker threadpool in use and its limit.",
+    _threadpool_samples,
+    ("state",),
+)
+
+
+def _log_queue_samples() -> Iterable[Sample]:
+    from libs.utils.logger import log_queue_depth
+
+    return [((), log_queue_depth())]
+
+
+def _dropped_log_samples() -> Iterable[Sample]:
+    from libs.utils.logger import dropped_log_records
+
+    return [((), dropped_log_records())]
+
+
+gauge(
+    "log_queue_depth",
+    "Log records waiting for the background writer.",
+    _log_queue_samples,
+)
+gauge(
+    "log_records_dropped_total",
+    "Log records dropped because the log queue was full.",
+    _dropped_log_samples,
+    kind="counter",
+)
+
+
+class TimedJSONResponse(JSONResponse):
+    """JSONResponse that records body rendering as the serialization stage."""
+
+    def render(self, content) -> bytes:
+        started = time.perf_counter()
+        body = super().render(content)
+        STAGE_SERIALIZATION.observe(time.perf_counter() - started)
+        return body
+
+
+def route_label(scope: Dict) -> str:
+    """
+    Route template for a request (e.g. ``/api/v1/history/{city}``), so
+    label cardinality does not grow with path parameters.
+    """
+    path = getattr(scope.get("route"), "path", None)
+    if path is None:
+        return "unmatched"
+    # Newer FastAPI versions keep included routers nested, so the matched
+    # route's path lacks the include prefix (e.g. "/api/v1").
+    included = (scope.get("fastapi") or {}).get("included_router")
+    prefix = getattr(getattr(included, "include_context", None), "prefix", "")
+    if prefix and not path.startswith(prefix):
+        return prefix + path
+    return path
+
+
+def start_request_timing() -> Dict[str, float]:
+    """
+    Start collecting stage durations for the current request.
+
+    Call from the request middleware before handing the request on; the
+    returned dict fills in as stages are observed.
+    """
+    timings: Dict[str, float] = {}
+    _request_timings.set(timings)
+    return timings
+
+
+def server_timing_header(timings: Dict[str, float], total: float) -> str:
+    """
+    Format stage durations (seconds) as a ``Server-Timing`` header value in
+    milliseconds, followed by the total.
+    """
+    entries = [
+        f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in timings.items()
+    ]
+    entries.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(entries)
+
+
+def metrics_response(registry: Optional[Registry] = None) -> Response:
+    """
+    Render the registry as a Prometheus text response.
+    """
+    return Response((registry or REGISTRY).render(), media_type=CONTENT_TYPE)
@@ -1,50 +1,132 @@
-import numpy as np
+from __future__ import annotations
+
 import logging
+import time
+from typing import TYPE_CHECKING, List, Sequence, Tuple
+
+from apps.weather_service.core.config import settings
+from libs.models.observation import WeatherObservation
+from libs.utils.decision_engine import decide_features_batch
+from libs.utils.metrics import STAGE_DECISION
+from libs.utils.model_server import get_model_server
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Model version reported when decisions come from the rules
+RULES_VERSION = "rules"
 
 logger = logging.getLogger(__name__)
 
-def preprocess_weather_data(weather_data: dict) -> np.ndarray:
+
+def preprocess_weather_data(observation: WeatherObservation) -> np.ndarray:
     """
-    Process raw weather data into a feature vector for AI/ML models.
+    Turn a parsed weather observation into a feature vector for AI/ML models.
 
     Args:
-        weather_data (dict): The raw weather data from the API.
+        observation (WeatherObservation): The parsed weather observation.
 
     Returns:
         np.ndarray: Preprocessed feature vector.
     """
+    import numpy as np
+
     try:
-        # Extract temperature in Celsius
-        temp_celsius = weather_data.get("main", {}).get("temp", None)
+        # Temperature is already in Celsius (metric units)
+        temp_celsius = observation.temperature
         if temp_celsius is None:
             logger.warning("Temperature data missing; defaulting to 0°C.")
-            temp_celsius = 273.15  # Default to 0°C in Kelvin
-        temp_celsius -= 273.15
+            temp_celsius = 0.0
 
         # Check for bad weather conditions
-        weather_condition = weather_data.get("weather", [{}])[0].get("main", "").lower()
-        is_bad_weather = 1 if weather_condition in ["rain", "snow", "storm"] else 0
+        is_bad_weather = 1 if observation.is_bad_weather else 0
 
         return np.array([temp_celsius, is_bad_weather])
     except Exception as e:
         logger.error(f"Error preprocessing weather data: {e}")
         raise ValueError("Invalid weather data format") from e
 
+
 def make_decision(feature_vector: np.ndarray) -> str:
     """
     Make a decision based on the feature vector.
 
+    Thin wrapper around :func:`decide_features_batch` for a single row.
+
     Args:
         feature_vector (np.ndarray): Preprocessed weather feature vector.
 
     Returns:
         str: "Yes" if the user can go out, "No" otherwise.
     """
+    import numpy as np
+
+    started = time.perf_counter()
     try:
-        temp, is_bad_weather = feature_vector
-        if is_bad_weather:
-            return "No"
-        return "Yes"
+        go_out = decide_features_batch(np.asarray(feature_vector).reshape(1, 2))
+        STAGE_DECISION.observe(time.perf_counter() - started)
+        return "Yes" if go_out[0] else "No"
     except Exception as e:
         logger.error(f"Error in decision-making process: {e}")
         raise ValueError("Invalid feature vector format") from e
+
+
+def _label(probability: float) -> str:
+    return "Yes" if probability >= settings.ML_DECISION_THRESHOLD else "No"
+
+
+async def make_decision_async(feature_vector: np.ndarray) -> Tuple[str, str]:
+    """
+    Decide with the loaded model, scored in a cross-request micro-batch, or
+    with :func:`make_decision` when no model is configured.
+
+    Args:
+        feature_vector (np.ndarray): Preprocessed weather feature vector.
+
+    Returns:
+        Tuple[str, str]: "Yes"/"No" and the model version that decided
+        (``RULES_VERSION`` for the rules).
+    """
+    server = get_model_server()
+    if server is None:
+        return make_decision(feature_vector), RULES_VERSION
+    started = time.perf_counter()
+    probability, version = await server.predict(feature_vector)
+    STAGE_DECISION.observe(time.perf_counter() - started)
+    return _label(probability), version
+
+
+async def make_decisions_async(
+    feature_vectors: Sequence[np.ndarray],
+) -> Tuple[List[str], str]:
+    """
+    Decide for many feature vectors with a single model call, or one
+    vectorized :func:`decide_features_batch` call without a model.
+
+    Args:
+        feature_vectors (Sequence[np.ndarray]): Preprocessed feature vectors.
+
+    Returns:
+        Tuple[List[str], str]: "Yes"/"No" per vector, in order, and the
+        model version that decided.
+    """
+    import numpy as np
+
+    server = get_model_server()
+    if server is None:
+        if not feature_vectors:
+            return [], RULES_VERSION
+        started = time.perf_counter()
+        try:
+            go_out = decide_features_batch(
+                np.stack([np.asarray(f) for f in feature_vectors])
+            )
+        except Exception as e:
+            logger.error(f"Error in decision-making process: {e}")
+            raise ValueError("Invalid feature vector format") from e
+        STAGE_DECISION.observe(time.perf_counter() - started)
+        return ["Yes" if value else "No" for value in go_out], RULES_VERSION
+    started = time.perf_counter()
+    probabilities, version = await server.predict_many(feature_vectors)
+    STAGE_DECISION.observe(time.perf_counter() - started)
+    return [_label(probability) for probability in probabilities], version
@@ -0,0 +1,133 @@
+"""
+On-disk registry of versioned model artifacts.
+
+Layout::
+
+    <root>/
+        CURRENT              # name of the active version, e.g. "2024-06-01.1"
+        <version>/model.joblib
+
+Artifacts are written uncompressed by :meth:`ModelRegistry.publish`, and
+:meth:`ModelRegistry.load` opens them with ``mmap_mode="r"``. The model's
+NumPy arrays are therefore memory-mapped read-only, and every worker on a
+host shares the same page-cache pages instead of holding its own copy.
+
+Publishing is atomic for readers: the version directory is fully written
+under a temporary name and renamed into place, and only then is CURRENT
+replaced with ``os.replace``. Published artifacts must never be modified in
+place, because workers may have them mapped. Publish a new version instead.
+"""
+
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, List, Optional, Union
+
+ARTIFACT_NAME = "model.joblib"
+CURRENT_FILE = "CURRENT"
+
+
+class ModelRegistry:
+    """
+    Versioned model artifacts under one directory.
+
+    Args:
+        root (str | Path): Registry directory.
+        mmap (bool): Memory-map model arrays on load.
+    """
+
+    def __init__(self, root: Union[str, Path], mmap: bool = True) -> None:
+        self.root = Path(root)
+        self.mmap = mmap
+
+    def versions(self) -> List[str]:
+        """
+        Published versions, sorted by name.
+        """
+        if not self.root.is_dir():
+            return []
+        return sorted(
+            entry.name
+            for entry in self.root.iterdir()
+            if entry.is_dir()
+            and not entry.name.startswith(".")
+            and (entry / ARTIFACT_NAME).is_file()
+        )
+
+    def current_version(self) -> Optional[str]:
+        """
+        The version named by CURRENT, or the last published version if
+        there is no CURRENT file; None if the registry is empty.
+        """
+        try:
+            version = (self.root / CURRENT_FILE).read_text().strip()
+        except FileNotFoundError:
+            versions = self.versions()
+            return versions[-1] if versions else None
+        return version or None
+
+    def artifact_path(self, version: str) -> Path:
+        return self.root / version / ARTIFACT_NAME
+
+    def load(self, version: str) -> Any:
+        """
+        Load one version, memory-mapping its arrays.
+
+        Raises:
+            FileNotFoundError: If the version has not been published.
+        """
+        import joblib
+
+        path = self.artifact_path(version)
+        if not path.is_file():
+            raise FileNotFoundError(
+                f"Model version {version!r} not found in {self.root}"
+            )
+        return joblib.load(path, mmap_mode="r" if self.mmap else None)
+
+    def publish(self, model: Any, version: str, activate: bool = True) -> Path:
+        """
+        Write ``model`` as a new version and (by default) make it current.
+
+        Args:
+            model (Any): Fitted classifier.
+            version (str): New version name; must not exist yet.
+            activate (bool): Point CURRENT at the new version.
+
+        Returns:
+            Path: Path of the written artifact.
+
+        Raises:
+            ValueError: If the version name is not a plain directory name.
+            FileExistsError: If the version already exists.
+        """
+        import joblib
+
+        if "/" in version or version.startswith("."):
+            raise ValueError(f"Invalid model version {version!r}")
+        target = self.root / version
+        if target.exists():
+            raise FileExistsError(f"Model version {version!r} already exists")
+        self.root.mkdir(parents=True, exist_ok=True)
+
+        staging = Path(tempfile.mkdtemp(prefix=f".{version}.", dir=self.root))
+        os.chmod(staging, 0o755)
+        # Uncompressed, so arrays can be memory-mapped on load.
+        joblib.dump(model, staging / ARTIFACT_NAME, compress=0)
+        os.rename(staging, target)
+        if activate:
+            self.activate(version)
+        return target / ARTIFACT_NAME
+
+    def activate(self, version: str) -> None:
+        """
+        Atomically point CURRENT at an already published version.
+        """
+        if not self.artifact_path(version).is_file():
+            raise FileNotFoundError(
+                f"Model version {version!r} not found in {self.root}"
+            )
+        fd, temporary = tempfile.mkstemp(prefix=".CURRENT.", dir=self.root)
+        with os.fdopen(fd, "w") as handle:
+            handle.write(version + "\n")
+        os.replace(temporary, self.root / CURRENT_FILE)
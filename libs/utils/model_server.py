@@ -0,0 +1,370 @@
+"""
+Model-backed go-out scoring for the AI service.
+
+A scikit-learn style classifier (anything with ``predict_proba`` and
+``classes_``) is loaded once per process from ``ML_MODEL_PATH``. Concurrent
+requests are grouped into micro-batches: the first request of a batch opens
+a window of ``ML_BATCH_WAIT_MS``, and the batch is scored with one
+``predict_proba`` call in a worker thread when the window closes or
+``ML_BATCH_MAX_SIZE`` rows have arrived. Per-request cost therefore stays
+roughly flat as traffic grows, at the price of at most one window of added
+latency.
+
+With ``ML_MODEL_DIR`` the model comes from a versioned
+:class:`~libs.utils.model_registry.ModelRegistry` instead. Its arrays are
+memory-mapped and shared by all workers on a host. A watcher polls the
+registry and swaps a newly activated version in between batches: batches in
+flight finish on the old model, and no request is dropped. Every prediction
+reports the version that scored it.
+
+Model contract: rows are the feature vectors built by
+:func:`libs.utils.ml_processor.preprocess_weather_data`, in :data:`FEATURES`
+order, and the positive ("go out") class is labelled 1, True or "Yes".
+Without a configured model the service keeps using the rules.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import pickle
+from pathlib import Path
+from typing import Any, List, Optional, Sequence, Tuple
+
+from apps.weather_service.core.config import settings
+from libs.utils.logger import get_logger
+from libs.utils.model_registry import ModelRegistry
+
+logger = get_logger(__name__)
+
+FEATURES = ("temperature", "is_bad_weather")
+POSITIVE_LABELS = (1, True, "Yes", "yes")
+
+
+def load_model(path: str) -> Any:
+    """
+    Load a pickled classifier (joblib format, arrays memory-mapped, when
+    joblib is installed).
+
+    Args:
+        path (str): Path of the model file.
+
+    Returns:
+        Any: The classifier.
+
+    Raises:
+        ValueError: If the object cannot score probabilities.
+    """
+    try:
+        import joblib
+    except ImportError:
+        with open(path, "rb") as handle:
+            model = pickle.load(handle)
+    else:
+        model = joblib.load(path, mmap_mode="r")
+    if not hasattr(model, "predict_proba") or not hasattr(model, "classes_"):
+        raise ValueError(
+            f"{path} does not contain a fitted classifier with predict_proba"
+        )
+    return model
+
+
+def positive_column(model: Any) -> int:
+    """
+    Index of the "go out" class among ``model.classes_``.
+
+    Raises:
+        ValueError: If no class is labelled as positive.
+    """
+    classes = list(model.classes_)
+    for label in POSITIVE_LABELS:
+        if label in classes:
+            return classes.index(label)
+    raise ValueError(
+        f"No positive class among {classes}; expected one of {POSITIVE_LABELS}"
+    )
+
+
+class MicroBatcher:
+    """
+    Groups concurrent scoring requests into single ``predict_proba`` calls.
+
+    Must be used from one event loop; the scoring itself runs in a worker
+    thread so the loop is not blocked. The model can be replaced with
+    :meth:`swap` at any time; each batch uses the model that was active
+    when it started.
+
+    Args:
+        model (Any): Fitted classifier.
+        version (str): Version reported with predictions from ``model``.
+        max_batch (int): Flush as soon as this many rows are pending.
+        max_wait (float): Longest a row waits for companions (seconds).
+    """
+
+    def __init__(
+        self,
+        model: Any,
+        version: str = "static",
+        max_batch: int = 64,
+        max_wait: float = 0.005,
+    ) -> None:
+        # (model, positive column, version), replaced as one reference
+        self._active: Tuple[Any, int, str] = (model, positive_column(model), version)
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._pending: List[Tuple[Sequence[float], asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+
+        self.batches = 0
+        self.rows = 0
+        self.swaps = 0
+
+    @property
+    def version(self) -> str:
+        return self._active[2]
+
+    def swap(self, model: Any, version: str) -> None:
+        """
+        Serve ``model`` from the next batch on.
+
+        Raises:
+            ValueError: If the model has no positive class.
+        """
+        self._active = (model, positive_column(model), version)
+        self.swaps += 1
+
+    def score(self, rows: Sequence[Sequence[float]]) -> Tuple[List[float], str]:
+        """
+        Probability of the positive class for each row, in one model call,
+        and the version of the model that produced them.
+        """
+        import numpy as np
+
+        model, column, version = self._active
+        matrix = np.asarray(rows, dtype=np.float64).reshape(len(rows), len(FEATURES))
+        return model.predict_proba(matrix)[:, column].tolist(), version
+
+    async def predict(self, features: Sequence[float]) -> Tuple[float, str]:
+        """
+        Probability that it is fine to go out, scored in the next micro-batch.
+
+        Args:
+            features (Sequence[float]): One feature vector.
+
+        Returns:
+            Tuple[float, str]: Probability of the positive class and model version.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((features, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    async def predict_many(
+        self, rows: Sequence[Sequence[float]]
+    ) -> Tuple[List[float], str]:
+        """
+        Score an already batched set of rows directly, in one model call.
+        """
+        if not len(rows):
+            return [], self.version
+        self.batches += 1
+        self.rows += len(rows)
+        return await asyncio.to_thread(self.score, rows)
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[Sequence[float], asyncio.Future]]) -> None:
+        try:
+            probabilities, version = await self.predict_many(
+                [features for features, _ in batch]
+            )
+        except Exception as e:
+            logger.error(
+                "Model scoring failed for a batch of %d rows: %s", len(batch), e
+            )
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), probability in zip(batch, probabilities):
+            if not future.done():
+                future.set_result((probability, version))
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "batches": self.batches,
+            "rows": self.rows,
+            "mean_batch_size": (
+                round(self.rows / self.batches, 2) if self.batches else 0.0
+            ),
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000,
+            "swaps": self.swaps,
+        }
+
+
+class ModelWatcher:
+    """
+    Polls a registry and swaps newly activated versions into a batcher.
+
+    Loading happens in a worker thread; a version that fails to load is
+    logged and skipped until CURRENT changes again, and the old model keeps
+    serving.
+
+    Args:
+        registry (ModelRegistry): Registry to watch.
+        batcher (MicroBatcher): Batcher to update.
+        interval (float): Seconds between polls.
+    """
+
+    def __init__(
+        self, registry: ModelRegistry, batcher: MicroBatcher, interval: float = 10.0
+    ) -> None:
+        self.registry = registry
+        self.batcher = batcher
+        self.interval = interval
+        self._failed: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def check(self) -> bool:
+        """
+        Swap in the current version if it changed.
+
+        Returns:
+            bool: True if a new version was swapped in.
+        """
+        version = await asyncio.to_thread(self.registry.current_version)
+        if version is None or version in (self.batcher.version, self._failed):
+            return False
+        try:
+            model = await asyncio.to_thread(self.registry.load, version)
+            self.batcher.swap(model, version)
+        except Exception as e:
+            self._failed = version
+            logger.error(
+                "Could not load model version %s, keeping %s: %s",
+                version,
+                self.batcher.version,
+                e,
+            )
+            return False
+        self._failed = None
+        logger.info("Swapped in model version %s", version)
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.check()
+            except Exception as e:
+                logger.error("Model registry poll failed: %s", e)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+_server: Optional[MicroBatcher] = None
+
+
+def get_model_server() -> Optional[MicroBatcher]:
+    """
+    The running micro-batcher, or None when decisions fall back to the rules.
+    """
+    return _server
+
+
+def _load_configured_model() -> Optional[Tuple[Any, str]]:
+    if settings.ML_MODEL_DIR:
+        registry = ModelRegistry(settings.ML_MODEL_DIR)
+        version = registry.current_version()
+        if version is None:
+            raise FileNotFoundError(f"No model published in {settings.ML_MODEL_DIR}")
+        return registry.load(version), version
+    if settings.ML_MODEL_PATH:
+        return load_model(settings.ML_MODEL_PATH), Path(settings.ML_MODEL_PATH).name
+    return None
+
+
+def start_model_server() -> Optional[MicroBatcher]:
+    """
+    Load the configured model once and start batching. Called from the
+    application lifespan; a missing or broken model falls back to the rules.
+
+    Returns:
+        MicroBatcher | None: The batcher, or None if no model is in use.
+    """
+    global _server
+    source = settings.ML_MODEL_DIR or settings.ML_MODEL_PATH
+    try:
+        loaded = _load_configured_model()
+        if loaded is None:
+            return None
+        model, version = loaded
+        _server = MicroBatcher(
+            model,
+            version=version,
+            max_batch=settings.ML_BATCH_MAX_SIZE,
+            max_wait=settings.ML_BATCH_WAIT_MS / 1000.0,
+        )
+    except Exception as e:
+        logger.error("Could not load model from %s, using rules: %s", source, e)
+        return None
+    logger.info("Loaded model %s version %s", source, version)
+    return _server
+
+
+def stop_model_server() -> None:
+    global _server
+    _server = None
+
+
+def start_model_watcher() -> Optional[ModelWatcher]:
+    """
+    Start hot reload from ``ML_MODEL_DIR`` for the running batcher. Called
+    from the application lifespan after :func:`start_model_server`.
+
+    Returns:
+        ModelWatcher | None: The watcher, or None without a registry or model.
+    """
+    if (
+        not settings.ML_MODEL_DIR
+        or _server is None
+        or settings.ML_MODEL_POLL_SECONDS <= 0
+    ):
+        return None
+    watcher = ModelWatcher(
+        ModelRegistry(settings.ML_MODEL_DIR), _server, settings.ML_MODEL_POLL_SECONDS
+    )
+    watcher.start()
+    return watcher
+
+
+async def stop_model_watcher(watcher: Optional[ModelWatcher]) -> None:
+    if watcher is not None:
+        await watcher.stop()
@@ -0,0 +1,167 @@
+"""
+Opt-in sampled request profiling.
+
+A configurable fraction of requests, plus any request whose debug header
+carries ``PROFILE_TOKEN``, runs under :mod:`cProfile`. The results are merged
+into one in-memory :class:`pstats.Stats`, which can be downloaded from
+``/admin/profile`` with the same token. This lets production hot paths be
+profiled without a redeploy; without a token only sampling is available.
+
+cProfile hooks a single thread, and only one profiler can be active at a
+time. So at most one request is profiled at once; samples that arrive while
+a profile is running are skipped and counted. The profile covers the event
+loop thread for the duration of the request, which means other coroutines
+running concurrently on the loop show up in it too. Code run in the worker
+threadpool (sync endpoints, database calls) does not.
+"""
+
+import cProfile
+import hmac
+import io
+import marshal
+import pstats
+import random
+import threading
+from typing import Awaitable, Callable, Dict, Mapping, Optional, TypeVar
+
+from apps.weather_service.core.config import settings
+
+T = TypeVar("T")
+
+
+def token_matches(value: Optional[str], token: Optional[str]) -> bool:
+    """
+    Constant-time check of a request header against a configured token.
+
+    Compares UTF-8 bytes: ``hmac.compare_digest`` rejects non-ASCII ``str``
+    arguments with a TypeError, and header values are client-controlled.
+
+    Args:
+        value (Optional[str]): Header value sent by the client.
+        token (Optional[str]): Configured token; None never matches.
+
+    Returns:
+        bool: True if both are set and equal.
+    """
+    if value is None or token is None:
+        return False
+    return hmac.compare_digest(value.encode(), token.encode())
+
+
+class RequestProfiler:
+    """
+    Decide which requests to profile, profile them and aggregate the results.
+
+    Args:
+        enabled (bool): Master switch; when False nothing is profiled.
+        sample_rate (float): Fraction of requests to profile (0.0 to 1.0).
+        header (str): Request header that forces profiling of that request.
+        token (Optional[str]): Value the debug header must carry; without a
+            token the header is ignored and only sampling applies.
+        rng (Callable[[], float]): Random source, replaceable in tests.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        sample_rate: float = 0.0,
+        header: str = "X-Debug-Profile",
+        token: Optional[str] = None,
+        rng: Callable[[], float] = random.random,
+    ) -> None:
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.header = header.lower()
+        self.token = token
+        self._rng = rng
+        self._active = threading.Lock()
+        self._lock = threading.Lock()
+        self._stats: Optional[pstats.Stats] = None
+        self.profiled = 0
+        self.skipped = 0
+
+    def wanted(self, headers: Mapping[str, str]) -> bool:
+        """
+        Whether the request with these headers should be profiled.
+        """
+        if not self.enabled:
+            return False
+        if token_matches(headers.get(self.header), self.token):
+            return True
+        return self.sample_rate > 0 and self._rng() < self.sample_rate
+
+    async def run(self, call: Callable[[], Awaitable[T]]) -> T:
+        """
+        Await ``call()`` under the profiler, or plainly if a profile is
+        already in progress.
+        """
+        if not self._active.acquire(blocking=False):
+            self.skipped += 1
+            return await call()
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+            try:
+                return await call()
+            finally:
+                profile.disable()
+        finally:
+            self._active.release()
+            self._merge(profile)
+
+    def _merge(self, profile: cProfile.Profile) -> None:
+        profile.create_stats()
+        if not profile.stats:
+            return
+        with self._lock:
+            if self._stats is None:
+                self._stats = pstats.Stats(profile)
+            else:
+                self._stats.add(profile)
+            self.profiled += 1
+
+    def dump(self) -> bytes:
+        """
+        Aggregated profile in the binary format written by
+        :meth:`pstats.Stats.dump_stats` (load with ``pstats.Stats(path)``
+        or snakeviz). Empty if nothing has been profiled yet.
+        """
+        with self._lock:
+            if self._stats is None:
+                return b""
+            return marshal.dumps(self._stats.stats)
+
+    def report(self, sort: str = "cumulative", limit: int = 50) -> str:
+        """
+        Aggregated profile as a ``pstats`` text table.
+        """
+        with self._lock:
+            if self._stats is None:
+                return "no requests profiled yet\n"
+            stream = io.StringIO()
+            self._stats.stream = stream
+            self._stats.sort_stats(sort).print_stats(limit)
+            return stream.getvalue()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats = None
+            self.profiled = 0
+            self.skipped = 0
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "header": self.header,
+            "profiled": self.profiled,
+            "skipped": self.skipped,
+        }
+
+
+profiler = RequestProfiler(
+    enabled=settings.PROFILE_ENABLED,
+    sample_rate=settings.PROFILE_SAMPLE_RATE,
+    header=settings.PROFILE_HEADER,
+    token=settings.PROFILE_TOKEN,
+)
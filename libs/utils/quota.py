@@ -0,0 +1,306 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Callable, Dict, Iterator, List, Optional
+
+
+class Priority(IntEnum):
+    """Upstream call priority; lower values are served first."""
+
+    INTERACTIVE = 0
+    BATCH = 1
+    BACKGROUND = 2
+
+
+# Priority of upstream calls made from the current context. Endpoints and
+# background jobs set it; tasks created inside inherit it.
+current_priority: ContextVar[Priority] = ContextVar(
+    "upstream_priority", default=Priority.INTERACTIVE
+)
+
+
+@contextmanager
+def upstream_priority(priority: Priority) -> Iterator[None]:
+    """
+    Run the enclosed upstream calls at ``priority``.
+
+    Args:
+        priority (Priority): Priority for calls made inside the block.
+    """
+    token = current_priority.set(priority)
+    try:
+        yield
+    finally:
+        current_priority.reset(token)
+
+
+class QuotaExceeded(Exception):
+    """
+    Raised when an upstream call is shed or cannot be scheduled in time.
+
+    Attributes:
+        retry_after (float): Seconds until budget is expected to be available.
+    """
+
+    def __init__(self, message: str, retry_after: float) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket holding ``capacity`` tokens refilled evenly
+    over ``period`` seconds.
+    """
+
+    def __init__(
+        self, capacity: int, period: float, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.capacity = float(capacity)
+        self.rate = capacity / period
+        self._clock = clock
+        self._tokens = float(capacity)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    @property
+    def remaining(self) -> float:
+        """Tokens currently available."""
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+    def try_take(self, floor: float = 0.0) -> float:
+        """
+        Take one token if that leaves at least ``floor`` tokens.
+
+        Args:
+            floor (float): Tokens that must remain after taking one.
+
+        Returns:
+            float: 0.0 if a token was taken, otherwise seconds until one can be.
+        """
+        with self._lock:
+            self._refill()
+            needed = floor + 1.0
+            if self._tokens >= needed:
+                self._tokens -= 1.0
+                return 0.0
+            return (needed - self._tokens) / self.rate
+
+    def refund(self) -> None:
+        """Return a token taken by :meth:`try_take`."""
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + 1.0)
+
+    def drain(self) -> None:
+        """Empty the bucket, e.g. after the upstream answered 429."""
+        with self._lock:
+            self._refill()
+            self._tokens = 0.0
+
+
+class QuotaScheduler:
+    """
+    Schedules upstream calls against per-API-key minute and day budgets.
+
+    Calls are admitted in priority order: interactive calls may spend the
+    whole budget; batch and background calls may not dip into the last
+    ``low_priority_reserve`` fraction of it. Background calls are shed
+    immediately when they cannot run, batch calls are delayed up to their
+    maximum wait, and interactive calls wait briefly before failing with
+    :class:`QuotaExceeded` instead of hitting a 429 upstream.
+    """
+
+    def __init__(
+        self,
+        calls_per_minute: int,
+        calls_per_day: int = 0,
+        low_priority_reserve: float = 0.2,
+        max_wait: Optional[Dict[Priority, float]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.calls_per_minute = calls_per_minute
+        self.calls_per_day = calls_per_day
+        self.low_priority_reserve = low_priority_reserve
+        self.max_wait = {
+            Priority.INTERACTIVE: 2.0,
+            Priority.BATCH: 30.0,
+            Priority.BACKGROUND: 0.0,
+            **(max_wait or {}),
+        }
+        self._clock = clock
+        self._minute: Dict[str, TokenBucket] = {}
+        self._day: Dict[str, TokenBucket] = {}
+        self._queues: Dict[str, List[list]] = {}
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+        self.admitted = 0
+        self.shed = 0
+
+    def _buckets(self, api_key: str) -> List[TokenBucket]:
+        with self._lock:
+            if api_key not in self._minute:
+                self._minute[api_key] = TokenBucket(
+                    self.calls_per_minute, 60.0, self._clock
+                )
+                if self.calls_per_day > 0:
+                    self._day[api_key] = TokenBucket(
+                        self.calls_per_day, 86400.0, self._clock
+                    )
+            buckets = [self._minute[api_key]]
+            if api_key in self._day:
+                buckets.append(self._day[api_key])
+            return buckets
+
+    def _try_take(self, api_key: str, priority: Priority) -> float:
+        """
+        Take one token from every budget of ``api_key`` or report the wait.
+
+        Returns:
+            float: 0.0 if admitted, otherwise seconds until a retry may succeed.
+        """
+        reserve = 0.0 if priority == Priority.INTERACTIVE else self.low_priority_reserve
+        buckets = self._buckets(api_key)
+        with self._lock:
+            taken: List[TokenBucket] = []
+            for bucket in buckets:
+                wait = bucket.try_take(bucket.capacity * reserve)
+                if wait > 0.0:
+                    # All budgets or none: return tokens already taken
+                    for previous in taken:
+                        previous.refund()
+                    return wait
+                taken.append(bucket)
+            self.admitted += 1
+        return 0.0
+
+    def _reject(self, priority: Priority, retry_after: float) -> QuotaExceeded:
+        self.shed += 1
+        return QuotaExceeded(
+            f"Upstream quota exhausted for {priority.name.lower()} calls", retry_after
+        )
+
+    async def acquire(self, api_key: str, priority: Optional[Priority] = None) -> None:
+        """
+        Wait for permission to make one upstream call.
+
+        Args:
+            api_key (str): API key whose budget is charged.
+            priority (Priority): Defaults to :data:`current_priority`.
+
+        Raises:
+            QuotaExceeded: If the call is shed or its maximum wait would be exceeded.
+        """
+        priority = current_priority.get() if priority is None else priority
+        deadline = self._clock() + self.max_wait[priority]
+        queue = self._queues.setdefault(api_key, [])
+
+        if not queue:
+            wait = self._try_take(api_key, priority)
+            if wait == 0.0:
+                return
+            if wait > self.max_wait[priority]:
+                raise self._reject(priority, wait)
+
+        entry = [int(priority), next(self._sequence), asyncio.Event()]
+        heapq.heappush(queue, entry)
+        try:
+            while True:
+                remaining = deadline - self._clock()
+                if queue[0] is entry:
+                    wait = self._try_take(api_key, priority)
+                    if wait == 0.0:
+                        return
+                    if wait > remaining:
+                        raise self._reject(priority, wait)
+                elif remaining <= 0:
+                    raise self._reject(priority, self.max_wait[priority])
+                else:
+                    wait = remaining
+                entry[2].clear()
+                try:
+                    await asyncio.wait_for(entry[2].wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            if entry in queue:
+                queue.remove(entry)
+                heapq.heapify(queue)
+            if queue:
+                queue[0][2].set()
+
+    def acquire_sync(self, api_key: str, priority: Optional[Priority] = None) -> None:
+        """
+        Blocking variant of :meth:`acquire` for synchronous callers.
+
+        Sync callers do not join the async priority queue; they wait for a
+        token up to their priority's maximum wait.
+
+        Raises:
+            QuotaExceeded: If the call is shed or its maximum wait would be exceeded.
+        """
+        priority = current_priority.get() if priority is None else priority
+        deadline = self._clock() + self.max_wait[priority]
+        while True:
+            wait = self._try_take(api_key, priority)
+            if wait == 0.0:
+                return
+            remaining = deadline - self._clock()
+            if wait > remaining:
+                raise self._reject(priority, wait)
+            time.sleep(wait)
+
+    def try_acquire(
+        self, api_key: str, priority: Priority = Priority.BACKGROUND
+    ) -> bool:
+        """
+        Take budget for one optional call only if it is available right now.
+
+        Returns:
+            bool: Whether the call was admitted.
+        """
+        return self._try_take(api_key, priority) == 0.0
+
+    def penalize(self, api_key: str) -> None:
+        """
+        Drain the minute budget after the upstream rejected a call with 429.
+        """
+        self._buckets(api_key)[0].drain()
+
+    def stats(self) -> Dict:
+        """
+        Return queue depth and remaining budget per API key.
+
+        Keys are reported by their last four characters only.
+
+        Returns:
+            dict: Admitted/shed counters and per-key queue depth and budgets.
+        """
+        keys = {}
+        for api_key, bucket in list(self._minute.items()):
+            day = self._day.get(api_key)
+            keys[f"...{api_key[-4:]}"] = {
+                "queue_depth": len(self._queues.get(api_key, [])),
+                "minute_remaining": int(bucket.remaining),
+                "day_remaining": int(day.remaining) if day is not None else None,
+            }
+        return {
+            "queue_depth": sum(len(queue) for queue in self._queues.values()),
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "keys": keys,
+        }
@@ -0,0 +1,156 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, Optional
+
+from apps.weather_service.core.config import settings
+from libs.utils.cache import TTLCache
+from libs.utils.logger import get_logger
+from libs.utils.quota import Priority, upstream_priority
+from libs.utils.upstream import loader_for_key, weather_cache
+
+logger = get_logger(__name__)
+
+
+class RefreshScheduler:
+    """
+    Refreshes the most requested cache keys before they expire.
+
+    Every ``interval`` seconds the ``top_n`` hottest keys are checked, and any
+    that expire within ``refresh_ahead`` seconds (or are already stale) are
+    reloaded in the background. Reloads draw from a token bucket refilled at
+    ``budget_per_minute``, so the scheduler never spends more upstream calls
+    than it is allowed; keys that do not fit wait for the next cycle.
+    """
+
+    def __init__(
+        self,
+        cache: TTLCache,
+        loader_factory: Callable[[Hashable], Callable[[], Awaitable]],
+        top_n: int = 20,
+        interval: float = 15.0,
+        refresh_ahead: float = 30.0,
+        budget_per_minute: int = 30,
+    ) -> None:
+        self.cache = cache
+        self.loader_factory = loader_factory
+        self.top_n = top_n
+        self.interval = interval
+        self.refresh_ahead = refresh_ahead
+        self.budget_per_minute = budget_per_minute
+
+        self._tokens = float(budget_per_minute)
+        self._task: Optional[asyncio.Task] = None
+
+        self.refreshed = 0
+        self.failed = 0
+        self.skipped_for_budget = 0
+
+    def _due(self, key: Hashable) -> bool:
+        expires_in = self.cache.expires_in(key)
+        return expires_in is not None and expires_in <= self.refresh_ahead
+
+    async def run_once(self) -> int:
+        """
+        Run one refresh cycle.
+
+        Returns:
+            int: Number of keys refreshed.
+        """
+        self._tokens = min(
+            float(self.budget_per_minute),
+            self._tokens + self.budget_per_minute * self.interval / 60.0,
+        )
+
+        due = [key for key in self.cache.hot_keys(self.top_n) if self._due(key)]
+        allowed = due[: int(self._tokens)]
+        self.skipped_for_budget += len(due) - len(allowed)
+        self._tokens -= len(allowed)
+        self.cache.decay()
+
+        # Refreshes are background work: shed first when upstream quota is short
+        with upstream_priority(Priority.BACKGROUND):
+            results = await asyncio.gather(
+                *(
+                    self.cache.refresh_async(key, self.loader_factory(key))
+                    for key in allowed
+                ),
+                return_exceptions=True,
+            )
+        failures = [result for result in results if isinstance(result, Exception)]
+        self.failed += len(failures)
+        self.refreshed += len(results) - len(failures)
+        if failures:
+            logger.warning(
+                "Background refresh failed for %d of %d cities",
+                len(failures),
+                len(allowed),
+            )
+        return len(results) - len(failures)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error("Refresh cycle failed: %s", e)
+
+    def start(self) -> None:
+        """Start the refresh loop on the running event loop."""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Cancel the refresh loop."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return a snapshot of the scheduler counters.
+
+        Returns:
+            dict: Refreshed/failed/skipped counts and the remaining budget.
+        """
+        return {
+            "refreshed": self.refreshed,
+            "failed": self.failed,
+            "skipped_for_budget": self.skipped_for_budget,
+            "budget_remaining": int(self._tokens),
+        }
+
+
+def start_refresh_scheduler() -> Optional[RefreshScheduler]:
+    """
+    Create and start the hot-city refresh scheduler from settings.
+    Called from the application lifespan.
+
+    Returns:
+        RefreshScheduler | None: The running scheduler, or None if disabled.
+    """
+    if not settings.REFRESH_ENABLED or settings.WEATHER_CACHE_TTL <= 0:
+        return None
+
+    scheduler = RefreshScheduler(
+        weather_cache,
+        lambda key: loader_for_key(settings.OPENWEATHER_API_KEY, key),
+        top_n=settings.REFRESH_TOP_N,
+        interval=settings.REFRESH_INTERVAL,
+        refresh_ahead=settings.REFRESH_AHEAD,
+        budget_per_minute=settings.REFRESH_BUDGET_PER_MINUTE,
+    )
+    scheduler.start()
+    return scheduler
+
+
+async def stop_refresh_scheduler(scheduler: Optional[RefreshScheduler]) -> None:
+    """
+    Stop a scheduler returned by :func:`start_refresh_scheduler`.
+    """
+    if scheduler is not None:
+        await scheduler.stop()
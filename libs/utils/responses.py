@@ -0,0 +1,152 @@
+"""
+Fast JSON rendering and conditional GET for polled weather routes.
+
+A weather response is a pure function of the parsed observation: the
+decision only reads the temperature, feels-like temperature and condition,
+and the text names the city as requested. :func:`observation_etag` hashes
+exactly those inputs plus the upstream observation time (``dt``), so the
+ETag changes exactly when the body would.
+
+:func:`conditional_response` answers ``If-None-Match`` hits with ``304``
+before the decision runs, and otherwise serves the body from a bounded cache
+of pre-rendered bytes keyed by ETag, so repeated polls for the same
+(city, observation) pair are rendered once.
+
+JSON is rendered with ``orjson`` when it is installed and with compact
+``json.dumps`` otherwise.
+"""
+
+import hashlib
+import json
+import time
+from typing import Any, Callable, Dict, Mapping, Optional
+
+from starlette.responses import JSONResponse, Response
+
+from apps.weather_service.core.config import settings
+from libs.models.observation import WeatherObservation
+from libs.utils.cache import TTLCache
+from libs.utils.metrics import STAGE_SERIALIZATION, counter
+
+# Bump when the rendering of a route changes, so clients drop old ETags.
+RESPONSE_VERSION = "1"
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+# Pre-rendered bodies by ETag. Entries never go stale (the ETag is the
+# content), so the TTL only bounds how long unused bodies are kept.
+rendered_responses = TTLCache(
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES, ttl=3600.0
+)
+
+CONDITIONAL_RESPONSES = counter(
+    "conditional_responses_total",
+    "Polled weather responses by outcome: not_modified, cached or rendered.",
+    ("outcome",),
+)
+NOT_MODIFIED = CONDITIONAL_RESPONSES.labels("not_modified")
+CACHED = CONDITIONAL_RESPONSES.labels("cached")
+RENDERED = CONDITIONAL_RESPONSES.labels("rendered")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Render ``content`` as compact UTF-8 JSON.
+    """
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with :func:`dumps`, timed as the serialization stage."""
+
+    def render(self, content: Any) -> bytes:
+        started = time.perf_counter()
+        body = dumps(content)
+        STAGE_SERIALIZATION.observe(time.perf_counter() - started)
+        return body
+
+
+def observation_etag(route: str, observation: WeatherObservation) -> str:
+    """
+    Strong ETag for ``route`` rendered from ``observation``.
+
+    Args:
+        route (str): Route name; different routes render different bodies.
+        observation (WeatherObservation): The parsed observation.
+
+    Returns:
+        str: Quoted ETag value.
+    """
+    parts = (
+        RESPONSE_VERSION,
+        route,
+        observation.city,
+        observation.observed_at,
+        observation.temperature,
+        observation.feels_like,
+        observation.condition,
+        observation.description,
+    )
+    digest = hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether an ``If-None-Match`` header matches ``etag`` (weak comparison).
+    """
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def conditional_response(
+    request_headers: Mapping[str, str],
+    etag: str,
+    render: Callable[[], Any],
+    max_age: Optional[float] = None,
+) -> Response:
+    """
+    ``304`` if the client already has ``etag``, else the pre-rendered body.
+
+    Args:
+        request_headers (Mapping[str, str]): Incoming request headers.
+        etag (str): ETag of the response, from :func:`observation_etag`.
+        render (Callable[[], Any]): Builds the JSON-serializable content;
+            only called when the body is not cached yet.
+        max_age (float): Seconds the client may reuse the response without
+            asking again (the observation's remaining freshness).
+
+    Returns:
+        Response: ``304`` with no body, or ``200`` with the JSON body.
+    """
+    headers: Dict[str, str] = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={max(0, int(max_age or 0))}",
+    }
+    if etag_matches(request_headers.get("if-none-match"), etag):
+        NOT_MODIFIED.inc()
+        return Response(status_code=304, headers=headers)
+
+    body = rendered_responses.get(etag)
+    if body is None:
+        RENDERED.inc()
+        content = render()
+        started = time.perf_counter()
+        body = dumps(content)
+        STAGE_SERIALIZATION.observe(time.perf_counter() - started)
+        rendered_responses.set(etag, body)
+    else:
+        CACHED.inc()
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,266 @@
+"""
+Host-wide cache shared by every worker process, in a memory-mapped file.
+
+The file holds a fixed number of fixed-size records, so it never grows or
+needs compaction. A key hashes (with a stable hash, not Python's per-process
+``hash``) to a window of :data:`PROBES` consecutive slots. Writers reuse the
+slot already holding the key, else an empty one, else the oldest in the
+window. Values are stored as JSON, so anything cached here must be
+JSON-serializable. Values larger than a record are not shared.
+
+Concurrency:
+
+- writers lock the record they write with ``fcntl.lockf`` (across
+  processes) and a thread lock (within one);
+- readers take no lock. Each record starts with a sequence number that a
+  writer makes odd while it writes and even when done, plus a CRC32 of the
+  contents. A read that sees an odd or changed sequence, or a bad CRC, is
+  retried and then treated as a miss, so a torn record is never returned.
+
+Record layout (little-endian)::
+
+    seq u32 | crc u32 | key hash u64 | stored_at f64
+    key len u16 | value len u32 | pad 2
+    key bytes | value bytes
+"""
+
+import fcntl
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+MAGIC = b"WCACHE01"
+FILE_HEADER = struct.Struct("<8sII")
+FILE_HEADER_SIZE = 64
+RECORD_HEADER = struct.Struct("<IIQdHI2x")
+SEQ = struct.Struct("<I")
+PROBES = 4
+READ_ATTEMPTS = 3
+
+
+def _key_hash(key: bytes) -> int:
+    # Never 0, which marks an empty slot
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little") or 1
+
+
+class SharedCache:
+    """
+    Fixed-size key/value store in a file mapped by every process on a host.
+
+    Args:
+        path (str | Path): Cache file; created if missing.
+        slots (int): Number of records.
+        record_size (int): Bytes per record, header included.
+
+    Raises:
+        ValueError: If an existing file was created with another geometry.
+    """
+
+    def __init__(
+        self, path: Union[str, Path], slots: int = 4096, record_size: int = 4096
+    ) -> None:
+        if slots < PROBES or record_size <= RECORD_HEADER.size:
+            raise ValueError(
+                f"SharedCache needs at least {PROBES} slots "
+                f"of more than {RECORD_HEADER.size} bytes"
+            )
+        self.path = Path(path)
+        self.slots = slots
+        self.record_size = record_size
+        self.max_item_size = record_size - RECORD_HEADER.size
+        self._write_lock = threading.Lock()
+
+        size = FILE_HEADER_SIZE + slots * record_size
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            self._init_file(size)
+            self._map = mmap.mmap(self._fd, size)
+        except BaseException:
+            os.close(self._fd)
+            raise
+
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.oversize = 0
+        self.torn_reads = 0
+
+    def _init_file(self, size: int) -> None:
+        """Create the file header, or check it, under an exclusive lock."""
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, FILE_HEADER_SIZE, 0)
+        try:
+            header = os.pread(self._fd, FILE_HEADER.size, 0)
+            if len(header) < FILE_HEADER.size:
+                os.ftruncate(self._fd, size)
+                os.pwrite(
+                    self._fd, FILE_HEADER.pack(MAGIC, self.slots, self.record_size), 0
+                )
+                return
+            magic, slots, record_size = FILE_HEADER.unpack(header)
+            if (magic, slots, record_size) != (MAGIC, self.slots, self.record_size):
+                raise ValueError(
+                    f"{self.path} holds a cache with {slots} slots of "
+                    f"{record_size} bytes, not {self.slots} of {self.record_size}; "
+                    "remove it or change the settings"
+                )
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, FILE_HEADER_SIZE, 0)
+
+    def _offset(self, slot: int) -> int:
+        return FILE_HEADER_SIZE + slot * self.record_size
+
+    def _window(self, key_hash: int):
+        first = key_hash % self.slots
+        return [(first + i) % self.slots for i in range(PROBES)]
+
+    def _read_slot(self, slot: int) -> Optional[Tuple[int, float, bytes, bytes]]:
+        """
+        Consistent ``(key hash, stored_at, key, value)`` of a slot, or None if
+        it is empty or could not be read consistently.
+        """
+        offset = self._offset(slot)
+        for _ in range(READ_ATTEMPTS):
+            seq, crc, key_hash, stored_at, key_len, value_len = (
+                RECORD_HEADER.unpack_from(self._map, offset)
+            )
+            if seq & 1:
+                time.sleep(0)
+                continue
+            if key_hash == 0:
+                return None
+            if key_len + value_len > self.max_item_size:
+                continue
+            start = offset + RECORD_HEADER.size
+            body = self._map[start : start + key_len + value_len]
+            if SEQ.unpack_from(self._map, offset)[0] != seq:
+                continue
+            if zlib.crc32(body, zlib.crc32(struct.pack("<d", stored_at))) != crc:
+                continue
+            return key_hash, stored_at, body[:key_len], body[key_len:]
+        self.torn_reads += 1
+        return None
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """
+        Return ``(value, age in seconds)`` of the newest entry for ``key``, or None.
+        """
+        encoded = key.encode("utf-8")
+        key_hash = _key_hash(encoded)
+        best: Optional[Tuple[float, bytes]] = None
+        for slot in self._window(key_hash):
+            record = self._read_slot(slot)
+            if record is None or record[0] != key_hash or record[2] != encoded:
+                continue
+            if best is None or record[1] > best[0]:
+                best = (record[1], record[3])
+        if best is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(best[1]), max(0.0, time.time() - best[0])
+
+    def set(self, key: str, value: Any, stored_at: Optional[float] = None) -> bool:
+        """
+        Store ``value`` under ``key``.
+
+        Args:
+            key (str): Cache key.
+            value (Any): JSON-serializable value.
+            stored_at (float): Wall-clock time the value was produced; now by default.
+
+        Returns:
+            bool: False if the value does not fit in a record.
+        """
+        encoded = key.encode("utf-8")
+        payload = json.dumps(value, separators=(",", ":")).encode("utf-8")
+        if len(encoded) + len(payload) > self.max_item_size:
+            self.oversize += 1
+            return False
+        stored_at = time.time() if stored_at is None else stored_at
+        key_hash = _key_hash(encoded)
+        with self._write_lock:
+            slot = self._choose_slot(key_hash, encoded)
+            offset = self._offset(slot)
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, self.record_size, offset)
+            try:
+                writing = self._begin_write(offset)
+                body = encoded + payload
+                start = offset + RECORD_HEADER.size
+                self._map[start : start + len(body)] = body
+                crc = zlib.crc32(body, zlib.crc32(struct.pack("<d", stored_at)))
+                RECORD_HEADER.pack_into(
+                    self._map,
+                    offset,
+                    writing,
+                    crc,
+                    key_hash,
+                    stored_at,
+                    len(encoded),
+                    len(payload),
+                )
+                SEQ.pack_into(self._map, offset, (writing + 1) & 0xFFFFFFFF)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, self.record_size, offset)
+        self.writes += 1
+        return True
+
+    def _begin_write(self, offset: int) -> int:
+        """Mark a record as being written (odd sequence); returns that sequence."""
+        writing = ((SEQ.unpack_from(self._map, offset)[0] + 1) & 0xFFFFFFFF) | 1
+        SEQ.pack_into(self._map, offset, writing)
+        return writing
+
+    def _choose_slot(self, key_hash: int, encoded: bytes) -> int:
+        """
+        The slot holding ``key``, else an empty one, else the oldest in its window.
+        """
+        oldest: Optional[Tuple[float, int]] = None
+        empty: Optional[int] = None
+        for slot in self._window(key_hash):
+            record = self._read_slot(slot)
+            if record is None:
+                if empty is None:
+                    empty = slot
+                continue
+            if record[0] == key_hash and record[2] == encoded:
+                return slot
+            if oldest is None or record[1] < oldest[0]:
+                oldest = (record[1], slot)
+        if empty is not None:
+            return empty
+        return oldest[1]  # type: ignore[index]
+
+    def clear(self) -> None:
+        """Empty every record."""
+        with self._write_lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX)
+            try:
+                for slot in range(self.slots):
+                    offset = self._offset(slot)
+                    writing = self._begin_write(offset)
+                    RECORD_HEADER.pack_into(self._map, offset, writing, 0, 0, 0.0, 0, 0)
+                    SEQ.pack_into(self._map, offset, (writing + 1) & 0xFFFFFFFF)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN)
+
+    def close(self) -> None:
+        self._map.close()
+        os.close(self._fd)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "slots": self.slots,
+            "record_size": self.record_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "oversize": self.oversize,
+            "torn_reads": self.torn_reads,
+        }
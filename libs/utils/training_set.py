@@ -0,0 +1,314 @@
+"""
+Streaming training-set builder.
+
+Reads ``weather_data`` in fixed-size chunks through a server-side cursor and
+turns each chunk into feature arrays, vectorized with the same rules as
+:func:`libs.utils.ml_processor.preprocess_weather_data`. Each chunk is
+written as one NumPy ``.npz`` shard as soon as it is built, so memory use is
+bounded by the chunk size however large the table is.
+
+Layout::
+
+    <output>/
+        manifest.json        # columns, dtypes, shards, row counts, last id
+        part-00000.npz       # one array per column
+        part-00001.npz
+
+The directory is written under a temporary name and renamed into place when
+complete, so a half-written set is never picked up for training.
+
+Columns:
+
+- ``features``: float64 matrix in :data:`~libs.utils.model_server.FEATURES` order;
+- ``label``: 1 if the current rules say go out, else 0 (a bootstrap label
+  until observed outcomes are recorded);
+- ``id``, ``observed_at`` (-1 if unknown), ``feels_like`` (NaN if unknown)
+  and ``condition`` (code from
+  :func:`~libs.utils.decision_engine.encode_conditions`), for splits and
+  alternative labels.
+
+Usage:
+    python -m libs.utils.training_set --output data/training/2024-06-01
+    python -m libs.utils.training_set --output data/training/recent --after-id 1200000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Sequence, Union
+
+from sqlalchemy import select
+
+from libs.models.weather_model import WeatherData
+from libs.utils.decision_engine import (
+    bad_condition_mask,
+    decide_batch,
+    encode_conditions,
+)
+from libs.utils.logger import get_logger
+from libs.utils.model_server import FEATURES
+
+if TYPE_CHECKING:
+    import numpy as np
+    from sqlalchemy.engine import Engine
+
+logger = get_logger(__name__)
+
+DEFAULT_CHUNK_ROWS = 50_000
+MANIFEST_NAME = "manifest.json"
+COLUMNS = ("features", "label", "id", "observed_at", "feels_like", "condition")
+SOURCE_COLUMNS = (
+    WeatherData.id,
+    WeatherData.temperature,
+    WeatherData.feels_like,
+    WeatherData.condition,
+    WeatherData.observed_at,
+)
+
+
+def training_query(
+    after_id: Optional[int] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+):
+    """
+    Rows to export, in primary-key order so a run can be continued with
+    ``after_id``.
+    """
+    query = select(*SOURCE_COLUMNS).order_by(WeatherData.id)
+    if after_id is not None:
+        query = query.where(WeatherData.id > after_id)
+    if start is not None:
+        query = query.where(WeatherData.created_at >= start)
+    if end is not None:
+        query = query.where(WeatherData.created_at < end)
+    return query
+
+
+def chunk_to_columns(rows: Sequence[Sequence[Any]]) -> Dict[str, np.ndarray]:
+    """
+    Vectorize one chunk of ``(id, temperature, feels_like, condition,
+    observed_at)`` rows.
+
+    Missing temperatures become 0°C and ``is_bad_weather`` is 1 for the bad
+    conditions, as in :func:`~libs.utils.ml_processor.preprocess_weather_data`.
+
+    Args:
+        rows (Sequence[Sequence[Any]]): Rows from :func:`training_query`.
+
+    Returns:
+        Dict[str, np.ndarray]: One array per entry of :data:`COLUMNS`.
+    """
+    import numpy as np
+
+    ids, temperatures, feels_like, conditions, observed_at = zip(*rows)
+    temperature = np.array(temperatures, dtype=np.float64)
+    feels = np.array(feels_like, dtype=np.float64)  # None -> NaN
+    codes = encode_conditions(conditions)
+
+    features = np.empty((len(rows), len(FEATURES)), dtype=np.float64)
+    features[:, 0] = np.nan_to_num(temperature, nan=0.0)
+    features[:, 1] = bad_condition_mask()[codes.astype(np.intp)]
+
+    go_out, _ = decide_batch(temperature, feels, codes)
+    return {
+        "features": features,
+        "label": go_out.astype(np.int8),
+        "id": np.array(ids, dtype=np.int64),
+        "observed_at": np.array(
+            [-1 if value is None else value for value in observed_at], dtype=np.int64
+        ),
+        "feels_like": feels,
+        "condition": codes,
+    }
+
+
+def iter_chunks(
+    engine: Engine, query, chunk_rows: int = DEFAULT_CHUNK_ROWS
+) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    Stream ``query`` through a server-side cursor, yielding vectorized chunks.
+    """
+    with engine.connect() as connection:
+        result = connection.execution_options(
+            stream_results=True, yield_per=chunk_rows
+        ).execute(query)
+        for rows in result.partitions():
+            yield chunk_to_columns(rows)
+
+
+def build_training_set(
+    engine: Engine,
+    output: Union[str, Path],
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    after_id: Optional[int] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    compress: bool = False,
+) -> Dict[str, Any]:
+    """
+    Export ``weather_data`` to a sharded columnar training set.
+
+    Args:
+        engine (Engine): Database to read from.
+        output (str | Path): Directory to create; must not exist yet.
+        chunk_rows (int): Rows per database fetch and per shard.
+        after_id (int): Only export rows with a larger id.
+        start (datetime): Optional lower bound on ``created_at``.
+        end (datetime): Optional upper bound on ``created_at``.
+        compress (bool): Write compressed shards (smaller, slower to load).
+
+    Returns:
+        dict: The manifest.
+
+    Raises:
+        FileExistsError: If ``output`` already exists.
+    """
+    import numpy as np
+
+    output = Path(output)
+    if output.exists():
+        raise FileExistsError(f"{output} already exists")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    save = np.savez_compressed if compress else np.savez
+
+    staging = Path(tempfile.mkdtemp(prefix=f".{output.name}.", dir=output.parent))
+    shards: List[Dict[str, Any]] = []
+    last_id = after_id
+    dtypes: Dict[str, str] = {}
+    try:
+        for chunk in iter_chunks(
+            engine, training_query(after_id, start, end), chunk_rows
+        ):
+            name = f"part-{len(shards):05d}.npz"
+            save(staging / name, **chunk)
+            rows = len(chunk["id"])
+            last_id = int(chunk["id"][-1])
+            dtypes = {column: str(array.dtype) for column, array in chunk.items()}
+            shards.append({"file": name, "rows": rows, "last_id": last_id})
+            logger.info("Wrote %s (%d rows, up to id %d)", name, rows, last_id)
+
+        manifest = {
+            "columns": list(COLUMNS),
+            "features": list(FEATURES),
+            "dtypes": dtypes,
+            "rows": sum(shard["rows"] for shard in shards),
+            "after_id": after_id,
+            "last_id": last_id,
+            "start": start.isoformat() if start else None,
+            "end": end.isoformat() if end else None,
+            "shards": shards,
+        }
+        (staging / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2))
+        os.chmod(staging, 0o755)
+        os.rename(staging, output)
+    except BaseException:
+        for path in staging.iterdir():
+            path.unlink()
+        staging.rmdir()
+        raise
+    logger.info(
+        "Training set %s: %d rows in %d shards", output, manifest["rows"], len(shards)
+    )
+    return manifest
+
+
+def read_manifest(path: Union[str, Path]) -> Dict[str, Any]:
+    return json.loads((Path(path) / MANIFEST_NAME).read_text())
+
+
+def iter_shards(
+    path: Union[str, Path], columns: Sequence[str] = COLUMNS
+) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    Yield the training set one shard at a time, for out-of-core training
+    (e.g. ``partial_fit``).
+    """
+    import numpy as np
+
+    path = Path(path)
+    for shard in read_manifest(path)["shards"]:
+        with np.load(path / shard["file"]) as arrays:
+            yield {column: arrays[column] for column in columns}
+
+
+def load_training_set(
+    path: Union[str, Path], columns: Sequence[str] = ("features", "label")
+) -> Dict[str, np.ndarray]:
+    """
+    Load selected columns of a whole training set into memory.
+
+    Returns:
+        Dict[str, np.ndarray]: Concatenated arrays; empty arrays for an empty set.
+    """
+    import numpy as np
+
+    parts: Dict[str, List[np.ndarray]] = {column: [] for column in columns}
+    for shard in iter_shards(path, columns):
+        for column in columns:
+            parts[column].append(shard[column])
+    if not any(parts.values()):
+        width = {"features": (0, len(FEATURES))}
+        return {column: np.empty(width.get(column, (0,))) for column in columns}
+    return {column: np.concatenate(arrays) for column, arrays in parts.items()}
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--output", type=Path, required=True, help="Directory to create"
+    )
+    parser.add_argument(
+        "--chunk-rows",
+        type=int,
+        default=DEFAULT_CHUNK_ROWS,
+        help="Rows per fetch and shard",
+    )
+    parser.add_argument(
+        "--after-id", type=int, default=None, help="Continue after this row id"
+    )
+    parser.add_argument(
+        "--start",
+        type=datetime.fromisoformat,
+        default=None,
+        help="ISO lower bound on created_at",
+    )
+    parser.add_argument(
+        "--end",
+        type=datetime.fromisoformat,
+        default=None,
+        help="ISO upper bound on created_at",
+    )
+    parser.add_argument("--compress", action="store_true", help="Compress shards")
+    args = parser.parse_args(argv)
+    if args.chunk_rows <= 0:
+        parser.error("--chunk-rows must be positive")
+    return args
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    args = parse_args(argv)
+    from apps.weather_service.db.session import engine
+
+    manifest = build_training_set(
+        engine,
+        args.output,
+        args.chunk_rows,
+        args.after_id,
+        args.start,
+        args.end,
+        args.compress,
+    )
+    shards = len(manifest["shards"])
+    print(f"wrote {manifest['rows']} rows in {shards} shards to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
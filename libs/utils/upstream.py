@@ -0,0 +1,573 @@
+"""
+Process-wide wiring between the endpoints and the OpenWeatherMap client.
+
+Holds the shared state every lookup goes through: the weather cache (and its
+host-wide tier), the unknown-city cache, the upstream quota, the shared
+:class:`~libs.utils.api_client.WeatherClient` with its circuit breaker, the
+read-through source and the observation listeners. The ``fetch_*`` functions
+here are what endpoints call; :mod:`libs.utils.api_client` only talks HTTP.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from apps.weather_service.core.config import settings
+from libs.models.observation import WeatherObservation
+from libs.utils.api_client import WeatherClient, upstream_status
+from libs.utils.cache import Aged, TTLCache, normalize_city
+from libs.utils.circuit import CircuitBreaker, CircuitOpen
+from libs.utils.cities import UnknownCity, canonical_city, city_key
+from libs.utils.geo import GeoCell, cell_from_key, cell_key, snap
+from libs.utils.logger import get_logger
+from libs.utils.metrics import STAGE_PARSE, gauge
+from libs.utils.quota import Priority, QuotaExceeded, QuotaScheduler, upstream_priority
+from libs.utils.shared_cache import SharedCache
+
+logger = get_logger(__name__)
+
+# Shared by every endpoint in the process, keyed by normalized city name or,
+# for coordinate lookups, by geohash cell (see libs.utils.geo).
+weather_cache = TTLCache(
+    max_entries=settings.WEATHER_CACHE_MAX_ENTRIES,
+    ttl=settings.WEATHER_CACHE_TTL,
+    stale_ttl=settings.WEATHER_CACHE_STALE_TTL,
+)
+
+# City keys upstream answered 404 for; lookups fail locally until they expire.
+unknown_cities = TTLCache(
+    max_entries=settings.UNKNOWN_CITY_MAX_ENTRIES,
+    ttl=settings.UNKNOWN_CITY_TTL,
+)
+
+# Per-API-key upstream budget shared by every caller in the process.
+upstream_quota = QuotaScheduler(
+    calls_per_minute=settings.QUOTA_CALLS_PER_MINUTE,
+    calls_per_day=settings.QUOTA_CALLS_PER_DAY,
+    low_priority_reserve=settings.QUOTA_LOW_PRIORITY_RESERVE,
+    max_wait={
+        Priority.INTERACTIVE: settings.QUOTA_MAX_WAIT_INTERACTIVE,
+        Priority.BATCH: settings.QUOTA_MAX_WAIT_BATCH,
+    },
+)
+
+gauge(
+    "weather_cache_entries",
+    "Entries in the in-process weather cache and its capacity.",
+    lambda: [
+        (("used",), len(weather_cache)),
+        (("capacity",), weather_cache.max_entries),
+    ],
+    ("state",),
+)
+gauge(
+    "weather_cache_events_total",
+    "Weather cache lookups and maintenance events.",
+    lambda: [
+        ((event,), value)
+        for event, value in weather_cache.stats().items()
+        if event not in ("size", "max_entries")
+    ],
+    ("event",),
+    kind="counter",
+)
+gauge(
+    "weather_shared_cache_events_total",
+    "Host-wide weather cache reads and writes by this process.",
+    lambda: (
+        [
+            ((event,), value)
+            for event, value in weather_cache.shared.stats().items()
+            if event not in ("slots", "record_size")
+        ]
+        if weather_cache.shared is not None
+        else []
+    ),
+    ("event",),
+    kind="counter",
+)
+gauge(
+    "upstream_quota_queue_depth",
+    "Upstream calls waiting for quota.",
+    lambda: [((), upstream_quota.stats()["queue_depth"])],
+)
+
+
+def start_shared_cache() -> Optional[SharedCache]:
+    """
+    Back ``weather_cache`` with the host-wide cache file, if configured.
+    Called from the application lifespan; an unusable file leaves the cache
+    process-local.
+
+    Returns:
+        SharedCache | None: The shared store, or None if not in use.
+    """
+    if not settings.WEATHER_SHARED_CACHE_PATH or weather_cache.shared is not None:
+        return weather_cache.shared
+    try:
+        weather_cache.shared = SharedCache(
+            settings.WEATHER_SHARED_CACHE_PATH,
+            slots=settings.WEATHER_SHARED_CACHE_SLOTS,
+            record_size=settings.WEATHER_SHARED_CACHE_RECORD_BYTES,
+        )
+    except (OSError, ValueError) as e:
+        logger.error("Shared weather cache disabled: %s", e)
+        return None
+    logger.info("Weather cache shared through %s", settings.WEATHER_SHARED_CACHE_PATH)
+    return weather_cache.shared
+
+
+def stop_shared_cache() -> None:
+    shared, weather_cache.shared = weather_cache.shared, None
+    if shared is not None:
+        shared.close()
+
+
+# Called with each observation fetched from upstream (not on cache hits).
+_observation_listeners: List[Callable[[WeatherObservation], None]] = []
+
+
+def add_observation_listener(listener: Callable[[WeatherObservation], None]) -> None:
+    """
+    Register a callback for every observation fetched from upstream.
+
+    Listeners run on the request path and must not block (e.g. buffer only).
+
+    Args:
+        listener (Callable): Function taking a WeatherObservation.
+    """
+    _observation_listeners.append(listener)
+
+
+def remove_observation_listener(listener: Callable[[WeatherObservation], None]) -> None:
+    """
+    Unregister a callback added with :func:`add_observation_listener`.
+    """
+    if listener in _observation_listeners:
+        _observation_listeners.remove(listener)
+
+
+# Optional shared warm tier (e.g. the latest database row) consulted before
+# upstream on a cache miss. Returns an OpenWeather-shaped payload, optionally
+# wrapped in Aged with the seconds since it was stored, or None.
+_read_through: Optional[Callable[..., Union[Dict, Aged, None]]] = None
+
+
+def set_read_through(source: Optional[Callable[..., Union[Dict, Aged, None]]]) -> None:
+    """
+    Install (or with None, remove) the read-through source used on cache misses.
+
+    Args:
+        source (Callable | None): Function taking a city name (and optionally
+            a ``max_age`` override in seconds) and returning a payload, or
+            None when it has no fresh data. A payload wrapped in
+            :class:`~libs.utils.cache.Aged` is cached only for the rest of
+            its TTL.
+    """
+    global _read_through
+    _read_through = source
+
+
+def _read_through_payload(
+    city: str, max_age: Optional[float] = None
+) -> Union[Dict, Aged, None]:
+    """
+    Ask the read-through source for a city; errors fall back to upstream.
+    """
+    source = _read_through
+    if source is None:
+        return None
+    try:
+        return source(city) if max_age is None else source(city, max_age=max_age)
+    except Exception as e:
+        logger.error("Read-through lookup failed for %s: %s", city, e)
+        return None
+
+
+def _notify_fetched(payload: Dict, city: str) -> Dict:
+    """
+    Hand a freshly fetched payload to the observation listeners.
+    """
+    if _observation_listeners:
+        try:
+            observation = WeatherObservation.from_payload(payload, city)
+        except ValueError as e:
+            logger.error("Could not parse fetched weather data for %s: %s", city, e)
+            return payload
+        for listener in list(_observation_listeners):
+            try:
+                listener(observation)
+            except Exception as e:
+                logger.error("Observation listener failed: %s", e)
+    return payload
+
+
+def _raise_if_rate_limited(api_key: str, error: Exception) -> None:
+    """
+    When upstream answered 429 despite the quota, drain the key's budget and
+    re-raise as :class:`QuotaExceeded` so callers report it as such.
+    """
+    if upstream_status(error) == 429:
+        logger.warning("Upstream rate limit hit; pausing calls for this API key.")
+        upstream_quota.penalize(api_key)
+        raise QuotaExceeded("Upstream rate limit reached", 60.0) from error
+
+
+def _raise_if_not_found(city: str, error: Exception) -> None:
+    """
+    When upstream answered 404 for a city, remember the name in
+    ``unknown_cities`` and re-raise as :class:`UnknownCity`.
+    """
+    if upstream_status(error) == 404:
+        unknown_cities.set(city_key(city), True)
+        raise UnknownCity(city) from error
+
+
+def _check_known(city: str) -> None:
+    """
+    Fail without an upstream call for a name upstream recently answered 404 for.
+
+    Raises:
+        UnknownCity: If the name is in ``unknown_cities``.
+    """
+    if unknown_cities.get(city_key(city)):
+        raise UnknownCity(city)
+
+
+def _circuit_fallback(city: str, error: CircuitOpen) -> Union[Dict, Aged]:
+    """
+    While the circuit is open, answer from an older stored observation
+    (up to ``CIRCUIT_FALLBACK_MAX_AGE``) or re-raise ``error``.
+    """
+    payload = _read_through_payload(city, max_age=settings.CIRCUIT_FALLBACK_MAX_AGE)
+    if payload is None:
+        raise error
+    logger.warning("Upstream circuit open; serving stored observation for %s", city)
+    return payload
+
+
+_client: Optional[WeatherClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> WeatherClient:
+    """
+    Return the process-wide weather client, creating it on first use.
+
+    Returns:
+        WeatherClient: Shared client configured from settings.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                breaker = None
+                if settings.CIRCUIT_ENABLED:
+                    breaker = CircuitBreaker(
+                        window=settings.CIRCUIT_WINDOW,
+                        min_calls=settings.CIRCUIT_MIN_CALLS,
+                        error_rate=settings.CIRCUIT_ERROR_RATE,
+                        slow_call_seconds=settings.CIRCUIT_SLOW_CALL_SECONDS,
+                        slow_call_rate=settings.CIRCUIT_SLOW_CALL_RATE,
+                        open_seconds=settings.CIRCUIT_OPEN_SECONDS,
+                    )
+                _client = WeatherClient(
+                    base_url=settings.OPENWEATHER_BASE_URL,
+                    pool_size=settings.UPSTREAM_POOL_SIZE,
+                    connect_timeout=settings.UPSTREAM_CONNECT_TIMEOUT,
+                    read_timeout=settings.UPSTREAM_READ_TIMEOUT,
+                    breaker=breaker,
+                    hedge_percentile=settings.HEDGE_PERCENTILE,
+                    hedge_min_delay=settings.HEDGE_MIN_DELAY,
+                    hedge_min_samples=settings.HEDGE_MIN_SAMPLES,
+                    # Hedges are optional work: only when quota is plentiful
+                    hedge_admit=upstream_quota.try_acquire,
+                )
+    return _client
+
+
+async def close_client() -> None:
+    """
+    Close the shared client. Called from the application lifespan on shutdown.
+    """
+    global _client
+    with _client_lock:
+        client, _client = _client, None
+    if client is not None:
+        await client.aclose()
+
+
+def async_loader(
+    api_key: str, city: str, read_through: bool = True
+) -> Callable[[], Awaitable[Union[Dict, Aged]]]:
+    """
+    Build the cache loader for a city: read-through source first, then upstream.
+
+    Upstream calls are admitted by ``upstream_quota`` at the priority of the
+    calling context (see :func:`libs.utils.quota.upstream_priority`).
+
+    Reloads of an entry that is stale or about to expire pass
+    ``read_through=False``: the stored row is usually the one written by the
+    fetch being replaced, so only upstream can bring newer data. The stored
+    row is still the fallback while the circuit is open.
+
+    Args:
+        api_key (str): API key for OpenWeatherMap.
+        city (str): Name of the city.
+        read_through (bool): Try the read-through source before upstream.
+
+    Returns:
+        Callable: Zero-argument coroutine function returning the payload.
+    """
+
+    async def load() -> Union[Dict, Aged]:
+        if read_through and _read_through is not None:
+            payload = await asyncio.to_thread(_read_through_payload, city)
+            if payload is not None:
+                return payload
+        client = get_client()
+        try:
+            if client.breaker is not None:
+                client.breaker.check()
+            await upstream_quota.acquire(api_key)
+            payload = await client.fetch_async(api_key, city)
+        except CircuitOpen as e:
+            if _read_through is None:
+                raise
+            return await asyncio.to_thread(_circuit_fallback, city, e)
+        except Exception as e:
+            _raise_if_rate_limited(api_key, e)
+            _raise_if_not_found(city, e)
+            raise
+        return _notify_fetched(payload, city)
+
+    return load
+
+
+def _in_background(
+    loader: Callable[[], Awaitable[Union[Dict, Aged]]],
+) -> Callable[[], Awaitable[Union[Dict, Aged]]]:
+    """
+    Wrap a stale-while-revalidate loader so its upstream call waits at
+    ``Priority.BACKGROUND``, whatever the priority of the request that found
+    the entry stale; that request has already been answered.
+    """
+
+    async def load() -> Union[Dict, Aged]:
+        with upstream_priority(Priority.BACKGROUND):
+            return await loader()
+
+    return load
+
+
+async def fetch_weather_async(api_key: str, city: str) -> Dict:
+    """
+    Fetch weather data for a given city from the OpenWeatherMap API.
+
+    The name is first mapped to its canonical spelling by the city index
+    (:func:`libs.utils.cities.canonical_city`), so every spelling of a city
+    shares one cache entry and upstream query.
+
+    Results are served from ``weather_cache`` while fresh; concurrent misses
+    for the same city share a single load, which tries the read-through
+    source (if installed) before calling upstream. While the upstream circuit
+    is open, older stored observations are served instead. Names upstream
+    answers 404 for are remembered for ``UNKNOWN_CITY_TTL`` and rejected
+    without another call.
+
+    Args:
+        api_key (str): API key for OpenWeatherMap.
+        city (str): Name of the city.
+
+    Returns:
+        Dict: Parsed JSON response from the API.
+
+    Raises:
+        ValueError: If the city name is invalid.
+        httpx.HTTPStatusError: If the API response contains an error.
+        httpx.RequestError: For other network-related issues.
+        CircuitOpen: If the circuit is open and no stored observation exists.
+        UnknownCity: If the city is not in the index (strict mode only) or
+            upstream does not know it.
+    """
+    if not city or not city.strip():
+        raise ValueError("City name cannot be empty.")
+    city = canonical_city(city)
+    _check_known(city)
+    return await weather_cache.get_or_load_async(
+        city_key(city),
+        async_loader(api_key, city),
+        revalidate=_in_background(async_loader(api_key, city, read_through=False)),
+    )
+
+
+def cell_loader(api_key: str, cell: GeoCell) -> Callable[[], Awaitable[Dict]]:
+    """
+    Build the cache loader for a geohash cell: one upstream call for the
+    cell centre, admitted by ``upstream_quota`` like a city lookup.
+
+    Cell observations are not passed to the observation listeners, so they
+    are never recorded as city rows (and never served as a city through the
+    read-through or history); for the same reason there is no read-through
+    or stored fallback for cells.
+
+    Args:
+        api_key (str): API key for OpenWeatherMap.
+        cell (GeoCell): The cell to load.
+
+    Returns:
+        Callable: Zero-argument coroutine function returning the payload.
+    """
+
+    async def load() -> Dict:
+        client = get_client()
+        try:
+            if client.breaker is not None:
+                client.breaker.check()
+            await upstream_quota.acquire(api_key)
+            payload = await client.fetch_coords_async(api_key, cell.lat, cell.lon)
+        except Exception as e:
+            _raise_if_rate_limited(api_key, e)
+            raise
+        return payload
+
+    return load
+
+
+def loader_for_key(api_key: str, key: str) -> Callable[[], Awaitable[Dict]]:
+    """
+    Reload loader for any ``weather_cache`` key, city or cell; used by the
+    refresh scheduler, so city keys skip the read-through source.
+    """
+    cell = cell_from_key(key)
+    if cell is not None:
+        return cell_loader(api_key, cell)
+    return async_loader(api_key, key, read_through=False)
+
+
+def coordinate_cell(lat: float, lon: float) -> GeoCell:
+    """
+    Cell of ``GEO_CELL_PRECISION`` containing a point.
+
+    Raises:
+        ValueError: If the coordinates are out of range.
+    """
+    return snap(lat, lon, settings.GEO_CELL_PRECISION)
+
+
+async def fetch_cell_observation_async(
+    api_key: str, cell: GeoCell
+) -> WeatherObservation:
+    """
+    Fetch (or serve from cache) and parse the observation for a geohash cell.
+
+    Every point in the cell shares one cache entry and one upstream call.
+
+    Args:
+        api_key (str): API key for OpenWeatherMap.
+        cell (GeoCell): Cell from :func:`coordinate_cell`.
+
+    Returns:
+        WeatherObservation: Parsed observation; ``city`` is the place name
+        upstream reports for the cell centre, or the geohash if it has none.
+    """
+    payload = await weather_cache.get_or_load_async(
+        cell_key(cell),
+        cell_loader(api_key, cell),
+        revalidate=_in_background(cell_loader(api_key, cell)),
+    )
+    started = time.perf_counter()
+    observation = WeatherObservation.from_payload(
+        payload, payload.get("name") or cell.geohash
+    )
+    STAGE_PARSE.observe(time.perf_counter() - started)
+    return observation
+
+
+def cell_fresh_for(cell: GeoCell) -> float:
+    """
+    Seconds the cached observation for ``cell`` stays fresh; 0 if it is not
+    cached or already stale.
+    """
+    return max(0.0, weather_cache.expires_in(cell_key(cell)) or 0.0)
+
+
+def cache_fresh_for(city: str) -> float:
+    """
+    Seconds the cached observation for ``city`` stays fresh; 0 if it is not
+    cached or already stale.
+    """
+    return max(0.0, weather_cache.expires_in(city_key(city)) or 0.0)
+
+
+async def fetch_observation_async(api_key: str, city: str) -> WeatherObservation:
+    """
+    Fetch (or serve from cache) and parse the current observation for a city.
+
+    Args:
+        api_key (str): API key for OpenWeatherMap.
+        city (str): Name of the city.
+
+    Returns:
+        WeatherObservation: Parsed observation.
+    """
+    city = canonical_city(city)
+    payload = await fetch_weather_async(api_key, city)
+    started = time.perf_counter()
+    observation = WeatherObservation.from_payload(payload, city)
+    STAGE_PARSE.observe(time.perf_counter() - started)
+    return observation
+
+
+def dedupe_cities(cities: Iterable[str]) -> List[str]:
+    """
+    Drop blank and duplicate city names, keeping the first spelling seen.
+    Names that resolve to the same indexed city are duplicates.
+
+    Args:
+        cities (Iterable[str]): City names as received from the client.
+
+    Returns:
+        List[str]: Unique city names in first-seen order.
+    """
+    unique: Dict[str, str] = {}
+    for city in cities:
+        if city and city.strip():
+            try:
+                key = city_key(city)
+            except UnknownCity:
+                key = normalize_city(city)
+            unique.setdefault(key, city.strip())
+    return list(unique.values())
+
+
+async def fetch_observations_async(
+    api_key: str, cities: Iterable[str], concurrency: int
+) -> List[Tuple[str, Union[WeatherObservation, Exception]]]:
+    """
+    Fetch observations for many cities with at most ``concurrency`` in flight.
+
+    Failures are returned per city rather than raised, so one bad city does
+    not fail the whole batch.
+
+    Args:
+        api_key (str): API key for OpenWeatherMap.
+        cities (Iterable[str]): City names; duplicates are fetched once.
+        concurrency (int): Maximum number of concurrent upstream calls.
+
+    Returns:
+        List[Tuple[str, WeatherObservation | Exception]]: One entry per unique city.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def fetch_one(city: str) -> Union[WeatherObservation, Exception]:
+        async with semaphore:
+            try:
+                return await fetch_observation_async(api_key, city)
+            except Exception as e:
+                return e
+
+    unique = dedupe_cities(cities)
+    results = await asyncio.gather(*(fetch_one(city) for city in unique))
+    return list(zip(unique, results))
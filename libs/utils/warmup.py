@@ -0,0 +1,40 @@
+"""
+Background warm-up of heavy imports.
+
+Heavy optional dependencies (e.g. NumPy) are imported where they are used,
+so importing an app stays cheap. The lifespan can start loading them in a
+background thread right away. The worker accepts traffic immediately, and
+the first request that needs a module usually finds it already imported (or
+waits on the import lock for the rest of it).
+"""
+
+import importlib
+import threading
+from typing import Sequence
+
+from libs.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def warm_imports(modules: Sequence[str]) -> threading.Thread:
+    """
+    Import ``modules`` in a daemon thread.
+
+    Args:
+        modules (Sequence[str]): Dotted module names; failures are logged and skipped.
+
+    Returns:
+        threading.Thread: The started thread (join it to wait for the imports).
+    """
+
+    def run() -> None:
+        for name in modules:
+            try:
+                importlib.import_module(name)
+            except Exception as e:
+                logger.warning("Warm-up import of %s failed: %s", name, e)
+
+    thread = threading.Thread(target=run, name="import-warmup", daemon=True)
+    thread.start()
+    return thread
@@ -1,40 +1,134 @@
-from typing import Dict
+import math
+import time
+from typing import Dict, List, Sequence, Union
+
 from fastapi import HTTPException
-from libs.utils.api_client import fetch_weather
 
-def process_weather_decision(weather_data: Dict, city: str) -> Dict:
+from libs.models.observation import WeatherObservation
+from libs.utils.circuit import CircuitOpen
+from libs.utils.cities import UnknownCity
+from libs.utils.decision_engine import (
+    REASON_BAD_WEATHER,
+    REASON_CLEAR,
+    REASON_TOO_COLD,
+    decide_batch,
+    decide_one,
+    observations_to_arrays,
+)
+from libs.utils.metrics import STAGE_DECISION
+from libs.utils.quota import QuotaExceeded
+from libs.utils.upstream import fetch_observation_async
+
+# Upstream refusals that map to a retryable HTTP status rather than a 500
+UPSTREAM_UNAVAILABLE = (QuotaExceeded, CircuitOpen)
+
+
+def upstream_unavailable_error(
+    error: Union[QuotaExceeded, CircuitOpen],
+) -> HTTPException:
     """
-    Process weather data and determine if it's a good idea to go out.
+    Build the response for a call the quota or circuit breaker refused.
 
     Args:
-        weather_data (dict): The raw weather data from the API.
-        city (str): The city for which weather data was fetched.
+        error (QuotaExceeded | CircuitOpen): The refusal.
 
     Returns:
-        dict: A dictionary containing the decision and the reason.
+        HTTPException: 429 (quota) or 503 (circuit open) with ``Retry-After``.
     """
-    # Extract relevant data
-    weather_main = weather_data.get("weather", [{}])[0].get("main", "").lower()
-    temp = weather_data.get("main", {}).get("temp")
-    feels_like = weather_data.get("main", {}).get("feels_like")
-
-    # Default decision template
-    decision = {"decision": "Yes", "reason": f"The weather in {city} is clear and suitable to go out."}
-
-    # Decision logic based on weather conditions
-    if weather_main in ["rain", "snow", "storm"]:
-        decision["decision"] = "No"
-        decision["reason"] = f"The weather in {city} is {weather_main}, not ideal to go out."
-    elif temp is not None and temp < 5:  # Temperature threshold
-        decision["decision"] = "No"
-        decision["reason"] = f"The temperature in {city} is {temp}°C, which is too cold to go out."
-    elif feels_like is not None and feels_like < 5:  # Feels-like temperature threshold
-        decision["decision"] = "No"
-        decision["reason"] = f"The 'feels-like' temperature in {city} is {feels_like}°C, making it uncomfortable to go out."
+    if isinstance(error, CircuitOpen):
+        status_code = 503
+        detail = "The weather service is temporarily unavailable. Please retry later."
+    else:
+        status_code = 429
+        detail = "Weather lookups are temporarily rate limited. Please retry later."
+    return HTTPException(
+        status_code=status_code,
+        detail=detail,
+        headers={"Retry-After": str(max(1, math.ceil(error.retry_after)))},
+    )
+
+
+def unknown_city_error(error: UnknownCity) -> HTTPException:
+    """
+    Build the response for a city the local index rejected.
+
+    Returns:
+        HTTPException: 404, without any upstream call having been made.
+    """
+    return HTTPException(status_code=404, detail=str(error))
+
+
+def process_weather_decision(observation: WeatherObservation) -> Dict:
+    """
+    Determine from a parsed observation if it's a good idea to go out.
+
+    Thin wrapper around :func:`decide_one`.
+
+    Args:
+        observation (WeatherObservation): The parsed weather observation.
 
+    Returns:
+        dict: A dictionary containing the decision and the reason.
+    """
+    started = time.perf_counter()
+    reason = decide_one(
+        observation.temperature, observation.feels_like, observation.condition
+    )
+    decision = _describe(observation, reason)
+    STAGE_DECISION.observe(time.perf_counter() - started)
     return decision
 
-def should_go_out(api_key: str, city: str) -> Dict:
+
+def process_weather_decisions(observations: Sequence[WeatherObservation]) -> List[Dict]:
+    """
+    Batch variant of :func:`process_weather_decision`: one vectorized
+    :func:`decide_batch` call for all observations.
+
+    Args:
+        observations (Sequence[WeatherObservation]): Parsed observations.
+
+    Returns:
+        List[dict]: Decision and reason per observation, in order.
+    """
+    if not observations:
+        return []
+    started = time.perf_counter()
+    _, reasons = decide_batch(*observations_to_arrays(observations))
+    decisions = [
+        _describe(observation, int(reason))
+        for observation, reason in zip(observations, reasons)
+    ]
+    STAGE_DECISION.observe(time.perf_counter() - started)
+    return decisions
+
+
+def _describe(observation: WeatherObservation, reason: int) -> Dict:
+    """
+    Render a reason code as the decision and its explanation.
+    """
+    city = observation.city
+    if reason == REASON_CLEAR:
+        return {
+            "decision": "Yes",
+            "reason": f"The weather in {city} is clear and suitable to go out.",
+        }
+    if reason == REASON_BAD_WEATHER:
+        condition = observation.condition.lower()
+        text = f"The weather in {city} is {condition}, not ideal to go out."
+    elif reason == REASON_TOO_COLD:
+        text = (
+            f"The temperature in {city} is {observation.temperature}°C, "
+            "which is too cold to go out."
+        )
+    else:
+        text = (
+            f"The 'feels-like' temperature in {city} is {observation.feels_like}°C, "
+            "making it uncomfortable to go out."
+        )
+    return {"decision": "No", "reason": text}
+
+
+async def should_go_out_async(api_key: str, city: str) -> Dict:
     """
     Fetch weather data and determine if it's a good idea to go out.
 
@@ -46,15 +140,23 @@ def should_go_out(api_key: str, city: str) -> Dict:
         dict: A dictionary containing the decision and the reason.
 
     Raises:
-        HTTPException: If the API key is not configured or if there's an error fetching weather data.
+        HTTPException: If the API key is not configured or if there's an error
+            fetching weather data.
     """
     if not api_key:
-        raise HTTPException(status_code=500, detail="API key is not configured or missing.")
+        raise HTTPException(
+            status_code=500, detail="API key is not configured or missing."
+        )
 
     try:
-        # Fetch weather data
-        weather_data = fetch_weather(api_key, city)
-        # Process decision based on weather data
-        return process_weather_decision(weather_data, city)
+        observation = await fetch_observation_async(api_key, city)
+        return process_weather_decision(observation)
+    except UPSTREAM_UNAVAILABLE as e:
+        raise upstream_unavailable_error(e)
+    except UnknownCity as e:
+        raise unknown_city_error(e)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error fetching or processing weather data: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error fetching or processing weather data: {str(e)}",
+        )